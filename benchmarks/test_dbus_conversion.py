@@ -0,0 +1,89 @@
+"""
+Conversion of large dbus-python values (e.g. `metadata()`, `list_audio()`) to
+builtin types, compared with the previous recursive converter.
+
+    pytest benchmarks/test_dbus_conversion.py
+"""
+import dbus
+import dbus.types
+
+from omxplayer.player import _from_dbus_value
+
+
+def _legacy_from_dbus_value(dbusVal):
+    def from_dbus_dict(dbusDict):
+        d = dict()
+        for dbusKey, dbusVal in dbusDict.items():
+            d[_legacy_from_dbus_value(dbusKey)] = _legacy_from_dbus_value(dbusVal)
+        return d
+
+    typeUnwrapper = {
+        dbus.types.Dictionary: from_dbus_dict,
+        dbus.types.Array: lambda x: list(map(_legacy_from_dbus_value, x)),
+        dbus.types.Double: float,
+        dbus.types.Boolean: bool,
+        dbus.types.Byte: int,
+        dbus.types.Int16: int,
+        dbus.types.Int32: int,
+        dbus.types.Int64: int,
+        dbus.types.UInt32: int,
+        dbus.types.UInt64: int,
+        dbus.types.ByteArray: str,
+        dbus.types.ObjectPath: str,
+        dbus.types.Signature: str,
+        dbus.types.String: str
+    }
+    try:
+        return typeUnwrapper[type(dbusVal)](dbusVal)
+    except KeyError:
+        return dbusVal
+
+
+def _metadata(entries=1000):
+    metadata = {}
+    for i in range(entries):
+        metadata[dbus.String('xesam:field%d' % i)] = dbus.Dictionary({
+            dbus.String('length'): dbus.Int64(i * 1000),
+            dbus.String('rate'): dbus.Double(1.0),
+            dbus.String('tags'): dbus.Array([dbus.String('tag%d' % j) for j in range(10)],
+                                            signature='s'),
+        }, signature='sv')
+    return dbus.Dictionary(metadata, signature='sv')
+
+
+def _streams(count=1000):
+    return dbus.Array([dbus.String('%d:eng:Stream %d:aac:false' % (i, i)) for i in range(count)],
+                      signature='s')
+
+
+METADATA = _metadata()
+STREAMS = _streams()
+
+
+def test_conversion_matches_legacy():
+    assert _from_dbus_value(METADATA) == _legacy_from_dbus_value(METADATA)
+    assert _from_dbus_value(STREAMS) == _legacy_from_dbus_value(STREAMS)
+
+
+def test_convert_metadata(benchmark):
+    benchmark(_from_dbus_value, METADATA)
+
+
+def test_legacy_convert_metadata(benchmark):
+    benchmark(_legacy_from_dbus_value, METADATA)
+
+
+def test_convert_stream_list(benchmark):
+    benchmark(_from_dbus_value, STREAMS)
+
+
+def test_legacy_convert_stream_list(benchmark):
+    benchmark(_legacy_from_dbus_value, STREAMS)
+
+
+def test_convert_scalar(benchmark):
+    benchmark(_from_dbus_value, dbus.Int64(1000))
+
+
+def test_legacy_convert_scalar(benchmark):
+    benchmark(_legacy_from_dbus_value, dbus.Int64(1000))
@@ -0,0 +1,54 @@
+"""
+Latency of starting a process in a new session, the way omxplayer is
+started, against the resident memory of the parent: `preexec_fn=os.setsid`
+(the previous launcher, a full fork), `start_new_session=True` and
+`os.posix_spawn`. A trivial child is used so only the spawn is measured.
+
+    pytest benchmarks/test_launcher.py --benchmark-group-by=param:ballast_mb
+"""
+import os
+import subprocess
+
+import pytest
+
+from omxplayer.launcher import ScriptLauncher
+
+# Resident memory added to the benchmark process, in MiB
+BALLAST_MB = (0, 64, 256)
+CHILD = ['true']
+
+
+def _preexec_setsid():
+    process = subprocess.Popen(CHILD, preexec_fn=os.setsid)
+    process.wait()
+
+
+def _start_new_session():
+    ScriptLauncher(CHILD[0]).launch(CHILD[1:]).wait()
+
+
+def _posix_spawn():
+    ScriptLauncher(CHILD[0], use_posix_spawn=True).launch(CHILD[1:]).wait()
+
+
+LAUNCHERS = {
+    'preexec_fn': _preexec_setsid,
+    'start_new_session': _start_new_session,
+    'posix_spawn': _posix_spawn,
+}
+
+
+@pytest.fixture(params=BALLAST_MB, ids=lambda size: '%dMB' % size)
+def ballast_mb(request):
+    # Written to so the pages are resident and mapped
+    ballast = b'x' * (request.param * 1024 * 1024)
+    yield request.param
+    del ballast
+
+
+@pytest.mark.parametrize('launcher', sorted(LAUNCHERS))
+def test_spawn(benchmark, ballast_mb, launcher):
+    if launcher == 'posix_spawn' and not hasattr(os, 'posix_spawnp'):
+        pytest.skip('os.posix_spawnp needs Python 3.8+')
+    benchmark.extra_info['ballast_mb'] = ballast_mb
+    benchmark(LAUNCHERS[launcher])
@@ -0,0 +1,64 @@
+"""
+Convergence time and steady-state error of a `SyncFollower` following a
+`SyncLeader` over loopback, with simulated players whose clocks disagree.
+
+    pytest benchmarks/test_netsync.py
+"""
+import time
+
+from omxplayer.netsync import SyncLeader, SyncFollower
+from tests.fake_player import FakePlayer
+
+INTERVAL = 0.05
+TOLERANCE = 0.002
+# Consecutive in-tolerance exchanges before the follower counts as converged
+SETTLED_EXCHANGES = 5
+STEADY_STATE_EXCHANGES = 40
+
+
+def _run(initial_error, speed_error):
+    leader_player = FakePlayer(position=10.0)
+    follower_player = FakePlayer(position=10.0 + initial_error, speed_error=speed_error)
+    leader = SyncLeader(leader_player, ('127.0.0.1', 0))
+    follower = SyncFollower(follower_player, leader.address, interval=INTERVAL,
+                            tolerance=TOLERANCE, max_rate_adjustment=0.1)
+    try:
+        started = time.time()
+        settled = 0
+        while settled < SETTLED_EXCHANGES:
+            error = follower.sync()
+            settled = settled + 1 if error is not None and abs(error) <= TOLERANCE else 0
+            time.sleep(INTERVAL)
+            assert time.time() - started < 30, 'Did not converge'
+        convergence_time = time.time() - started
+
+        errors = []
+        for _ in range(STEADY_STATE_EXCHANGES):
+            errors.append(abs(follower.sync()))
+            time.sleep(INTERVAL)
+        return convergence_time, errors, follower.stats()
+    finally:
+        follower.close()
+        leader.close()
+
+
+def _report(benchmark, initial_error, speed_error):
+    convergence_time, errors, stats = benchmark.pedantic(
+        _run, args=(initial_error, speed_error), rounds=1, iterations=1)
+    benchmark.extra_info.update(convergence_time=convergence_time,
+                                mean_error=sum(errors) / len(errors),
+                                max_error=max(errors),
+                                delay=stats['delay'],
+                                seeks=stats['seeks'],
+                                rate_adjustments=stats['rate_adjustments'])
+    print('Converged in %.2fs, steady-state error mean %.2f ms, max %.2f ms' %
+          (convergence_time, 1000 * sum(errors) / len(errors), 1000 * max(errors)))
+    assert max(errors) < 0.005
+
+
+def test_converges_from_small_offset(benchmark):
+    _report(benchmark, initial_error=0.1, speed_error=0.001)
+
+
+def test_converges_after_seek(benchmark):
+    _report(benchmark, initial_error=2.0, speed_error=-0.002)
@@ -0,0 +1,138 @@
+"""
+End-to-end `OMXPlayer` scenarios against the fake omxplayer in tests/bin:
+cold start, `load()` churn, getter and `action()` throughput (blocking and
+pipelined) and controlling several players at once. Needs dbus-python,
+`dbus-daemon` and jeepney.
+
+    pytest benchmarks/test_player.py --benchmark-json=benchmark.json
+"""
+import os
+import unittest
+
+import pytest
+
+pytest.importorskip('dbus')
+
+from omxplayer import keys  # noqa: E402
+from omxplayer.dbus_daemon import DBusDaemon  # noqa: E402
+from omxplayer.player import OMXPlayer  # noqa: E402
+from omxplayer.sync_group import SyncGroup  # noqa: E402
+from tests.fake_omxplayer import use_fake_omxplayer, FAKE_BIN_DIRECTORY, \
+                                 MEDIA_FILE_PATH  # noqa: E402
+
+# The test media is 2 seconds long, keep the fake playing for the whole benchmark
+ARGS = ['--loop']
+DBUS_NAME = 'org.mpris.MediaPlayer2.omxplayer.benchmark'
+PLAYER_COUNT = 4
+# Commands sent per round of the pipelined benchmark
+BURST = 100
+
+
+@pytest.fixture(autouse=True)
+def fake_omxplayer():
+    try:
+        use_fake_omxplayer()
+    except unittest.SkipTest as e:
+        pytest.skip(str(e))
+
+
+@pytest.fixture
+def player():
+    player = OMXPlayer(MEDIA_FILE_PATH, args=ARGS, dbus_name=DBUS_NAME)
+    yield player
+    player.quit()
+
+
+@pytest.fixture
+def players():
+    players = [OMXPlayer(MEDIA_FILE_PATH, args=ARGS, dbus_name='%s%d' % (DBUS_NAME, index))
+               for index in range(PLAYER_COUNT)]
+    yield players
+    for player in players:
+        player.quit()
+
+
+def test_cold_start(benchmark):
+    started = []
+
+    def quit_previous():
+        while started:
+            started.pop().quit()
+
+    def start():
+        started.append(OMXPlayer(MEDIA_FILE_PATH, args=ARGS, dbus_name=DBUS_NAME))
+
+    benchmark.pedantic(start, setup=quit_previous, rounds=10)
+    benchmark.extra_info['bus_finder_latency'] = started[0]._bus_address_finder.latency
+    quit_previous()
+
+
+def test_cold_start_private_dbus_daemon(benchmark):
+    # omxplayer.bin started directly on a bus the library owns, no address file
+    daemon = DBusDaemon()
+    kwargs = daemon.player_kwargs(executable=os.path.join(FAKE_BIN_DIRECTORY, 'omxplayer.bin'))
+    started = []
+
+    def quit_previous():
+        while started:
+            started.pop().quit()
+
+    def start():
+        started.append(OMXPlayer(MEDIA_FILE_PATH, args=ARGS, dbus_name=DBUS_NAME, **kwargs))
+
+    benchmark.pedantic(start, setup=quit_previous, rounds=10)
+    quit_previous()
+    daemon.close()
+
+
+def test_load_churn(benchmark, player):
+    benchmark.pedantic(player.load, args=(MEDIA_FILE_PATH,), rounds=10)
+
+
+@pytest.mark.parametrize('getter', ['position', 'playback_status', 'volume'])
+def test_getter_throughput(benchmark, player, getter):
+    benchmark(getattr(player, getter))
+
+
+def test_cached_getter_throughput(benchmark, player):
+    benchmark(player.duration)
+
+
+def test_snapshot(benchmark, player):
+    benchmark(player.snapshot)
+
+
+def test_action_throughput(benchmark, player):
+    benchmark(player.action, keys.SHOW_INFO)
+
+
+def test_pipelined_action_throughput(benchmark, player):
+    def send_burst():
+        for _ in range(BURST):
+            player.pipeline.action(keys.SHOW_INFO)
+        player.pipeline.flush()
+
+    benchmark(send_burst)
+    benchmark.extra_info['commands_per_round'] = BURST
+
+
+def test_sequential_multi_player_position(benchmark, players):
+    benchmark(lambda: [player.position() for player in players])
+
+
+def test_concurrent_multi_player_position(benchmark, players):
+    group = SyncGroup(players)
+    benchmark(group.measure)
+
+
+def test_concurrent_multi_player_start(benchmark, players):
+    group = SyncGroup(players)
+
+    spreads = []
+
+    def start():
+        spreads.append(group.play())
+
+    benchmark.pedantic(start, setup=group.preroll, rounds=10)
+    benchmark.extra_info['max_start_spread'] = max(spreads)
+
@@ -0,0 +1,77 @@
+"""
+Compares the DBus transports of `omxplayer.transport`: the time and memory it
+takes a fresh interpreter to import each one and the latency of a property
+Get and a method call through each against the fake omxplayer in
+tests/bin. Backends which aren't installed are skipped; the latency benchmarks
+need `dbus-daemon` and jeepney.
+
+    pytest benchmarks/test_transport.py --benchmark-json=benchmark.json
+"""
+import subprocess
+import sys
+import unittest
+
+import pytest
+
+from omxplayer import keys
+from omxplayer.player import OMXPlayer
+from omxplayer.transport import BACKENDS, connection_class
+from tests.fake_omxplayer import use_fake_omxplayer, MEDIA_FILE_PATH
+
+ARGS = ['--loop']
+DBUS_NAME = 'org.mpris.MediaPlayer2.omxplayer.benchmark'
+
+# Importing the backend's connection class is what the player pays for it
+IMPORT_SCRIPT = '''
+import resource
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+from omxplayer.transport import connection_class
+connection_class(%r)
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before)
+'''
+
+
+def _require(backend):
+    try:
+        connection_class(backend)
+    except ImportError as e:
+        pytest.skip('%s is not installed: %s' % (backend, e))
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    _require(request.param)
+    return request.param
+
+
+@pytest.fixture
+def player(backend):
+    try:
+        use_fake_omxplayer()
+    except unittest.SkipTest as e:
+        pytest.skip(str(e))
+    player = OMXPlayer(MEDIA_FILE_PATH, args=ARGS, dbus_name=DBUS_NAME,
+                       Connection=connection_class(backend))
+    yield player
+    player.quit()
+
+
+def test_import(benchmark, backend):
+    def import_backend():
+        return subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT % backend])
+
+    output = benchmark(import_backend)
+    # kB on Linux
+    benchmark.extra_info['max_rss_increase'] = int(output)
+
+
+def test_property_latency(benchmark, player):
+    # Volume is volatile and isn't cached unless cache_ttl is set, so this is a
+    # DBus round trip either way; going straight through the connection leaves
+    # out OMXPlayer's own overhead
+    benchmark(player._connection.properties_interface.Get,
+              'org.mpris.MediaPlayer2.Player', 'Volume')
+
+
+def test_action_latency(benchmark, player):
+    benchmark(player.action, keys.SHOW_INFO)
@@ -0,0 +1,95 @@
+"""
+Per-call overhead of the wrappers every public `OMXPlayer` method goes through,
+compared with the `decorator` based wrappers they replaced.
+
+    pytest benchmarks/test_wrapper_overhead.py
+"""
+import logging
+import timeit
+
+from omxplayer.player import _check_player_is_active, _from_dbus_type, \
+                             _from_dbus_value, OMXPlayerDeadError
+
+logger = logging.getLogger(__name__)
+
+CALLS = 100000
+
+
+def _legacy_check_player_is_active(fn):
+    from decorator import decorator
+
+    def wrapped(fn, self, *args, **kwargs):
+        logger.debug('Checking if process is still alive')
+        if self._process.poll() is None:
+            logger.debug('OMXPlayer is running, so execute %s' %
+                            fn.__name__)
+            return fn(self, *args, **kwargs)
+        else:
+            raise OMXPlayerDeadError('Process is no longer alive, can\'t run command')
+
+    return decorator(wrapped, fn)
+
+
+def _legacy_from_dbus_type(fn):
+    from decorator import decorator
+
+    def wrapped(fn, self, *args, **kwargs):
+        return _from_dbus_value(fn(self, *args, **kwargs))
+
+    return decorator(wrapped, fn)
+
+
+class _Process(object):
+    # Same cost profile as Popen.poll() on a running process
+    def poll(self):
+        import os
+        try:
+            os.waitpid(os.getpid(), os.WNOHANG)
+        except OSError:
+            pass
+        return None
+
+
+class _Player(object):
+    _process_alive = True
+    _process = _Process()
+    instrumentation = None
+
+    def unwrapped(self):
+        return 1
+
+    wrapped = _check_player_is_active(_from_dbus_type(unwrapped))
+
+
+def _legacy_player():
+    class LegacyPlayer(_Player):
+        legacy = _legacy_check_player_is_active(_legacy_from_dbus_type(_Player.unwrapped))
+
+    return LegacyPlayer()
+
+
+def _overhead(player, method):
+    baseline = min(timeit.repeat(player.unwrapped, number=CALLS, repeat=5))
+    wrapped = min(timeit.repeat(getattr(player, method), number=CALLS, repeat=5))
+    return (wrapped - baseline) / CALLS
+
+
+def test_wrapped_call(benchmark):
+    benchmark(_Player().wrapped)
+
+
+def test_legacy_wrapped_call(benchmark):
+    benchmark(_legacy_player().legacy)
+
+
+def test_wrapper_overhead(benchmark):
+    # Reported only: wall clock ratios are too noisy to assert on, regressions
+    # are caught by `make benchmark-check`
+    player = _legacy_player()
+
+    def overheads():
+        return _overhead(player, 'wrapped'), _overhead(player, 'legacy')
+
+    overhead, legacy_overhead = benchmark.pedantic(overheads, rounds=1)
+    benchmark.extra_info['overhead_ns'] = overhead * 1e9
+    benchmark.extra_info['legacy_overhead_ns'] = legacy_overhead * 1e9
@@ -0,0 +1,2 @@
+# Puts the repository root on sys.path so tests and benchmarks can share
+# helpers from the `tests` package, e.g. `tests.fake_player`.
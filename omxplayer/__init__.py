@@ -1,3 +1,17 @@
-from omxplayer.player import OMXPlayer
+import sys
+
 from .__version__ import __title__, __description__, __version__
 from .__version__ import __author__, __license__, __copyright__
+
+
+def __getattr__(name):
+    # PEP 562: import the player on first use so `import omxplayer.keys` stays light
+    if name == 'OMXPlayer':
+        from omxplayer.player import OMXPlayer
+        globals()['OMXPlayer'] = OMXPlayer
+        return OMXPlayer
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+if sys.version_info < (3, 7):
+    from omxplayer.player import OMXPlayer
@@ -0,0 +1,75 @@
+"""
+DBus value types and ``DBusException``: dbus-python's when it is installed,
+otherwise builtin based equivalents the jeepney transport understands.
+
+Import the names from :mod:`omxplayer.transport`, which loads this module (and
+with it dbus-python) the first time one of them is used.
+"""
+try:
+    import dbus
+    import dbus.types
+except ImportError:
+    dbus = None
+
+
+if dbus is not None:
+    from dbus import DBusException, Boolean, Double, Int32, Int64, ObjectPath, String
+
+    def Dictionary(values, signature=None):
+        return dbus.types.Dictionary(values, signature=signature)
+
+    # Converters from dbus-python's scalar types to the builtin types we return
+    DBUS_SCALAR_CONVERTERS = {
+        dbus.types.Double: float,
+        dbus.types.Boolean: bool,
+        dbus.types.Byte: int,
+        dbus.types.Int16: int,
+        dbus.types.Int32: int,
+        dbus.types.Int64: int,
+        dbus.types.UInt16: int,
+        dbus.types.UInt32: int,
+        dbus.types.UInt64: int,
+        dbus.types.ByteArray: str,
+        dbus.types.ObjectPath: str,
+        dbus.types.Signature: str,
+        dbus.types.String: str,
+    }
+    DBUS_ARRAY = dbus.types.Array
+    DBUS_DICTIONARY = dbus.types.Dictionary
+else:
+    class DBusException(Exception):
+        """ Error returned by a DBus call, mirrors ``dbus.DBusException``
+        """
+        def __init__(self, *args, **kwargs):
+            self._dbus_error_name = kwargs.pop('name', None)
+            Exception.__init__(self, *args)
+
+        def get_dbus_name(self):
+            return self._dbus_error_name
+
+    # Subclasses so the jeepney transport can tell which DBus type is meant
+    class Boolean(int):
+        pass
+
+    class Double(float):
+        pass
+
+    class Int32(int):
+        pass
+
+    class Int64(int):
+        pass
+
+    class ObjectPath(str):
+        pass
+
+    class String(str):
+        pass
+
+    def Dictionary(values, signature=None):
+        return dict(values)
+
+    # Transports return builtin types already
+    DBUS_SCALAR_CONVERTERS = {}
+    DBUS_ARRAY = None
+    DBUS_DICTIONARY = None
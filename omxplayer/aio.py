@@ -0,0 +1,629 @@
+"""
+asyncio client for omxplayer.
+
+:class:`AsyncOMXPlayer` mirrors the :class:`~omxplayer.player.OMXPlayer` API
+with awaitable methods so that one event loop can drive many players. The
+process is spawned with :func:`asyncio.create_subprocess_exec`, the bus
+address file is awaited using the event loop (inotify where available) and
+completion is awaited on the process rather than polled.
+
+The DBus transports (see :mod:`omxplayer.transport`) make blocking calls, so
+:class:`AsyncDBusConnection` runs them on the event loop's executor, a small
+pool of threads shared by all players rather than one thread per player.
+
+Requires Python 3.5+.
+"""
+import asyncio
+import functools
+import logging
+import os
+import shlex
+import signal
+
+from evento import Event
+
+from omxplayer.bus_finder import BusFinder, BusFinderTimeoutError, FixedBusFinder, \
+                                 ADDRESS_FILE_DIRECTORY, _is_address_file
+from omxplayer import transport
+from omxplayer.transport import DBusConnectionError, connection_class
+from omxplayer.launcher import ScriptLauncher
+from omxplayer.inotify import InotifyWatcher, InotifyUnavailable
+from omxplayer.player import OMXPlayerDeadError, PlayerState, \
+                             ROOT_PROPERTIES, PLAYER_PROPERTIES, CONNECT_TIMEOUT, \
+                             GET_ALL_UNSUPPORTED_ERRORS, \
+                             _close_connection, _from_dbus_value, _retry_delays
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class AsyncBusFinder(BusFinder):
+    """
+    :class:`~omxplayer.bus_finder.BusFinder` whose waiting is done on the
+    event loop: inotify events are read with ``loop.add_reader``, otherwise the
+    file is polled with :func:`asyncio.sleep`.
+    """
+    async def get_address(self):
+        start = self._start_timer()
+        if self.path:
+            await self._wait_for_async(lambda: os.path.isfile(self.path),
+                                       os.path.dirname(self.path),
+                                       self._is_path_name)
+        else:
+            self.path = await self._wait_for_async(self._newest_address_file,
+                                                   ADDRESS_FILE_DIRECTORY,
+                                                   _is_address_file)
+        await self._wait_for_async(lambda: os.path.getsize(self.path),
+                                   os.path.dirname(self.path),
+                                   self._is_path_name)
+        return self._read_address(start)
+
+    async def _wait_for_async(self, condition, directory, name_filter):
+        result = condition()
+        if result:
+            return result
+
+        watcher = None
+        if self.use_inotify:
+            try:
+                watcher = InotifyWatcher(directory or '.', name_filter)
+            except InotifyUnavailable as e:
+                logger.debug('Falling back to polling %s: %s', directory, e)
+
+        if watcher is None:
+            while True:
+                result = condition()
+                if result:
+                    return result
+                remaining = self._remaining()
+                await asyncio.sleep(self.poll_interval if remaining is None
+                                    else min(self.poll_interval, remaining))
+
+        loop = asyncio.get_event_loop()
+        changed = asyncio.Event()
+
+        def on_readable():
+            if watcher.read_events():
+                changed.set()
+
+        loop.add_reader(watcher.fileno(), on_readable)
+        try:
+            while True:
+                result = condition()
+                if result:
+                    return result
+                changed.clear()
+                try:
+                    await asyncio.wait_for(changed.wait(), self._remaining())
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            loop.remove_reader(watcher.fileno())
+            watcher.close()
+
+
+class AsyncFixedBusFinder(FixedBusFinder):
+    """
+    :class:`~omxplayer.bus_finder.FixedBusFinder` for
+    :class:`AsyncOMXPlayer`, e.g. to use a
+    :class:`~omxplayer.dbus_daemon.DBusDaemon`'s bus.
+    """
+    async def get_address(self):
+        return self.address
+
+
+class _AsyncInterface(object):
+    def __init__(self, interface, connection):
+        self._interface = interface
+        self._connection = connection
+        self.dbus_interface = interface.dbus_interface
+
+    def __getattr__(self, name):
+        method = getattr(self._interface, name)
+
+        def call(*args):
+            return self._connection.run(method, *args)
+        return call
+
+
+class AsyncDBusConnection(object):
+    """
+    Wraps a blocking connection of one of the :mod:`omxplayer.transport`
+    backends, exposing the same interfaces with methods returning awaitables.
+
+    Use :meth:`create` to construct one without blocking the event loop.
+
+    Args:
+        connection: the blocking connection to wrap
+        executor (concurrent.futures.Executor): where blocking calls run, the
+                                                loop's default executor if ``None``
+    """
+    def __init__(self, connection, executor=None):
+        self._connection = connection
+        self._executor = executor
+        self.root_interface = _AsyncInterface(connection.root_interface, self)
+        self.player_interface = _AsyncInterface(connection.player_interface, self)
+        self.properties_interface = _AsyncInterface(connection.properties_interface, self)
+
+    @classmethod
+    async def create(cls, bus_address, dbus_name=None, executor=None, Connection=None):
+        Connection = Connection if Connection else connection_class()
+        loop = asyncio.get_event_loop()
+        connection = await loop.run_in_executor(
+            executor, functools.partial(Connection, bus_address, dbus_name))
+        return cls(connection, executor)
+
+    def run(self, fn, *args):
+        return asyncio.get_event_loop().run_in_executor(
+            self._executor, functools.partial(fn, *args))
+
+    async def verify_name_owner(self, process_group):
+        # Optional for caller supplied Connection classes, see OMXPlayer._verify_name_owner
+        verify_name_owner = getattr(self._connection, 'verify_name_owner', None)
+        if verify_name_owner is not None:
+            await self.run(verify_name_owner, process_group)
+
+    def close(self):
+        _close_connection(self._connection)
+
+
+class AsyncOMXPlayer(object):
+    """
+    asyncio OMXPlayer controller, see :class:`~omxplayer.player.OMXPlayer`
+    for a description of the arguments and methods.
+
+    Construct players with :meth:`create` which starts ``omxplayer`` and
+    connects to it.
+
+    >>> player = await AsyncOMXPlayer.create('path.mp4')
+    >>> await player.set_volume(2)
+    >>> await player.wait_until_finished()
+    """
+    def __init__(self, source,
+                 args=None,
+                 bus_address_finder=None,
+                 Connection=None,
+                 dbus_name=None,
+                 executor=None,
+                 connect_timeout=CONNECT_TIMEOUT,
+                 launcher=None):
+        if args is None:
+            self.args = []
+        elif isinstance(args, str):
+            self.args = shlex.split(args)
+        else:
+            self.args = list(map(str, args))
+        self._is_playing = True
+        self._source = source
+        self._dbus_name = dbus_name
+        self._Connection = Connection if Connection else connection_class()
+        self._bus_address_finder = bus_address_finder if bus_address_finder \
+            else AsyncBusFinder.for_user(timeout=connect_timeout)
+        self._executor = executor
+        self._connect_timeout = connect_timeout
+        self._launcher = launcher if launcher else ScriptLauncher()
+
+        #: Event called on pause ``callback(player)``
+        self.pauseEvent = Event()
+        #: Event called on play ``callback(player)``
+        self.playEvent = Event()
+        #: Event called on stop ``callback(player)``
+        self.stopEvent = Event()
+        #: Event called on exit ``callback(player, exit_status)``
+        self.exitEvent = Event()
+        #: Event called on seek ``callback(player, relative_position)``
+        self.seekEvent = Event()
+        #: Event called on setting position ``callback(player, absolute_position)``
+        self.positionEvent = Event()
+        #: Event called on setting the playback rate ``callback(player, rate)``
+        self.rateEvent = Event()
+
+        self._process = None
+        self._process_monitor = None
+        self._connection = None
+
+    @classmethod
+    async def create(cls, source, pause=False, **kwargs):
+        """
+        Start ``omxplayer`` playing ``source`` and connect to it.
+
+        Returns:
+            AsyncOMXPlayer: the connected player
+        """
+        player = cls(source, **kwargs)
+        await player.load(source, pause=pause)
+        return player
+
+    async def load(self, source, pause=False):
+        """
+        Loads a new source (as a file) from ``source`` (a file path or URL)
+        by killing the current ``omxplayer`` process and forking a new one.
+        """
+        self._source = source
+        try:
+            await self._load_source(source)
+            if pause:
+                # See OMXPlayer.load
+                await self.pause()
+        except:
+            # Make sure we do not leave any dangling process
+            if self._process:
+                self._terminate_process(self._process)
+                self._process = None
+            raise
+
+    async def _load_source(self, source):
+        if self._process:
+            await self.quit()
+
+        self._process = await self._run_omxplayer(source)
+        self._rate = 1.0
+        self._is_muted = False
+        self._supports_get_all = True
+        self._connection = await self._setup_dbus_connection()
+
+    async def _run_omxplayer(self, source):
+        try:
+            source = str(source.resolve())
+        except AttributeError:
+            pass
+        args = self.args + [source]
+        if self._dbus_name:
+            args += ['--dbus_name', self._dbus_name]
+        command = self._launcher.command(args)
+        logger.debug("Opening omxplayer with the command: %s" % command)
+        # A new session gives us a process group to kill, see OMXPlayer._run_omxplayer
+        process = await asyncio.create_subprocess_exec(*command,
+                                                       stdin=asyncio.subprocess.DEVNULL,
+                                                       stdout=asyncio.subprocess.DEVNULL,
+                                                       env=self._launcher.environment(),
+                                                       start_new_session=True)
+        logger.debug('Process opened with PID %s' % process.pid)
+        self._process_monitor = asyncio.ensure_future(self._monitor(process))
+        return process
+
+    async def _monitor(self, process):
+        exit_status = await process.wait()
+        logger.info("OMXPlayer process is dead, all DBus calls from here "
+                    "will fail")
+        self.exitEvent(self, exit_status)
+
+    def _terminate_process(self, process):
+        try:
+            os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+            logger.debug('SIGTERM Sent to pid: %s' % process.pid)
+        except OSError:
+            logger.error('Could not find the process to kill')
+
+    async def _setup_dbus_connection(self):
+        logger.debug('Trying to connect to OMXPlayer via DBus')
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self._connect_timeout
+        for tries, delay in enumerate(_retry_delays()):
+            logger.debug('DBus connect attempt: {}'.format(tries))
+            try:
+                address = await self._bus_address_finder.get_address()
+                connection = await AsyncDBusConnection.create(address,
+                                                              self._dbus_name,
+                                                              self._executor,
+                                                              self._Connection)
+                try:
+                    # See OMXPlayer._verify_name_owner
+                    await connection.verify_name_owner(self._process.pid)
+                except DBusConnectionError:
+                    connection.close()
+                    raise
+                logger.debug('Connected to OMXPlayer at DBus address: %s' % address)
+                return connection
+            except BusFinderTimeoutError as e:
+                raise SystemError('DBus cannot connect to the OMXPlayer process: %s' % e)
+            except (DBusConnectionError, IOError):
+                logger.debug('Failed to connect to OMXPlayer DBus address')
+                if loop.time() + delay > deadline:
+                    raise SystemError('DBus cannot connect to the OMXPlayer process')
+                await asyncio.sleep(delay)
+
+    def _check_player_is_active(self):
+        if self._process is None or self._process.returncode is not None:
+            raise OMXPlayerDeadError('Process is no longer alive, can\'t run command')
+
+    async def _root_interface_property(self, prop):
+        self._check_player_is_active()
+        return _from_dbus_value(await self._connection.properties_interface.Get(
+            self._connection.root_interface.dbus_interface, prop))
+
+    async def _player_interface_property(self, prop, val=None):
+        self._check_player_is_active()
+        interface = self._connection.player_interface.dbus_interface
+        if val is not None:
+            return _from_dbus_value(await self._connection.properties_interface.Set(
+                interface, prop, val))
+        return _from_dbus_value(await self._connection.properties_interface.Get(
+            interface, prop))
+
+    async def _player_method(self, method, *args):
+        self._check_player_is_active()
+        return _from_dbus_value(await getattr(self._connection.player_interface, method)(*args))
+
+    async def wait_until_finished(self):
+        """
+        Wait for the ``omxplayer`` process to exit, without polling.
+
+        Returns:
+            int: the process' exit status
+        """
+        if self._process_monitor is None:
+            return None
+        await asyncio.shield(self._process_monitor)
+        return self._process.returncode if self._process else None
+
+    async def quit(self):
+        """
+        Quit the player, waiting until the process has died
+        """
+        if self._process is None:
+            logger.debug('Quit was called after self._process had already been released')
+            return
+
+        logger.debug('Quitting OMXPlayer')
+        self._terminate_process(self._process)
+        await asyncio.shield(self._process_monitor)
+        self._process = None
+        if self._connection is not None:
+            self._connection.close()
+
+    def get_source(self):
+        """
+        Returns:
+            str: source currently playing
+        """
+        return self._source
+
+    """ ROOT INTERFACE PROPERTIES """
+
+    async def can_quit(self):
+        return await self._root_interface_property('CanQuit')
+
+    async def fullscreen(self):
+        return await self._root_interface_property('Fullscreen')
+
+    async def can_set_fullscreen(self):
+        return await self._root_interface_property('CanSetFullscreen')
+
+    async def can_raise(self):
+        return await self._root_interface_property('CanRaise')
+
+    async def has_track_list(self):
+        return await self._root_interface_property('HasTrackList')
+
+    async def identity(self):
+        return await self._root_interface_property('Identity')
+
+    async def supported_uri_schemes(self):
+        return await self._root_interface_property('SupportedUriSchemes')
+
+    """ PLAYER INTERFACE PROPERTIES """
+
+    async def can_go_next(self):
+        return await self._player_interface_property('CanGoNext')
+
+    async def can_go_previous(self):
+        return await self._player_interface_property('CanGoPrevious')
+
+    async def can_seek(self):
+        return await self._player_interface_property('CanSeek')
+
+    async def can_control(self):
+        return await self._player_interface_property('CanControl')
+
+    async def can_play(self):
+        return await self._player_interface_property('CanPlay')
+
+    async def can_pause(self):
+        return await self._player_interface_property('CanPause')
+
+    async def playback_status(self):
+        return await self._player_interface_property('PlaybackStatus')
+
+    async def volume(self):
+        if self._is_muted:
+            return 0
+        return await self._player_interface_property('Volume')
+
+    async def set_volume(self, volume):
+        # 0 isn't handled correctly so we have to set it to a very small value to achieve the same purpose
+        if volume == 0:
+            volume = 1e-10
+        return await self._player_interface_property('Volume', transport.Double(volume))
+
+    async def position(self):
+        return await self._player_interface_property('Position') / (1000.0 * 1000.0)
+
+    async def minimum_rate(self):
+        return await self._player_interface_property('MinimumRate')
+
+    async def maximum_rate(self):
+        return await self._player_interface_property('MaximumRate')
+
+    async def rate(self):
+        self._check_player_is_active()
+        return self._rate
+
+    async def set_rate(self, rate):
+        self._rate = await self._player_interface_property('Rate', transport.Double(rate))
+        self.rateEvent(self, self._rate)
+        return self._rate
+
+    async def metadata(self):
+        return await self._player_interface_property('Metadata')
+
+    async def aspect_ratio(self):
+        return await self._player_interface_property('Aspect')
+
+    async def video_stream_count(self):
+        return await self._player_interface_property('VideoStreamCount')
+
+    async def width(self):
+        return await self._player_interface_property('ResWidth')
+
+    async def height(self):
+        return await self._player_interface_property('ResHeight')
+
+    async def duration(self):
+        return await self._player_interface_property('Duration') / (1000.0 * 1000.0)
+
+    async def snapshot(self):
+        """
+        Returns:
+            PlayerState: all properties, see :meth:`OMXPlayer.snapshot`
+        """
+        self._check_player_is_active()
+        values = {}
+        for interface, properties in [(self._connection.root_interface.dbus_interface, ROOT_PROPERTIES),
+                                      (self._connection.player_interface.dbus_interface, PLAYER_PROPERTIES)]:
+            interface_values = await self._all_interface_properties(interface, properties)
+            for prop, field in properties.items():
+                values[field] = interface_values.get(prop)
+
+        for field in ('position', 'duration'):
+            if values[field] is not None:
+                values[field] = values[field] / (1000.0 * 1000.0)
+        if self._is_muted:
+            values['volume'] = 0
+        values['rate'] = self._rate
+        return PlayerState(**values)
+
+    async def _all_interface_properties(self, interface, properties):
+        properties_interface = self._connection.properties_interface
+        if self._supports_get_all:
+            try:
+                return _from_dbus_value(await properties_interface.GetAll(interface))
+            except transport.DBusException as e:
+                if e.get_dbus_name() not in GET_ALL_UNSUPPORTED_ERRORS:
+                    raise
+                logger.debug('GetAll failed (%s), falling back to Get', e)
+                self._supports_get_all = False
+
+        props = list(properties)
+        results = await asyncio.gather(*[properties_interface.Get(interface, prop) for prop in props],
+                                       return_exceptions=True)
+        values = {}
+        for prop, result in zip(props, results):
+            if isinstance(result, transport.DBusException):
+                logger.debug('Could not get property %s', prop)
+            elif isinstance(result, Exception):
+                raise result
+            else:
+                values[prop] = _from_dbus_value(result)
+        return values
+
+    """ PLAYER INTERFACE METHODS """
+
+    async def pause(self):
+        await self._player_method('Pause')
+        self._is_playing = False
+        self.pauseEvent(self)
+
+    async def play_pause(self):
+        await self._player_method('PlayPause')
+        self._is_playing = not self._is_playing
+        if self._is_playing:
+            self.playEvent(self)
+        else:
+            self.pauseEvent(self)
+
+    async def stop(self):
+        await self._player_method('Stop')
+        self.stopEvent(self)
+
+    async def seek(self, relative_position):
+        await self._player_method('Seek', transport.Int64(1000.0 * 1000 * relative_position))
+        self.seekEvent(self, relative_position)
+
+    async def set_position(self, position):
+        await self._player_method('SetPosition', transport.ObjectPath("/not/used"), transport.Int64(position * 1000.0 * 1000))
+        self.positionEvent(self, position)
+
+    async def set_layer(self, layer):
+        await self._player_method('SetLayer', transport.Int64(layer))
+
+    async def set_alpha(self, alpha):
+        await self._player_method('SetAlpha', transport.ObjectPath('/not/used'), transport.Int64(alpha))
+
+    async def mute(self):
+        self._is_muted = True
+        await self._player_method('Mute')
+
+    async def unmute(self):
+        self._is_muted = False
+        await self._player_method('Unmute')
+
+    async def set_aspect_mode(self, mode):
+        await self._player_method('SetAspectMode', transport.ObjectPath('/not/used'), transport.String(mode))
+
+    async def set_video_pos(self, x1, y1, x2, y2):
+        position = "%s %s %s %s" % (str(x1), str(y1), str(x2), str(y2))
+        await self._player_method('VideoPos', transport.ObjectPath('/not/used'), transport.String(position))
+
+    async def video_pos(self):
+        position_string = await self._player_method('VideoPos', transport.ObjectPath('/not/used'))
+        return list(map(int, position_string.split(" ")))
+
+    async def set_video_crop(self, x1, y1, x2, y2):
+        crop = "%s %s %s %s" % (str(x1), str(y1), str(x2), str(y2))
+        await self._player_method('SetVideoCropPos', transport.ObjectPath('/not/used'), transport.String(crop))
+
+    async def hide_video(self):
+        await self._player_method('HideVideo')
+
+    async def show_video(self):
+        await self._player_method('UnHideVideo')
+
+    async def list_audio(self):
+        return await self._player_method('ListAudio')
+
+    async def list_video(self):
+        return await self._player_method('ListVideo')
+
+    async def list_subtitles(self):
+        return await self._player_method('ListSubtitles')
+
+    async def select_subtitle(self, index):
+        return await self._player_method('SelectSubtitle', transport.Int32(index))
+
+    async def select_audio(self, index):
+        return await self._player_method('SelectAudio', transport.Int32(index))
+
+    async def show_subtitles(self):
+        return await self._player_method('ShowSubtitles')
+
+    async def hide_subtitles(self):
+        return await self._player_method('HideSubtitles')
+
+    async def action(self, code):
+        await self._player_method('Action', code)
+
+    async def is_playing(self):
+        self._is_playing = (await self.playback_status() == "Playing")
+        logger.info("Playing?: %s" % self._is_playing)
+        return self._is_playing
+
+    async def play(self):
+        if not await self.is_playing():
+            await self.play_pause()
+            self._is_playing = True
+            self.playEvent(self)
+
+    async def play_sync(self):
+        """
+        Play the video and wait until the process has exited
+        """
+        await self.play()
+        await self.wait_until_finished()
+
+    async def next(self):
+        return await self._player_method('Next')
+
+    async def previous(self):
+        return await self._player_method('Previous')
@@ -3,23 +3,99 @@ import time
 from glob import glob
 import logging
 
+from omxplayer.inotify import create_watcher
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+ADDRESS_FILE_DIRECTORY = '/tmp'
+ADDRESS_FILE_PREFIX = 'omxplayerdbus.'
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+def user_address_file(user=None):
+    """
+    Returns:
+        str: path of the address file the ``omxplayer`` wrapper script writes
+             for ``user``, the user in ``$USER`` (or root) if ``None``
+    """
+    # Mirrors OMXPLAYER_DBUS_ADDR="/tmp/omxplayerdbus.${USER:-root}" in the script
+    user = user or os.environ.get('USER') or 'root'
+    return os.path.join(ADDRESS_FILE_DIRECTORY, ADDRESS_FILE_PREFIX + user)
+
+
+def _is_address_file(name):
+    return name.startswith(ADDRESS_FILE_PREFIX) and not name.endswith('.pid')
+
+
+class BusFinderTimeoutError(Exception):
+    """ Raised when the DBus address file isn't available within the timeout
+    """
+    pass
+
+
+class FixedBusFinder(object):
+    """
+    Finder for a bus whose address is already known, such as that of a
+    :class:`~omxplayer.dbus_daemon.DBusDaemon`: no address file is involved.
+
+    Args:
+        address (str): DBus address of the bus
+        pid (int): process ID of the bus daemon, if known
+    """
+    def __init__(self, address, pid=None):
+        self.address = address
+        self.pid = pid
+        self.path = None
+        self.latency = 0.0
+
+    def get_address(self):
+        return self.address
+
 
 class BusFinder(object):
-    def __init__(self, path=None):
+    """
+    Finds the address of the DBus session bus omxplayer registers itself on by
+    reading the file the ``omxplayer`` wrapper script writes it to.
+
+    Waiting for the file is event driven using inotify where available, with a
+    polling fallback otherwise.
+
+    Args:
+        path (str): path to the address file, if ``None`` the most recently
+                    modified ``/tmp/omxplayerdbus.*`` file is used
+        timeout (float): seconds to wait for the address before raising
+                         :class:`BusFinderTimeoutError`, ``None`` waits forever
+        use_inotify (bool): set to ``False`` to always poll
+        poll_interval (float): seconds between checks when polling
+
+    Attributes:
+        latency (float): seconds the last :meth:`get_address` call took
+    """
+    def __init__(self, path=None, timeout=None, use_inotify=True, poll_interval=0.05):
         self.path = path
+        self.timeout = timeout
+        self.use_inotify = use_inotify
+        self.poll_interval = poll_interval
+        self.latency = None
+        self._deadline = None
         logger.debug('BusFinder initialised with path: %s' % path)
 
+    @classmethod
+    def for_user(cls, user=None, **kwargs):
+        """
+        Create a finder reading the address file of ``user`` directly (see
+        :func:`user_address_file`) instead of looking for the newest one, which
+        is both cheaper and immune to other users' players starting at the
+        same time.
+        """
+        return cls(path=user_address_file(user), **kwargs)
+
     def get_address(self):
+        start = self._start_timer()
         self.wait_for_file()
-        logger.debug('Opening file at %s' % self.path)
-        with open(self.path, 'r') as f:
-            logger.debug('Opened file at %s' % self.path)
-            self.address = f.read().strip()
-            logger.debug('Address \'%s\' parsed from file' % self.address)
-        return self.address
+        return self._read_address(start)
 
     def find_address_file(self):
         """
@@ -27,24 +103,19 @@ class BusFinder(object):
         Assumes there is an alive OMXPlayer process.
         :return:
         """
-        possible_address_files = []
-        while not possible_address_files:
-            # filter is used here as glob doesn't support regexp :(
-            isnt_pid_file = lambda path: not path.endswith('.pid')
-            possible_address_files = list(filter(isnt_pid_file,
-                                            glob('/tmp/omxplayerdbus.*')))
-            possible_address_files.sort(key=lambda path: os.path.getmtime(path))
-            time.sleep(0.05)
-
-        self.path = possible_address_files[-1]
+        self.path = self._wait_for(self._newest_address_file,
+                                   ADDRESS_FILE_DIRECTORY,
+                                   _is_address_file)
 
     def wait_for_path_to_exist(self):
-        while not os.path.isfile(self.path):
-            time.sleep(0.05)
+        self._wait_for(lambda: os.path.isfile(self.path),
+                       os.path.dirname(self.path),
+                       self._is_path_name)
 
     def wait_for_dbus_address_to_be_written_to_file(self):
-        while not os.path.getsize(self.path):
-            time.sleep(0.05)
+        self._wait_for(lambda: os.path.getsize(self.path),
+                       os.path.dirname(self.path),
+                       self._is_path_name)
 
     def wait_for_file(self):
         if self.path:
@@ -52,3 +123,60 @@ class BusFinder(object):
         else:
             self.find_address_file()
         self.wait_for_dbus_address_to_be_written_to_file()
+
+    def _start_timer(self):
+        start = _clock()
+        self._deadline = None if self.timeout is None else start + self.timeout
+        return start
+
+    def _read_address(self, start):
+        logger.debug('Opening file at %s' % self.path)
+        with open(self.path, 'r') as f:
+            logger.debug('Opened file at %s' % self.path)
+            self.address = f.read().strip()
+            logger.debug('Address \'%s\' parsed from file' % self.address)
+        self.latency = _clock() - start
+        logger.debug('Found DBus address in %.1f ms', self.latency * 1000)
+        return self.address
+
+    def _newest_address_file(self):
+        # filter is used here as glob doesn't support regexp :(
+        isnt_pid_file = lambda path: not path.endswith('.pid')
+        possible_address_files = list(filter(isnt_pid_file,
+                                        glob(os.path.join(ADDRESS_FILE_DIRECTORY,
+                                                          ADDRESS_FILE_PREFIX + '*'))))
+        if not possible_address_files:
+            return None
+        possible_address_files.sort(key=lambda path: os.path.getmtime(path))
+        return possible_address_files[-1]
+
+    def _is_path_name(self, name):
+        return name == os.path.basename(self.path)
+
+    def _remaining(self):
+        if self._deadline is None:
+            return None
+        remaining = self._deadline - _clock()
+        if remaining <= 0:
+            raise BusFinderTimeoutError(
+                'DBus address not available after %s seconds' % self.timeout)
+        return remaining
+
+    def _wait_for(self, condition, directory, name_filter):
+        result = condition()
+        if result:
+            return result
+
+        watcher = create_watcher(directory or '.', name_filter,
+                                 use_inotify=self.use_inotify,
+                                 poll_interval=self.poll_interval)
+        try:
+            while True:
+                # Re-check after the watch is in place so we can't miss an
+                # event that happened in between.
+                result = condition()
+                if result:
+                    return result
+                watcher.wait(self._remaining())
+        finally:
+            watcher.close()
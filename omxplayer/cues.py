@@ -0,0 +1,260 @@
+import bisect
+import collections
+import heapq
+import itertools
+import logging
+import threading
+
+from omxplayer.position_tracker import PositionTracker
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Seconds to back off for when the player can't be queried (e.g. during load())
+RETRY_DELAY = 0.5
+# Seconds between checks of a paused player with cues pending: it can be
+# resumed through action() or omxplayer's keyboard controls without an event
+PAUSED_CHECK_INTERVAL = 5.0
+
+
+class CueScheduler(object):
+    """
+    Calls callbacks when playback reaches given media timestamps.
+
+    Pending cues are kept in a heap and a single thread sleeps until the next
+    one is due according to a :class:`~omxplayer.position_tracker.PositionTracker`,
+    so the player isn't polled. The schedule is rebuilt after a seek or
+    position change (cues after the new position fire again) and the wait is
+    recomputed after play/pause and rate changes. Pauses and seeks made
+    through ``action()`` or omxplayer's keyboard controls fire no events, so
+    the position is sampled again before cues fire. The thread stops when the
+    player exits and starts again on ``load()``.
+
+    Usually obtained through :attr:`OMXPlayer.cues <omxplayer.player.OMXPlayer.cues>`.
+
+    Args:
+        player (OMXPlayer): the player whose position cues are relative to
+        cues (iterable): ``(timestamp, callback)`` pairs, timestamps in seconds
+        tracker (PositionTracker): tracker to read the position from, one is
+                                   created if not given
+
+    >>> player.cues.add(12.5, lambda player, timestamp: lights.on())
+    >>> player.cues.jitter()
+    {'count': 1, 'mean': 0.0012, 'min': 0.0012, 'max': 0.0012}
+    """
+    def __init__(self, player, cues=(), tracker=None, jitter_samples=1000):
+        self._player = player
+        self._tracker = tracker if tracker else PositionTracker(player)
+        self._condition = threading.Condition()
+        self._counter = itertools.count()
+        self._cues = []
+        self._pending = []
+        self._position = 0.0
+        self._rearm = False
+        self._stopped = False
+        self._exited = False
+        # Incremented on every change the thread must see, so one made while
+        # it samples the position (without the lock held) isn't slept through
+        self._changes = 0
+        self._thread = None
+        self._lateness = collections.deque(maxlen=jitter_samples)
+
+        self._rearm_events = [player.seekEvent, player.positionEvent]
+        self._wake_events = [player.playEvent, player.pauseEvent, player.stopEvent,
+                             player.rateEvent]
+        for event in self._rearm_events:
+            event += self._on_rearm
+        for event in self._wake_events:
+            event += self._on_wake
+        player.exitEvent += self._on_exit
+
+        for timestamp, callback in cues:
+            self.add(timestamp, callback)
+
+    def add(self, timestamp, callback):
+        """
+        Call ``callback(player, timestamp)`` when playback reaches ``timestamp``
+        seconds. Cues before the current position only fire after seeking back.
+        """
+        self._start()
+        with self._condition:
+            cue = (timestamp, next(self._counter), callback)
+            bisect.insort(self._cues, cue)
+            if timestamp >= self._position:
+                heapq.heappush(self._pending, cue)
+            self._notify()
+
+    def clear(self):
+        """
+        Remove all cues.
+        """
+        with self._condition:
+            self._cues = []
+            self._pending = []
+            self._notify()
+
+    def restart(self):
+        """
+        Follow the player again once it has loaded a new source, cues after
+        its new position fire again. Called by ``OMXPlayer.load()``.
+        """
+        with self._condition:
+            self._exited = False
+            self._rearm = True
+            has_cues = bool(self._cues)
+            self._notify()
+        if has_cues:
+            self._start()
+
+    def cues(self):
+        """
+        Returns:
+            list: the ``(timestamp, callback)`` pairs in timestamp order
+        """
+        with self._condition:
+            return [(timestamp, callback) for timestamp, _, callback in self._cues]
+
+    def jitter(self):
+        """
+        How late cues fired relative to their timestamp, in seconds.
+
+        Returns:
+            dict: ``count``, ``mean``, ``min`` and ``max`` of the lateness of
+                  recently fired cues
+        """
+        lateness = list(self._lateness)
+        if not lateness:
+            return {'count': 0, 'mean': None, 'min': None, 'max': None}
+        return {'count': len(lateness),
+                'mean': sum(lateness) / len(lateness),
+                'min': min(lateness),
+                'max': max(lateness)}
+
+    def stop(self):
+        """
+        Stop the scheduler thread and stop listening to the player's events.
+        """
+        with self._condition:
+            self._stopped = True
+            self._notify()
+        for event in self._rearm_events:
+            event -= self._on_rearm
+        for event in self._wake_events:
+            event -= self._on_wake
+        self._player.exitEvent -= self._on_exit
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _on_rearm(self, player, *args):
+        with self._condition:
+            self._rearm = True
+            self._notify()
+
+    def _on_wake(self, player, *args):
+        with self._condition:
+            self._notify()
+
+    def _on_exit(self, player, *args):
+        with self._condition:
+            self._exited = True
+            self._notify()
+
+    def _notify(self):
+        # Must hold the condition
+        self._changes += 1
+        self._condition.notify()
+
+    def _can_start(self):
+        # Must hold the condition
+        return self._thread is None and not self._stopped and not self._exited
+
+    def _start(self):
+        # Cues added before the position when the thread starts don't fire
+        with self._condition:
+            if not self._can_start():
+                return
+        try:
+            position = self._tracker.position()
+        except Exception as e:
+            logger.debug('Could not read position, assuming 0: %s', e)
+            position = 0.0
+        with self._condition:
+            if not self._can_start():
+                return
+            self._position = position
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        # omxplayer.player imports this module
+        from omxplayer.player import OMXPlayerDeadError
+
+        while True:
+            with self._condition:
+                if self._stopped or self._exited:
+                    self._thread = None
+                    return
+                changes = self._changes
+
+            try:
+                position, playing, rate = self._sample()
+            except OMXPlayerDeadError:
+                logger.debug('Player exited, stopping until it loads a new source')
+                with self._condition:
+                    self._exited = True
+                continue
+            except Exception as e:
+                logger.debug('Could not read position, retrying: %s', e)
+                with self._condition:
+                    self._condition.wait(RETRY_DELAY)
+                continue
+
+            with self._condition:
+                due = self._take_due(position)
+                if not due and changes == self._changes:
+                    self._wait(position, playing, rate)
+
+            for timestamp, callback, lateness in due:
+                self._lateness.append(lateness)
+                try:
+                    callback(self._player, timestamp)
+                except Exception:
+                    logger.exception('Cue callback at %ss raised', timestamp)
+
+    def _sample(self):
+        # Called without the condition held, it may take DBus round trips
+        position = self._tracker.position()
+        with self._condition:
+            due = bool(self._pending) and self._pending[0][0] <= position
+        if due:
+            # Extrapolated from a sample taken before any pause or seek made
+            # without an event, confirm before firing
+            self._tracker.sync()
+            position = self._tracker.position()
+        return position, self._tracker.is_playing(), self._tracker.rate()
+
+    def _take_due(self, position):
+        # Must hold the condition
+        self._position = position
+        if self._rearm:
+            self._rearm = False
+            self._pending = [cue for cue in self._cues if cue[0] >= position]
+            heapq.heapify(self._pending)
+
+        due = []
+        while self._pending and self._pending[0][0] <= position:
+            timestamp, _, callback = heapq.heappop(self._pending)
+            due.append((timestamp, callback, position - timestamp))
+        return due
+
+    def _wait(self, position, playing, rate):
+        # Must hold the condition. Woken up early by events and new cues.
+        if not self._pending:
+            self._condition.wait()
+        elif not playing or rate <= 0:
+            self._condition.wait(PAUSED_CHECK_INTERVAL)
+        else:
+            self._condition.wait((self._pending[0][0] - position) / rate)
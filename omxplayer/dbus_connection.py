@@ -1,13 +1,146 @@
+import collections
+import logging
+import threading
+
 import dbus
+from dbus.lowlevel import MethodCallMessage, ErrorMessage
+
+from omxplayer.transport import BaseConnection, DBusConnectionError, InstrumentedInterface, \
+                                PendingReply, MAX_IN_FLIGHT, OBJECT_PATH
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def _complete_reply(reply, message):
+    args = message.get_args_list()
+    if isinstance(message, ErrorMessage):
+        exception = dbus.DBusException(*args, name=message.get_error_name())
+        logger.debug('%s failed: %s', reply.member, exception)
+        reply._set_exception(exception)
+    else:
+        reply._set_result(args)
+
+
+class _ReplyCollector(object):
+    # Without a main loop dbus-python never dispatches replies by itself, so
+    # a thread blocks on the pending calls in the order they were sent. This
+    # also bounds the calls in flight so a fast sender can't queue unboundedly.
+    def __init__(self, max_in_flight):
+        self._condition = threading.Condition()
+        self._in_flight = collections.deque()
+        self._slots = threading.Semaphore(max_in_flight)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def reserve(self):
+        self._slots.acquire()
 
+    def cancel_reservation(self):
+        self._slots.release()
 
-class DBusConnectionError(Exception):
-    """ Connection error raised when DBusConnection can't set up a connection
+    def add(self, pending_call):
+        with self._condition:
+            self._in_flight.append(pending_call)
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._in_flight and not self._closed:
+                    self._condition.wait()
+                if not self._in_flight:
+                    return
+                pending_call = self._in_flight.popleft()
+            try:
+                # Completes the call, running its reply handler
+                pending_call.block()
+            except Exception:
+                logger.exception('Collecting a DBus reply failed')
+            finally:
+                self._slots.release()
+
+
+class BusPool(object):
     """
-    pass
+    Shares one ``dbus.bus.BusConnection`` per bus address between every
+    :class:`DBusConnection`, so starting a player doesn't cost a new socket,
+    authentication handshake and ``Hello``.
+
+    Buses are reference counted and closed when the last connection using
+    them is closed. A bus found disconnected is replaced by a new one for the
+    connections acquiring it from then on: connections made before keep
+    their proxies to the dead bus and fail until they are replaced, e.g. by
+    the player's next ``load()``.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # address -> [bus, reference count]
+        self._buses = {}
+
+    def acquire(self, address):
+        """
+        Returns:
+            dbus.bus.BusConnection: the bus for ``address``, which must be
+                                    given back with :meth:`release`
+        """
+        with self._lock:
+            entry = self._buses.get(address)
+            if entry is not None and not entry[0].get_is_connected():
+                logger.debug('Bus at %s was disconnected, reconnecting', address)
+                del self._buses[address]
+                entry = None
+            if entry is None:
+                entry = self._buses[address] = [dbus.bus.BusConnection(address), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, address, bus):
+        """
+        Give back a bus obtained from :meth:`acquire`, closing it if nothing
+        else uses it.
+        """
+        with self._lock:
+            entry = self._buses.get(address)
+            if entry is None or entry[0] is not bus:
+                # Already replaced after a disconnection
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self._buses[address]
+        bus.close()
+
+    def clear(self):
+        """
+        Close and forget every bus.
+        """
+        with self._lock:
+            buses = [bus for bus, _ in self._buses.values()]
+            self._buses.clear()
+        for bus in buses:
+            bus.close()
 
-class DBusConnection(object):
+
+#: :class:`BusPool` used by :class:`DBusConnection` unless given another one
+default_bus_pool = BusPool()
+
+
+class DBusConnection(BaseConnection):
     """
+    Connects to an omxplayer instance over the bus shared through ``bus_pool``
+    (:data:`default_bus_pool` if not given), call :meth:`close` when done.
+
     Attributes:
         proxy:  The proxy object by which one interacts  with a dbus object,
                 this makes communicating with a similar to that of communicating
@@ -16,23 +149,115 @@ class DBusConnection(object):
         player_interface: org.mpris.MediaPlayer2.Player interface  proxy object
     """
 
-    def __init__(self, bus_address, dbus_name=None):
+    def __init__(self, bus_address, dbus_name=None, instrumentation=None, bus_pool=None):
         if dbus_name:
             self._dbus_name = dbus_name
         else:
             self._dbus_name = 'org.mpris.MediaPlayer2.omxplayer'
-        self._bus = dbus.bus.BusConnection(bus_address)
-        self.proxy = self._create_proxy()
+        self._bus_address = bus_address
+        self._reply_collector = None
+        self._reply_collector_lock = threading.Lock()
+        self._bus_pool = bus_pool if bus_pool else default_bus_pool
+        self._bus = self._bus_pool.acquire(bus_address)
+        try:
+            self.proxy = self._create_proxy()
+        except DBusConnectionError:
+            self.close()
+            raise
+
+        self.root_interface = self._interface('org.mpris.MediaPlayer2', instrumentation)
+        self.player_interface = self._interface('org.mpris.MediaPlayer2.Player', instrumentation)
+        self.properties_interface = self._interface('org.freedesktop.DBus.Properties',
+                                                    instrumentation)
+
+    def close(self):
+        """
+        Stop using the shared bus, after collecting the replies to calls made
+        with :meth:`send`. Calling it more than once has no effect.
+        """
+        with self._reply_collector_lock:
+            reply_collector, self._reply_collector = self._reply_collector, None
+        if reply_collector is not None:
+            reply_collector.close()
+        if self._bus is not None:
+            self._bus_pool.release(self._bus_address, self._bus)
+            self._bus = None
+
+    def send(self, interface, member, signature='', args=(), error_handler=None):
+        """
+        Call ``member`` of ``interface`` on the player without waiting for the
+        reply, so many calls can be in flight at once. Blocks only if
+        :data:`MAX_IN_FLIGHT` calls are already awaiting their reply.
+
+        Args:
+            interface (str): DBus interface of the method
+            member (str): method name
+            signature (str): DBus signature of ``args``
+            args (tuple): method arguments
+            error_handler (callable): called as ``error_handler(exception)``
+                                      if the call fails
+
+        Returns:
+            PendingReply: the reply, whenever it arrives
+        """
+        reply_collector = self._get_reply_collector()
+        message = MethodCallMessage(self._dbus_name, OBJECT_PATH, interface, member)
+        if args:
+            message.append(signature=signature, *args)
+        reply = PendingReply(member, error_handler)
+
+        def on_reply(message):
+            _complete_reply(reply, message)
+
+        reply_collector.reserve()
+        try:
+            pending_call = self._bus.send_message_with_reply(message, on_reply,
+                                                             require_main_loop=False)
+        except:
+            reply_collector.cancel_reservation()
+            raise
+        reply_collector.add(pending_call)
+        return reply
+
+    def _get_reply_collector(self):
+        with self._reply_collector_lock:
+            if self._reply_collector is None:
+                self._reply_collector = _ReplyCollector(MAX_IN_FLIGHT)
+            return self._reply_collector
+
+    def name_owner_pid(self):
+        """
+        Returns:
+            int: PID of the process owning the player's name on the bus
+
+        Raises:
+            DBusConnectionError: if nothing owns the name
+        """
+        try:
+            return int(self._bus.call_blocking('org.freedesktop.DBus',
+                                               '/org/freedesktop/DBus',
+                                               'org.freedesktop.DBus',
+                                               'GetConnectionUnixProcessID',
+                                               's', (self._dbus_name,)))
+        except dbus.DBusException:
+            raise DBusConnectionError('%s has no owner' % self._dbus_name)
 
-        self.root_interface = dbus.Interface(self.proxy, 'org.mpris.MediaPlayer2')
-        self.player_interface = dbus.Interface(self.proxy, 'org.mpris.MediaPlayer2.Player')
-        self.properties_interface = dbus.Interface(self.proxy, 'org.freedesktop.DBus.Properties')
+    def _interface(self, name, instrumentation):
+        interface = dbus.Interface(self.proxy, name)
+        if instrumentation is None:
+            return interface
+        return InstrumentedInterface(interface, instrumentation)
 
     def _create_proxy(self):
         try:
+            # One NameHasOwner round trip rather than the GetNameOwner,
+            # StartServiceByName, GetNameOwner sequence get_object falls back
+            # to while omxplayer is starting up
+            if not self._bus.name_has_owner(self._dbus_name):
+                raise DBusConnectionError('%s has no owner yet' % self._dbus_name)
             # introspection fails so it is disabled
             proxy = self._bus.get_object(self._dbus_name,
-                                         '/org/mpris/MediaPlayer2',
+                                         OBJECT_PATH,
                                          introspect=False)
             return proxy
         except dbus.DBusException:
@@ -0,0 +1,109 @@
+"""
+A ``dbus-daemon`` started and owned by the library.
+
+The ``omxplayer`` script starts a session bus, or finds the one it started
+before, and writes its address to ``/tmp/omxplayerdbus.$USER`` for
+:class:`~omxplayer.bus_finder.BusFinder` to read back. With a
+:class:`DBusDaemon` the library runs the bus itself and starts
+``omxplayer.bin`` on it directly, so no address file is written or waited for
+when a player starts.
+"""
+import atexit
+import logging
+import os
+import subprocess
+
+from omxplayer.bus_finder import FixedBusFinder
+from omxplayer.launcher import BinaryLauncher
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+DBUS_DAEMON = 'dbus-daemon'
+
+
+class DBusDaemonError(Exception):
+    """ Raised when the ``dbus-daemon`` can't be started
+    """
+    pass
+
+
+class DBusDaemon(object):
+    """
+    Runs a private ``dbus-daemon`` for the players of this process to share,
+    stopped by :meth:`close` or when the interpreter exits.
+
+    Args:
+        executable (str): ``dbus-daemon``, looked up on ``PATH`` unless a path is given
+        args (list): configuration arguments, a session bus like the
+                     ``omxplayer`` script's by default
+
+    Attributes:
+        address (str): DBus address of the bus
+        pid (int): process ID of the daemon
+
+    >>> daemon = DBusDaemon()
+    >>> player = OMXPlayer('path.mp4', **daemon.player_kwargs())
+
+    For :class:`~omxplayer.aio.AsyncOMXPlayer` pass ``launcher=daemon.launcher()``
+    and ``bus_address_finder=AsyncFixedBusFinder(daemon.address)``.
+    """
+    def __init__(self, executable=DBUS_DAEMON, args=('--session',)):
+        command = [executable] + list(args) + ['--nofork', '--print-address']
+        logger.debug('Starting dbus-daemon with the command: %s' % command)
+        try:
+            with open(os.devnull, 'r') as devnull:
+                self._process = subprocess.Popen(command, stdin=devnull, stdout=subprocess.PIPE)
+        except OSError as e:
+            raise DBusDaemonError('Could not start %s: %s' % (executable, e))
+
+        # Printed once the daemon is listening
+        line = self._process.stdout.readline()
+        self._process.stdout.close()
+        if not line:
+            self._process.wait()
+            raise DBusDaemonError('%s exited with status %s before printing its address'
+                                  % (executable, self._process.returncode))
+        self.address = line.decode().strip()
+        self.pid = self._process.pid
+        logger.debug('dbus-daemon %d listening at %s', self.pid, self.address)
+        atexit.register(self.close)
+
+    def bus_finder(self):
+        """
+        Returns:
+            FixedBusFinder: finder returning the daemon's address, for the
+                            ``bus_address_finder`` argument of players
+        """
+        return FixedBusFinder(self.address, pid=self.pid)
+
+    def launcher(self, **kwargs):
+        """
+        Args:
+            kwargs: passed to :class:`~omxplayer.launcher.BinaryLauncher`
+
+        Returns:
+            BinaryLauncher: launcher starting ``omxplayer.bin`` on this bus
+        """
+        return BinaryLauncher(bus_finder=self.bus_finder(), **kwargs)
+
+    def player_kwargs(self, **launcher_kwargs):
+        """
+        Returns:
+            dict: the ``bus_address_finder`` and ``launcher`` arguments running
+                  an :class:`~omxplayer.player.OMXPlayer` (or the players of a
+                  :class:`~omxplayer.pool.PlayerPool`) on this bus
+        """
+        return {'bus_address_finder': self.bus_finder(),
+                'launcher': self.launcher(**launcher_kwargs)}
+
+    def close(self):
+        """
+        Stop the daemon. Players using it lose their bus, quit them first.
+        Calling it more than once has no effect.
+        """
+        if self._process.poll() is None:
+            logger.debug('Stopping dbus-daemon %d', self.pid)
+            self._process.terminate()
+            self._process.wait()
@@ -0,0 +1,159 @@
+"""
+Minimal directory watchers used to wait for files to appear.
+
+:class:`InotifyWatcher` uses Linux inotify (through ``ctypes``) so that waiters
+wake up as soon as an entry in the watched directory is created or written to.
+:class:`PollingWatcher` offers the same interface on platforms without inotify.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct('iIII')
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_libc = None
+
+
+class InotifyUnavailable(Exception):
+    """ Raised when inotify can't be used on this platform or directory
+    """
+    pass
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        if not sys.platform.startswith('linux'):
+            raise InotifyUnavailable('inotify is only available on Linux')
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise InotifyUnavailable('Could not find libc')
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise InotifyUnavailable('libc does not provide inotify')
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _libc = libc
+    return _libc
+
+
+class InotifyWatcher(object):
+    """
+    Watches ``directory`` for entries being created or written to.
+
+    Args:
+        directory (str): directory to watch
+        name_filter (callable): optional predicate on the entry name, events for
+                                entries it rejects don't wake up :meth:`wait`
+    """
+    def __init__(self, directory, name_filter=None):
+        libc = _load_libc()
+        self._name_filter = name_filter
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise InotifyUnavailable(os.strerror(ctypes.get_errno()))
+        if not isinstance(directory, bytes):
+            directory = directory.encode(sys.getfilesystemencoding())
+        if libc.inotify_add_watch(self._fd, directory, _WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            self._fd = None
+            raise InotifyUnavailable(os.strerror(error))
+
+    def wait(self, timeout=None):
+        """
+        Block until a matching event arrives or ``timeout`` seconds pass.
+
+        Returns:
+            bool: whether a matching event was received
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            remaining = None if deadline is None else max(0, deadline - time.time())
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return False
+            if self.read_events():
+                return True
+
+    def fileno(self):
+        return self._fd
+
+    def read_events(self):
+        """
+        Consume pending events without blocking.
+
+        Returns:
+            bool: whether any of them matched the name filter
+        """
+        matched = False
+        while True:
+            try:
+                data = os.read(self._fd, 4096)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return matched
+                raise
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if self._name_filter is None or \
+                        self._name_filter(name.decode(sys.getfilesystemencoding())):
+                    matched = True
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class PollingWatcher(object):
+    """
+    Fallback watcher that wakes up every ``interval`` seconds.
+    """
+    def __init__(self, interval=0.05):
+        self._interval = interval
+
+    def wait(self, timeout=None):
+        if timeout is None:
+            time.sleep(self._interval)
+        else:
+            time.sleep(min(self._interval, timeout))
+        return True
+
+    def close(self):
+        pass
+
+
+def create_watcher(directory, name_filter=None, use_inotify=True, poll_interval=0.05):
+    """
+    Create an :class:`InotifyWatcher` for ``directory``, falling back to a
+    :class:`PollingWatcher` if inotify is unavailable.
+    """
+    if use_inotify:
+        try:
+            return InotifyWatcher(directory, name_filter)
+        except InotifyUnavailable as e:
+            logger.debug('Falling back to polling %s: %s', directory, e)
+    return PollingWatcher(poll_interval)
@@ -0,0 +1,205 @@
+import collections
+import math
+import threading
+import time
+
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+#: Upper bounds in seconds of the histogram buckets exported to Prometheus
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_PROMETHEUS_HELP = {
+    'method': 'Latency of OMXPlayer method calls',
+    'dbus': 'Latency of DBus round trips',
+    'convert': 'Time spent converting DBus values to builtin types',
+}
+
+
+class Histogram(object):
+    """
+    Latency distribution of one instrumented call.
+
+    Keeps cumulative bucket counts for Prometheus and the most recent
+    ``samples`` latencies to compute percentiles from.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS, samples=1024):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self._recent = collections.deque(maxlen=samples)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self._recent.append(seconds)
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[index] += 1
+                break
+
+    def percentile(self, percent):
+        """
+        Returns:
+            float: the ``percent`` th percentile of the recent latencies, or
+                   ``None`` if there are none
+        """
+        recent = sorted(self._recent)
+        if not recent:
+            return None
+        # Nearest rank
+        rank = int(math.ceil(percent / 100.0 * len(recent)))
+        return recent[max(rank - 1, 0)]
+
+    def as_dict(self):
+        return {'count': self.count,
+                'errors': self.errors,
+                'sum': self.sum,
+                'p50': self.percentile(50),
+                'p95': self.percentile(95),
+                'p99': self.percentile(99)}
+
+
+class _Timer(object):
+    def __init__(self, instrumentation, kind, name):
+        self._instrumentation = instrumentation
+        self._kind = kind
+        self._name = name
+
+    def __enter__(self):
+        self._start = _clock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._instrumentation.observe(self._kind, self._name, _clock() - self._start,
+                                      error=exc_type is not None)
+        return False
+
+
+class Instrumentation(object):
+    """
+    Records call counts, latency histograms, errors and retries of the hot
+    paths of :class:`~omxplayer.player.OMXPlayer` and
+    :class:`~omxplayer.dbus_connection.DBusConnection`.
+
+    Calls are grouped by kind:
+
+    * ``method``: public ``OMXPlayer`` methods, end to end
+    * ``dbus``: DBus round trips, property accesses are named ``Get.<Property>``
+      and ``Set.<Property>``
+    * ``convert``: converting the returned DBus values to builtin types
+
+    Pass the same instance to several players to aggregate them.
+
+    Args:
+        buckets (tuple): histogram bucket upper bounds in seconds
+        samples (int): number of recent latencies percentiles are computed from
+
+    >>> instrumentation = Instrumentation()
+    >>> player = OMXPlayer('path.mp4', instrumentation=instrumentation)
+    >>> player.volume()
+    >>> instrumentation.as_dict()['method']['volume']['p99']
+    0.0012
+    >>> print(instrumentation.to_prometheus())
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS, samples=1024):
+        self._buckets = buckets
+        self._samples = samples
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._retries = collections.defaultdict(int)
+
+    def time(self, kind, name):
+        """
+        Context manager recording the latency of the block as a ``kind`` call
+        named ``name``, and an error if it raises.
+        """
+        return _Timer(self, kind, name)
+
+    def observe(self, kind, name, seconds, error=False):
+        """
+        Record a ``kind`` call named ``name`` that took ``seconds``.
+        """
+        with self._lock:
+            histogram = self._histograms.get((kind, name))
+            if histogram is None:
+                histogram = self._histograms[(kind, name)] = Histogram(self._buckets,
+                                                                       self._samples)
+            histogram.observe(seconds)
+            if error:
+                histogram.errors += 1
+
+    def retry(self, name):
+        """
+        Record that the operation ``name`` (e.g. ``dbus_connect``) was retried.
+        """
+        with self._lock:
+            self._retries[name] += 1
+
+    def reset(self):
+        """
+        Forget everything recorded so far.
+        """
+        with self._lock:
+            self._histograms.clear()
+            self._retries.clear()
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: ``{kind: {name: {'count', 'errors', 'sum', 'p50', 'p95', 'p99'}}}``
+                  with latencies in seconds, plus ``retries`` mapping operation
+                  names to retry counts
+        """
+        with self._lock:
+            result = {kind: {} for kind in _PROMETHEUS_HELP}
+            for (kind, name), histogram in self._histograms.items():
+                result.setdefault(kind, {})[name] = histogram.as_dict()
+            result['retries'] = dict(self._retries)
+            return result
+
+    def to_prometheus(self, prefix='omxplayer'):
+        """
+        Returns:
+            str: everything recorded in the Prometheus text exposition format
+        """
+        lines = []
+        with self._lock:
+            by_kind = collections.defaultdict(list)
+            for (kind, name), histogram in sorted(self._histograms.items()):
+                by_kind[kind].append((name, histogram))
+
+            for kind, histograms in sorted(by_kind.items()):
+                metric = '%s_%s_duration_seconds' % (prefix, kind)
+                lines.append('# HELP %s %s' % (metric, _PROMETHEUS_HELP.get(kind, kind)))
+                lines.append('# TYPE %s histogram' % metric)
+                for name, histogram in histograms:
+                    label = 'name="%s"' % _escape_label(name)
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                        cumulative += count
+                        lines.append('%s_bucket{%s,le="%s"} %d' % (metric, label, bound, cumulative))
+                    lines.append('%s_bucket{%s,le="+Inf"} %d' % (metric, label, histogram.count))
+                    lines.append('%s_sum{%s} %r' % (metric, label, histogram.sum))
+                    lines.append('%s_count{%s} %d' % (metric, label, histogram.count))
+
+                metric = '%s_%s_errors_total' % (prefix, kind)
+                lines.append('# HELP %s Failed %s calls' % (metric, kind))
+                lines.append('# TYPE %s counter' % metric)
+                for name, histogram in histograms:
+                    lines.append('%s{name="%s"} %d' % (metric, _escape_label(name), histogram.errors))
+
+            if self._retries:
+                metric = '%s_retries_total' % prefix
+                lines.append('# HELP %s Retried operations' % metric)
+                lines.append('# TYPE %s counter' % metric)
+                for name, count in sorted(self._retries.items()):
+                    lines.append('%s{name="%s"} %d' % (metric, _escape_label(name), count))
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,293 @@
+"""
+Pure Python DBus transport built on `jeepney <https://jeepney.readthedocs.io>`_,
+which speaks the DBus wire protocol over the bus socket itself rather than
+through libdbus, so it is light to install and quick to import.
+
+Requires Python 3.
+"""
+import logging
+import threading
+
+from jeepney import DBusAddress, HeaderFields, MessageType, new_method_call
+from jeepney.bus_messages import message_bus
+from jeepney.io.threading import open_dbus_connection, ReceiveStopped
+
+from omxplayer.transport import BaseConnection, DBusConnectionError, DBusException, \
+                                InstrumentedInterface, PendingReply, MAX_IN_FLIGHT, OBJECT_PATH
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+#: Seconds to wait for the reply to a blocking call, as dbus-python does
+CALL_TIMEOUT = 25.0
+
+# Signatures of methods whose arguments can't be inferred from their types
+_SIGNATURES = {
+    ('org.freedesktop.DBus.Properties', 'Get'): 'ss',
+    # The values set, Volume and Rate, are doubles: sent as such, like
+    # dbus-python does without introspection, rather than as variants
+    ('org.freedesktop.DBus.Properties', 'Set'): 'ssd',
+    ('org.freedesktop.DBus.Properties', 'GetAll'): 's',
+}
+
+# DBus type codes by class name, so the types of both dbus-python and the
+# fallbacks in omxplayer.transport are understood, as well as builtins
+_TYPE_CODES = {
+    'Boolean': 'b',
+    'bool': 'b',
+    'Byte': 'y',
+    'Int16': 'n',
+    'UInt16': 'q',
+    'Int32': 'i',
+    'int': 'i',
+    'UInt32': 'u',
+    'Int64': 'x',
+    'UInt64': 't',
+    'Double': 'd',
+    'float': 'd',
+    'ObjectPath': 'o',
+    'Signature': 'g',
+    'String': 's',
+    'str': 's',
+}
+
+
+def _type_code(value):
+    for cls in type(value).__mro__:
+        code = _TYPE_CODES.get(cls.__name__)
+        if code is not None:
+            return code
+    raise TypeError('Cannot infer the DBus type of %r' % (value,))
+
+
+def _split_signature(signature):
+    # Split a signature into its complete types, e.g. 'sa{sv}i' -> ['s', 'a{sv}', 'i']
+    types = []
+    start = depth = 0
+    for index, code in enumerate(signature):
+        if code in '({':
+            depth += 1
+        elif code in ')}':
+            depth -= 1
+        if depth == 0 and code != 'a':
+            types.append(signature[start:index + 1])
+            start = index + 1
+    return types
+
+
+def _wrap_variants(signature, args):
+    # jeepney expects variants as (signature, value) pairs
+    return tuple((_type_code(arg), arg) if code == 'v' else arg
+                 for code, arg in zip(_split_signature(signature), args))
+
+
+def _unwrap_variants(signature, value):
+    # ...and returns them as such too, the player wants the values
+    if 'v' not in signature:
+        return value
+    if signature == 'v':
+        return _unwrap_variants(value[0], value[1])
+    if signature.startswith('a{'):
+        item_signature = signature[3:-1]
+        return dict((key, _unwrap_variants(item_signature, item))
+                    for key, item in value.items())
+    if signature.startswith('a'):
+        return [_unwrap_variants(signature[1:], item) for item in value]
+    if signature.startswith('('):
+        return tuple(_unwrap_variants(field_signature, field)
+                     for field_signature, field in zip(_split_signature(signature[1:-1]), value))
+    return value
+
+
+class _Interface(object):
+    # Calls methods like a dbus.Interface
+    def __init__(self, connection, name):
+        self._connection = connection
+        self.dbus_interface = name
+
+    def __getattr__(self, member):
+        if member.startswith('_'):
+            raise AttributeError(member)
+
+        def call(*args):
+            return self._connection.call(self.dbus_interface, member, args)
+        return call
+
+
+class JeepneyConnection(BaseConnection):
+    """
+    Connects to an omxplayer instance using jeepney, the pure Python
+    alternative to :class:`~omxplayer.dbus_connection.DBusConnection`.
+    Call :meth:`close` when done.
+
+    Calls can be made from any thread: a receiver thread hands replies to the
+    calls waiting for them, so several can be in flight at once.
+
+    Attributes:
+        root_interface:  org.mpris.MediaPlayer2 interface
+        player_interface: org.mpris.MediaPlayer2.Player interface
+        properties_interface: org.freedesktop.DBus.Properties interface
+
+    >>> OMXPlayer('path.mp4', Connection=JeepneyConnection)
+    """
+    def __init__(self, bus_address, dbus_name=None, instrumentation=None):
+        if dbus_name:
+            self._dbus_name = dbus_name
+        else:
+            self._dbus_name = 'org.mpris.MediaPlayer2.omxplayer'
+        self._address = DBusAddress(OBJECT_PATH, bus_name=self._dbus_name)
+        try:
+            self._connection = open_dbus_connection(bus=bus_address)
+        except (OSError, ValueError) as e:
+            raise DBusConnectionError('Could not connect to %s: %s' % (bus_address, e))
+
+        self._lock = threading.Lock()
+        # serial -> PendingReply
+        self._pending = {}
+        self._slots = threading.Semaphore(MAX_IN_FLIGHT)
+        self._closed = False
+        self._receiver = threading.Thread(target=self._receive)
+        self._receiver.daemon = True
+        self._receiver.start()
+
+        try:
+            if not self._call_message(message_bus.NameHasOwner(self._dbus_name), 'NameHasOwner'):
+                raise DBusConnectionError('%s has no owner yet' % self._dbus_name)
+        except:
+            self.close()
+            raise
+
+        self.root_interface = self._interface('org.mpris.MediaPlayer2', instrumentation)
+        self.player_interface = self._interface('org.mpris.MediaPlayer2.Player', instrumentation)
+        self.properties_interface = self._interface('org.freedesktop.DBus.Properties',
+                                                    instrumentation)
+
+    def call(self, interface, member, args=(), signature=None):
+        """
+        Call ``member`` of ``interface`` on the player and wait for the reply.
+        The signature is inferred from the types of ``args`` if not given.
+        """
+        return self._call_message(self._method_call(interface, member, args, signature), member)
+
+    def send(self, interface, member, signature='', args=(), error_handler=None):
+        """
+        Call ``member`` of ``interface`` on the player without waiting for the
+        reply, see :meth:`DBusConnection.send <omxplayer.dbus_connection.DBusConnection.send>`.
+
+        Returns:
+            PendingReply: the reply, whenever it arrives
+        """
+        message = self._method_call(interface, member, args, signature)
+        _, reply = self._send_message(message, member, error_handler)
+        return reply
+
+    def name_owner_pid(self):
+        """
+        Returns:
+            int: PID of the process owning the player's name on the bus
+
+        Raises:
+            DBusConnectionError: if nothing owns the name
+        """
+        try:
+            return self._call_message(message_bus.GetConnectionUnixProcessID(self._dbus_name),
+                                      'GetConnectionUnixProcessID')
+        except DBusException:
+            raise DBusConnectionError('%s has no owner' % self._dbus_name)
+
+    def close(self):
+        """
+        Close the connection, failing calls still awaiting a reply. Calling it
+        more than once has no effect.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._connection.interrupt()
+        if threading.current_thread() is not self._receiver:
+            self._receiver.join()
+        self._connection.close()
+
+    def _interface(self, name, instrumentation):
+        interface = _Interface(self, name)
+        if instrumentation is None:
+            return interface
+        return InstrumentedInterface(interface, instrumentation)
+
+    def _method_call(self, interface, member, args, signature):
+        if signature is None:
+            signature = _SIGNATURES.get((interface, member))
+        if signature is None:
+            signature = ''.join(_type_code(arg) for arg in args)
+        return new_method_call(self._address.with_interface(interface), member,
+                               signature or None, _wrap_variants(signature, args))
+
+    def _call_message(self, message, member):
+        serial, reply = self._send_message(message, member)
+        if not reply.wait(CALL_TIMEOUT):
+            with self._lock:
+                abandoned = self._pending.pop(serial, None) is reply
+            # Otherwise the reply arrived meanwhile and is being handled
+            if abandoned:
+                self._slots.release()
+                raise DBusException('No reply to %s within %s seconds' % (member, CALL_TIMEOUT),
+                                    name='org.freedesktop.DBus.Error.NoReply')
+            reply.wait()
+        return reply.result()
+
+    def _send_message(self, message, member, error_handler=None):
+        reply = PendingReply(member, error_handler)
+        self._slots.acquire()
+        serial = next(self._connection.outgoing_serial)
+        with self._lock:
+            if self._closed:
+                self._slots.release()
+                raise DBusConnectionError('The connection to %s is closed' % self._dbus_name)
+            self._pending[serial] = reply
+        try:
+            self._connection.send(message, serial=serial)
+        except:
+            with self._lock:
+                self._pending.pop(serial, None)
+            self._slots.release()
+            raise
+        return serial, reply
+
+    def _receive(self):
+        while True:
+            try:
+                message = self._connection.receive()
+            except (ReceiveStopped, OSError) as e:
+                logger.debug('Stopped receiving: %r', e)
+                break
+            serial = message.header.fields.get(HeaderFields.reply_serial)
+            with self._lock:
+                reply = self._pending.pop(serial, None)
+            if reply is None:
+                continue
+            self._slots.release()
+            try:
+                self._complete(reply, message)
+            except Exception:
+                logger.exception('Handling the reply to %s failed', reply.member)
+
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for reply in pending.values():
+            self._slots.release()
+            reply._set_exception(DBusException('Connection closed',
+                                               name='org.freedesktop.DBus.Error.Disconnected'))
+
+    def _complete(self, reply, message):
+        fields = message.header.fields
+        if message.header.message_type == MessageType.error:
+            exception = DBusException(*message.body, name=fields.get(HeaderFields.error_name))
+            logger.debug('%s failed: %s', reply.member, exception)
+            reply._set_exception(exception)
+            return
+        signatures = _split_signature(fields.get(HeaderFields.signature, ''))
+        reply._set_result([_unwrap_variants(signature, value)
+                           for signature, value in zip(signatures, message.body)])
@@ -0,0 +1,186 @@
+"""
+Starting the omxplayer process.
+
+omxplayer is run in a new session so the player can kill its whole process
+group: ``omxplayer`` is a bash script starting ``omxplayer.bin``, killing only
+the script would leave the player running. The session is created with
+``start_new_session`` or ``os.posix_spawn`` rather than a ``preexec_fn``,
+which would force a full ``fork()`` of the controlling process (copying its
+page tables, slow for large processes) and isn't safe with threads running.
+"""
+import logging
+import os
+import subprocess
+import sys
+import threading
+
+from omxplayer.bus_finder import BusFinder
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+OMXPLAYER_SCRIPT = 'omxplayer'
+OMXPLAYER_BIN = '/usr/bin/omxplayer.bin'
+#: Library directories the ``omxplayer`` script puts on ``LD_LIBRARY_PATH``
+OMXPLAYER_LIBRARY_PATH = ('/opt/vc/lib', '/usr/lib/omxplayer')
+
+if sys.version_info >= (3, 2):
+    _NEW_SESSION = {'start_new_session': True}
+else:
+    _NEW_SESSION = {'preexec_fn': os.setsid}
+
+
+class SpawnedProcess(object):
+    """
+    The parts of :class:`subprocess.Popen` the player uses, for a process
+    started with ``os.posix_spawn``.
+
+    Attributes:
+        pid (int): process ID
+        returncode (int): exit status once the process has been waited for,
+                          negated signal number if it was killed
+    """
+    def __init__(self, pid):
+        self.pid = pid
+        self.returncode = None
+        self._wait_lock = threading.Lock()
+
+    def poll(self):
+        # Like Popen, leave reaping to a wait() in progress in another thread
+        if self.returncode is None and self._wait_lock.acquire(False):
+            try:
+                pid, status = os.waitpid(self.pid, os.WNOHANG)
+                if pid == self.pid:
+                    self._set_returncode(status)
+            finally:
+                self._wait_lock.release()
+        return self.returncode
+
+    def wait(self):
+        with self._wait_lock:
+            if self.returncode is None:
+                _, status = os.waitpid(self.pid, 0)
+                self._set_returncode(status)
+        return self.returncode
+
+    def _set_returncode(self, status):
+        if os.WIFSIGNALED(status):
+            self.returncode = -os.WTERMSIG(status)
+        else:
+            self.returncode = os.WEXITSTATUS(status)
+
+
+class ScriptLauncher(object):
+    """
+    Runs the ``omxplayer`` script in a new session. This is the default
+    launcher of :class:`~omxplayer.player.OMXPlayer`.
+
+    Args:
+        executable (str): the script, looked up on ``PATH`` unless a path is given
+        use_posix_spawn (bool): start the process with ``os.posix_spawnp``
+                                where available (Python 3.8+) instead of
+                                :class:`subprocess.Popen`
+    """
+    def __init__(self, executable=OMXPLAYER_SCRIPT, use_posix_spawn=False):
+        self.executable = executable
+        self.use_posix_spawn = use_posix_spawn
+
+    def command(self, args):
+        """
+        Returns:
+            list: the command line running omxplayer with ``args``
+        """
+        return [self.executable] + list(args)
+
+    def environment(self):
+        """
+        Returns:
+            dict: environment to run omxplayer in, ``None`` to inherit ours
+        """
+        return None
+
+    def launch(self, args, stdin=None, stdout=None):
+        """
+        Start omxplayer with ``args`` in a new session.
+
+        Args:
+            args (list): omxplayer's arguments
+            stdin (file): file to read standard input from
+            stdout (file): file to write standard output to
+
+        Returns:
+            a :class:`subprocess.Popen` or :class:`SpawnedProcess`
+        """
+        command = self.command(args)
+        env = self.environment()
+        logger.debug("Opening omxplayer with the command: %s" % command)
+        if self.use_posix_spawn and hasattr(os, 'posix_spawnp'):
+            try:
+                return self._spawn(command, env, stdin, stdout)
+            except NotImplementedError:
+                # The C library can't create a session with posix_spawn
+                logger.debug('posix_spawn setsid unsupported, using Popen')
+                self.use_posix_spawn = False
+        return subprocess.Popen(command, stdin=stdin, stdout=stdout, env=env, **_NEW_SESSION)
+
+    def _spawn(self, command, env, stdin, stdout):
+        file_actions = []
+        if stdin is not None:
+            file_actions.append((os.POSIX_SPAWN_DUP2, stdin.fileno(), 0))
+        if stdout is not None:
+            file_actions.append((os.POSIX_SPAWN_DUP2, stdout.fileno(), 1))
+        pid = os.posix_spawnp(command[0], command, os.environ if env is None else env,
+                              file_actions=file_actions, setsid=True)
+        return SpawnedProcess(pid)
+
+
+class BinaryLauncher(ScriptLauncher):
+    """
+    Runs ``omxplayer.bin`` directly with the environment the ``omxplayer``
+    script would set up, saving starting bash and the script's own commands.
+
+    Unlike the script it doesn't start a DBus daemon: one must already be
+    running, its address is read from ``bus_finder``. Use
+    :meth:`DBusDaemon.launcher <omxplayer.dbus_daemon.DBusDaemon.launcher>` to
+    run players on a bus the library owns. The script also resets the console
+    after omxplayer exits, which is skipped.
+
+    Args:
+        executable (str): path to ``omxplayer.bin``
+        bus_finder (BusFinder): finds the address of the bus omxplayer should
+                                use, the current user's address file by default
+        library_path (list): directories to prepend to ``LD_LIBRARY_PATH``
+        use_posix_spawn (bool): see :class:`ScriptLauncher`
+    """
+    def __init__(self, executable=OMXPLAYER_BIN, bus_finder=None,
+                 library_path=OMXPLAYER_LIBRARY_PATH, use_posix_spawn=False):
+        super(BinaryLauncher, self).__init__(executable, use_posix_spawn=use_posix_spawn)
+        if bus_finder is None:
+            bus_finder = BusFinder.for_user(timeout=0)
+        self.bus_finder = bus_finder
+        self.library_path = library_path
+
+    def environment(self):
+        env = dict(os.environ)
+        env['DBUS_SESSION_BUS_ADDRESS'] = self.bus_finder.get_address()
+        pid = self._bus_pid()
+        if pid is not None:
+            env['DBUS_SESSION_BUS_PID'] = str(pid)
+        library_path = [path for path in self.library_path if os.path.isdir(path)]
+        if env.get('LD_LIBRARY_PATH'):
+            library_path.append(env['LD_LIBRARY_PATH'])
+        if library_path:
+            env['LD_LIBRARY_PATH'] = os.pathsep.join(library_path)
+        return env
+
+    def _bus_pid(self):
+        pid = getattr(self.bus_finder, 'pid', None)
+        if pid is not None or not self.bus_finder.path:
+            return pid
+        try:
+            # Written next to the address file by the omxplayer script
+            with open(self.bus_finder.path + '.pid', 'r') as f:
+                return f.read().strip()
+        except (IOError, OSError):
+            return None
@@ -0,0 +1,300 @@
+"""
+Keeps players on several machines in step over UDP.
+
+A :class:`SyncLeader` runs next to the player every other screen follows and
+answers timestamp requests. Each :class:`SyncFollower` periodically sends a
+request and, NTP style, works out the offset between its clock and the
+leader's from the four timestamps of the exchange::
+
+    offset = ((received_by_leader - sent) + (sent_by_leader - received)) / 2
+    delay = (received - sent) - (sent_by_leader - received_by_leader)
+
+The offset of the exchange with the lowest delay among the last few is used
+to project the leader's position onto the follower's clock. The follower
+then corrects its own player with a small rate change, or a seek if it is
+too far off.
+
+>>> leader = SyncLeader(player, ('', 8910))
+>>> # On another Pi
+>>> follower = SyncFollower(player, ('leader.local', 8910))
+>>> follower.start()
+"""
+import collections
+import itertools
+import logging
+import socket
+import struct
+import threading
+import time
+
+from omxplayer.position_tracker import PositionTracker
+from omxplayer.sync_group import corrected_rate
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+_clock = getattr(time, 'monotonic', time.time)
+
+DEFAULT_PORT = 8910
+
+_MAGIC = b'OMXS'
+# magic, sequence number, sent
+_REQUEST = struct.Struct('!4sQd')
+# magic, sequence number, sent, received by leader, sent by leader,
+# leader position, leader playing, leader rate
+_REPLY = struct.Struct('!4sQdddd?d')
+
+# Seconds a blocked socket read waits before checking whether it was closed
+_SOCKET_POLL_INTERVAL = 0.1
+
+
+class SyncLeader(object):
+    """
+    Answers :class:`SyncFollower` requests with the leader player's position.
+
+    The position is extrapolated by a
+    :class:`~omxplayer.position_tracker.PositionTracker`, so answering a
+    request doesn't cost a DBus call.
+
+    Args:
+        player (OMXPlayer): the player followers sync to
+        address (tuple): ``(host, port)`` to listen on
+        tracker (PositionTracker): tracker to read the position from, one
+                                   resampling every ``resync_interval``
+                                   seconds is created if not given
+        resync_interval (float): see :class:`~omxplayer.position_tracker.PositionTracker`
+        clock (callable): returns the current time in seconds, defaults to the
+                          monotonic clock
+
+    Attributes:
+        address (tuple): the address actually bound, useful with port 0
+        requests (int): number of requests answered
+    """
+    def __init__(self, player, address=('', DEFAULT_PORT), tracker=None, resync_interval=1.0,
+                 clock=None):
+        self._tracker = tracker if tracker else PositionTracker(player, resync_interval)
+        self._clock = clock if clock else _clock
+        self.requests = 0
+        self._closed = False
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(address)
+        self._socket.settimeout(_SOCKET_POLL_INTERVAL)
+        self.address = self._socket.getsockname()
+
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        """
+        Stop answering requests.
+        """
+        self._closed = True
+        self._thread.join()
+        self._socket.close()
+
+    def _serve(self):
+        while not self._closed:
+            try:
+                data, peer = self._socket.recvfrom(_REQUEST.size)
+            except socket.timeout:
+                continue
+            received_at = self._clock()
+            if len(data) != _REQUEST.size:
+                continue
+            magic, sequence, sent_at = _REQUEST.unpack(data)
+            if magic != _MAGIC:
+                continue
+
+            try:
+                position = self._tracker.position()
+                playing = self._tracker.is_playing()
+                rate = self._tracker.rate()
+            except Exception as e:
+                logger.debug('Could not read leader position: %s', e)
+                continue
+            reply = _REPLY.pack(_MAGIC, sequence, sent_at, received_at, self._clock(),
+                                position, playing, rate)
+            try:
+                self._socket.sendto(reply, peer)
+            except socket.error as e:
+                logger.debug('Could not reply to %s: %s', peer, e)
+                continue
+            self.requests += 1
+
+
+class SyncFollower(object):
+    """
+    Keeps ``player`` in step with the player of a :class:`SyncLeader`.
+
+    Args:
+        player (OMXPlayer): the player to correct
+        leader_address (tuple): ``(host, port)`` of the leader
+        interval (float): seconds between exchanges once :meth:`start` is called
+        tolerance (float): error in seconds that is left uncorrected
+        seek_threshold (float): error in seconds above which the player is
+                                seeked rather than sped up or slowed down
+        max_rate_adjustment (float): largest deviation from the leader's rate
+                                     used to correct drift
+        samples (int): number of recent exchanges the clock offset is picked from
+        timeout (float): seconds to wait for a reply
+        clock (callable): returns the current time in seconds, defaults to the
+                          monotonic clock
+
+    Attributes:
+        offset (float): estimated leader clock minus follower clock, in seconds
+        delay (float): round trip network delay of the exchange ``offset``
+                       comes from, in seconds
+        error (float): follower position minus leader position at the last
+                       exchange, in seconds
+    """
+    def __init__(self, player, leader_address,
+                 interval=0.5,
+                 tolerance=0.005,
+                 seek_threshold=0.5,
+                 max_rate_adjustment=0.05,
+                 samples=8,
+                 timeout=0.25,
+                 clock=None):
+        self._player = player
+        self.interval = interval
+        self.tolerance = tolerance
+        self.seek_threshold = seek_threshold
+        self.max_rate_adjustment = max_rate_adjustment
+        self._clock = clock if clock else _clock
+
+        self.offset = None
+        self.delay = None
+        self.error = None
+        self._rate = 1.0
+        self._exchanges = collections.deque(maxlen=samples)
+        self._sequence = itertools.count()
+        self._counts = {'exchanges': 0, 'lost': 0, 'rate_adjustments': 0, 'seeks': 0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.connect(leader_address)
+        self._socket.settimeout(timeout)
+
+    def start(self):
+        """
+        Call :meth:`sync` every ``interval`` seconds in a background thread.
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        """
+        Stop syncing with the leader.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._socket.close()
+
+    def sync(self):
+        """
+        Exchange timestamps with the leader and correct the player.
+
+        Returns:
+            float: the error before correcting, see :attr:`error`, or ``None``
+                   if the leader didn't answer in time
+        """
+        with self._lock:
+            reply = self._exchange()
+            if reply is None:
+                self._counts['lost'] += 1
+                return None
+            leader_position, leader_playing, leader_rate, leader_time = reply
+
+            # Read the position directly rather than extrapolating it, drift
+            # is what we are trying to measure
+            before = self._clock()
+            position = self._player.position()
+            now = (before + self._clock()) / 2.0
+            if leader_playing:
+                leader_position += (now + self.offset - leader_time) * leader_rate
+            self.error = position - leader_position
+
+            if leader_playing != self._player.is_playing():
+                if leader_playing:
+                    self._player.play()
+                else:
+                    self._player.pause()
+                self._player.set_position(leader_position)
+            elif abs(self.error) >= self.seek_threshold:
+                self._player.set_position(leader_position)
+                self._set_rate(leader_rate)
+                self._counts['seeks'] += 1
+            elif leader_playing:
+                rate = corrected_rate(self.error, self.tolerance,
+                                      self.max_rate_adjustment, self.interval)
+                if rate != 1.0:
+                    self._counts['rate_adjustments'] += 1
+                self._set_rate(leader_rate * rate)
+            return self.error
+
+    def stats(self):
+        """
+        Returns:
+            dict: the current ``offset``, ``delay`` and ``error``, and the
+                  number of ``exchanges``, ``lost`` requests,
+                  ``rate_adjustments`` and ``seeks``
+        """
+        with self._lock:
+            stats = dict(self._counts)
+            stats.update(offset=self.offset, delay=self.delay, error=self.error)
+            return stats
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception:
+                logger.exception('Failed to sync with the leader')
+            self._stop.wait(self.interval)
+
+    def _exchange(self):
+        # Returns the leader's position, playing state, rate and the leader
+        # clock time they are valid at, updating `offset` and `delay`.
+        sequence = next(self._sequence)
+        sent_at = self._clock()
+        try:
+            self._socket.send(_REQUEST.pack(_MAGIC, sequence, sent_at))
+            while True:
+                data = self._socket.recv(_REPLY.size)
+                received_at = self._clock()
+                if len(data) != _REPLY.size:
+                    continue
+                reply = _REPLY.unpack(data)
+                # Skip late replies to earlier requests
+                if reply[0] == _MAGIC and reply[1] == sequence:
+                    break
+        except socket.timeout:
+            return None
+        except socket.error as e:
+            logger.debug('Could not reach the leader: %s', e)
+            return None
+
+        _, _, _, leader_received_at, leader_sent_at, position, playing, rate = reply
+        offset = ((leader_received_at - sent_at) + (leader_sent_at - received_at)) / 2.0
+        delay = (received_at - sent_at) - (leader_sent_at - leader_received_at)
+        self._exchanges.append((delay, offset))
+        self.delay, self.offset = min(self._exchanges)
+        self._counts['exchanges'] += 1
+        return position, playing, rate, leader_sent_at
+
+    def _set_rate(self, rate):
+        if rate != self._rate:
+            self._player.set_rate(rate)
+            self._rate = rate
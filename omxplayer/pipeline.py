@@ -0,0 +1,128 @@
+import logging
+
+from omxplayer.player import OMXPlayerDeadError
+from omxplayer.transport import Double, Int32, Int64, ObjectPath, String
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+PLAYER_INTERFACE = 'org.mpris.MediaPlayer2.Player'
+PROPERTIES_INTERFACE = 'org.freedesktop.DBus.Properties'
+
+_NOT_USED = ObjectPath('/not/used')
+
+
+class CommandPipeline(object):
+    """
+    Sends player commands without waiting for omxplayer to reply to each one,
+    keeping many in flight, for animations and bursts of UI input where a
+    round trip per command limits how many can be sent.
+
+    Methods take the same arguments as the corresponding
+    :class:`~omxplayer.player.OMXPlayer` methods, fire the same events as soon
+    as the command is sent and return a
+    :class:`~omxplayer.transport.PendingReply`. Failures are passed to
+    ``error_handler`` rather than raised.
+
+    Usually obtained through :attr:`OMXPlayer.pipeline <omxplayer.player.OMXPlayer.pipeline>`.
+
+    Args:
+        player (OMXPlayer): the player to send commands to
+        error_handler (callable): called as ``error_handler(player, member, exception)``
+                                  from a background thread when a command fails
+
+    Attributes:
+        errors (int): number of commands which failed
+
+    >>> for x in range(0, 1280, 4):
+    ...     player.pipeline.set_video_pos(x, 0, x + 640, 360)
+    >>> player.pipeline.flush()
+    """
+    def __init__(self, player, error_handler=None):
+        self._player = player
+        self.error_handler = error_handler
+        self.errors = 0
+        self._last_reply = None
+
+    def flush(self, timeout=None):
+        """
+        Wait until every command sent so far has been replied to.
+
+        Returns:
+            bool: ``False`` if replies were still outstanding after ``timeout`` seconds
+        """
+        # Replies are collected in the order the commands were sent
+        if self._last_reply is None:
+            return True
+        return self._last_reply.wait(timeout)
+
+    def set_volume(self, volume):
+        if volume == 0:
+            # See OMXPlayer.set_volume
+            volume = 1e-10
+        self._player.property_cache.invalidate('Volume')
+        # The signature OMXPlayer.set_volume is sent with
+        return self._send(PROPERTIES_INTERFACE, 'Set', 'ssd',
+                          PLAYER_INTERFACE, 'Volume', Double(volume))
+
+    def mute(self):
+        self._player._is_muted = True
+        self._player.property_cache.invalidate('Volume')
+        return self._send(PLAYER_INTERFACE, 'Mute')
+
+    def unmute(self):
+        self._player._is_muted = False
+        self._player.property_cache.invalidate('Volume')
+        return self._send(PLAYER_INTERFACE, 'Unmute')
+
+    def seek(self, relative_position):
+        reply = self._send(PLAYER_INTERFACE, 'Seek', 'x',
+                           Int64(1000.0 * 1000 * relative_position))
+        self._player.seekEvent(self._player, relative_position)
+        return reply
+
+    def set_position(self, position):
+        reply = self._send(PLAYER_INTERFACE, 'SetPosition', 'ox',
+                           _NOT_USED, Int64(position * 1000.0 * 1000))
+        self._player.positionEvent(self._player, position)
+        return reply
+
+    def set_layer(self, layer):
+        return self._send(PLAYER_INTERFACE, 'SetLayer', 'x', Int64(layer))
+
+    def set_alpha(self, alpha):
+        return self._send(PLAYER_INTERFACE, 'SetAlpha', 'ox', _NOT_USED, Int64(alpha))
+
+    def set_aspect_mode(self, mode):
+        return self._send(PLAYER_INTERFACE, 'SetAspectMode', 'os', _NOT_USED, String(mode))
+
+    def set_video_pos(self, x1, y1, x2, y2):
+        position = '%s %s %s %s' % (x1, y1, x2, y2)
+        return self._send(PLAYER_INTERFACE, 'VideoPos', 'os', _NOT_USED, String(position))
+
+    def set_video_crop(self, x1, y1, x2, y2):
+        crop = '%s %s %s %s' % (x1, y1, x2, y2)
+        return self._send(PLAYER_INTERFACE, 'SetVideoCropPos', 'os', _NOT_USED, String(crop))
+
+    def hide_video(self):
+        return self._send(PLAYER_INTERFACE, 'HideVideo')
+
+    def show_video(self):
+        return self._send(PLAYER_INTERFACE, 'UnHideVideo')
+
+    def action(self, code):
+        return self._send(PLAYER_INTERFACE, 'Action', 'i', Int32(code))
+
+    def _send(self, interface, member, signature='', *args):
+        if not self._player._process_alive:
+            raise OMXPlayerDeadError('Process is no longer alive, can\'t run command')
+
+        def on_error(exception):
+            self.errors += 1
+            if self.error_handler is not None:
+                self.error_handler(self._player, member, exception)
+
+        self._last_reply = self._player._connection.send(interface, member, signature, args,
+                                                         error_handler=on_error)
+        return self._last_reply
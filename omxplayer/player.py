@@ -1,4 +1,5 @@
-import subprocess
+import copy
+import functools
 import time
 import os
 import signal
@@ -6,6 +7,7 @@ import logging
 import threading
 import atexit
 import sys
+from collections import namedtuple
 
 
 try:  # python 3
@@ -14,20 +16,63 @@ except ImportError:  # python2
     from pathlib2 import Path
 
 
-from decorator import decorator
-from dbus import DBusException, Int64, String, ObjectPath
-import dbus.types
-
-from omxplayer.bus_finder import BusFinder
-from omxplayer.dbus_connection import DBusConnection, \
-                                      DBusConnectionError
+from omxplayer.bus_finder import BusFinder, BusFinderTimeoutError
+from omxplayer.cues import CueScheduler
+from omxplayer.launcher import ScriptLauncher
+from omxplayer.property_cache import PropertyCache
+from omxplayer import transport
+from omxplayer.transport import DBusConnectionError, connection_class
 
 from evento import Event
 
 
+_clock = getattr(time, 'monotonic', time.time)
+
 # CONSTANTS
 
+#: Seconds to wait for omxplayer to be reachable over DBus by default
+CONNECT_TIMEOUT = 5.0
+#: First and longest delay between attempts to connect to omxplayer
+RETRY_INITIAL_DELAY = 0.001
 RETRY_DELAY = 0.05
+#: Seconds between playback status checks in `OMXPlayer.play_sync`
+PLAY_SYNC_POLL_INTERVAL = 0.5
+
+# Errors meaning omxplayer doesn't implement Properties.GetAll, others (e.g. a
+# NoReply) don't stop snapshot() from trying it again
+GET_ALL_UNSUPPORTED_ERRORS = ('org.freedesktop.DBus.Error.UnknownMethod',
+                              'org.freedesktop.DBus.Error.NotSupported')
+
+# DBus property names fetched by `OMXPlayer.snapshot` mapped to `PlayerState` fields
+ROOT_PROPERTIES = {
+    'CanQuit': 'can_quit',
+    'Fullscreen': 'fullscreen',
+    'CanSetFullscreen': 'can_set_fullscreen',
+    'CanRaise': 'can_raise',
+    'HasTrackList': 'has_track_list',
+    'Identity': 'identity',
+    'SupportedUriSchemes': 'supported_uri_schemes',
+}
+
+PLAYER_PROPERTIES = {
+    'CanGoNext': 'can_go_next',
+    'CanGoPrevious': 'can_go_previous',
+    'CanSeek': 'can_seek',
+    'CanControl': 'can_control',
+    'CanPlay': 'can_play',
+    'CanPause': 'can_pause',
+    'PlaybackStatus': 'playback_status',
+    'Volume': 'volume',
+    'Position': 'position',
+    'MinimumRate': 'minimum_rate',
+    'MaximumRate': 'maximum_rate',
+    'Metadata': 'metadata',
+    'Aspect': 'aspect_ratio',
+    'VideoStreamCount': 'video_stream_count',
+    'ResWidth': 'width',
+    'ResHeight': 'height',
+    'Duration': 'duration',
+}
 
 
 # FILE GLOBAL OBJECTS
@@ -36,55 +81,136 @@ logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
+def _retry_delays():
+    """
+    Delays between connection attempts, doubling from ``RETRY_INITIAL_DELAY``
+    up to ``RETRY_DELAY``: omxplayer usually comes up within a few
+    milliseconds of the first attempt failing.
+    """
+    delay = RETRY_INITIAL_DELAY
+    while True:
+        yield delay
+        delay = min(delay * 2, RETRY_DELAY)
+
+
 def _check_player_is_active(fn):
-    # wraps is a decorator that improves debugging wrapped methods
-    def wrapped(fn, self, *args, **kwargs):
-        logger.debug('Checking if process is still alive')
-        # poll determines whether the process has terminated,
-        # if it hasn't it returns None.
-        if self._process.poll() is None:
-            logger.debug('OMXPlayer is running, so execute %s' %
-                            fn.__name__)
-            return fn(self, *args, **kwargs)
-        else:
-            raise OMXPlayerDeadError('Process is no longer alive, can\'t run command')
+    # `_process_alive` is cleared by the process monitor thread as soon as the
+    # process exits, so no syscall is needed per call
+    name = fn.__name__
 
-    return decorator(wrapped, fn)
+    @functools.wraps(fn)
+    def wrapped(self, *args, **kwargs):
+        if self._process_alive:
+            logger.debug('OMXPlayer is running, so execute %s', name)
+            instrumentation = self.instrumentation
+            if instrumentation is None:
+                return fn(self, *args, **kwargs)
+            with instrumentation.time('method', name):
+                return fn(self, *args, **kwargs)
+        raise OMXPlayerDeadError('Process is no longer alive, can\'t run command')
+
+    return wrapped
+
+
+def _from_dbus_value(value):
+    """
+    Convert a value returned by dbus-python to builtin types, turning arrays
+    into lists and dictionaries into dicts. Nested containers are converted
+    iteratively so deep values don't recurse.
+    """
+    scalar_converters = transport.DBUS_SCALAR_CONVERTERS
+    value_type = type(value)
+    convert = scalar_converters.get(value_type)
+    if convert is not None:
+        return convert(value)
+    if value_type is transport.DBUS_ARRAY:
+        result = []
+    elif value_type is transport.DBUS_DICTIONARY:
+        result = {}
+    else:
+        return value
+
+    pending = [(value, result)]
+    while pending:
+        source, target = pending.pop()
+        if type(source) is transport.DBUS_DICTIONARY:
+            items = source.items()
+        else:
+            items = enumerate(source)
+        is_list = type(target) is list
+        for key, item in items:
+            item_type = type(item)
+            convert = scalar_converters.get(item_type)
+            if convert is not None:
+                item = convert(item)
+            elif item_type is transport.DBUS_ARRAY:
+                converted = []
+                pending.append((item, converted))
+                item = converted
+            elif item_type is transport.DBUS_DICTIONARY:
+                converted = {}
+                pending.append((item, converted))
+                item = converted
+
+            if is_list:
+                target.append(item)
+            else:
+                convert = scalar_converters.get(type(key))
+                target[convert(key) if convert is not None else key] = item
+    return result
 
 
 def _from_dbus_type(fn):
-    def from_dbus_type(dbusVal):
-        def from_dbus_dict(dbusDict):
-            d = dict()
-            for dbusKey, dbusVal in dbusDict.items():
-                d[from_dbus_type(dbusKey)] = from_dbus_type(dbusVal)
-            return d
-
-        typeUnwrapper = {
-            dbus.types.Dictionary: from_dbus_dict,
-            dbus.types.Array: lambda x: list(map(from_dbus_type, x)),
-            dbus.types.Double: float,
-            dbus.types.Boolean: bool,
-            dbus.types.Byte: int,
-            dbus.types.Int16: int,
-            dbus.types.Int32: int,
-            dbus.types.Int64: int,
-            dbus.types.UInt32: int,
-            dbus.types.UInt64: int,
-            dbus.types.ByteArray: str,
-            dbus.types.ObjectPath: str,
-            dbus.types.Signature: str,
-            dbus.types.String: str
-        }
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapped(self, *args, **kwargs):
+        value = fn(self, *args, **kwargs)
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return _from_dbus_value(value)
+        with instrumentation.time('convert', name):
+            return _from_dbus_value(value)
+
+    return wrapped
+
+
+def _wait_while_playing(stopped, is_playing):
+    # Used by the play_sync() methods. `stopped` is set by pause(), stop() and
+    # the process exiting, which wake us straight away. A pause through
+    # action() or omxplayer's keyboard controls is noticed by checking
+    # `is_playing()` between waits, which also keeps the wait interruptible
+    # with Ctrl-C on Python 2.
+    while not stopped.wait(PLAY_SYNC_POLL_INTERVAL):
         try:
-            return typeUnwrapper[type(dbusVal)](dbusVal)
-        except KeyError:
-            return dbusVal
+            if not is_playing():
+                return
+        except OMXPlayerDeadError:
+            return
 
-    def wrapped(fn, self, *args, **kwargs):
-            return from_dbus_type(fn(self, *args, **kwargs))
 
-    return decorator(wrapped, fn)
+def _close_connection(connection):
+    # close() is optional for caller supplied Connection classes
+    close = getattr(connection, 'close', None)
+    if close is not None:
+        close()
+
+
+def _cached(key, volatile=False):
+    # Serves the wrapped getter from `self.property_cache`, volatile values are
+    # only cached when the player was given a `cache_ttl`
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapped(self, *args, **kwargs):
+            value = self.property_cache.get(key, lambda: fn(self, *args, **kwargs), volatile)
+            # Callers get their own copy of lists and dicts, changing it
+            # mustn't change what later calls return
+            if isinstance(value, (list, dict)):
+                return copy.deepcopy(value)
+            return value
+
+        return wrapped
+    return decorate
 
 
 # CLASSES
@@ -98,6 +224,19 @@ class OMXPlayerDeadError(Exception):
     pass
 
 
+class PlayerState(namedtuple('PlayerState',
+                             sorted(ROOT_PROPERTIES.values()) +
+                             sorted(PLAYER_PROPERTIES.values()) +
+                             ['rate'])):
+    """
+    Immutable snapshot of the player's properties returned by
+    :meth:`OMXPlayer.snapshot`. Fields have the same types and units as the
+    corresponding :class:`OMXPlayer` methods (``position`` and ``duration``
+    are in seconds). Properties the player didn't report are ``None``.
+    """
+    __slots__ = ()
+
+
 class OMXPlayer(object):
     """
     OMXPlayer controller
@@ -107,6 +246,15 @@ class OMXPlayer(object):
     Args:
         source (str): Path to the file (as ~/Videos/my-video.mp4) or URL you wish to play
         args (list/str): used to pass option parameters to omxplayer.  see: https://github.com/popcornmix/omxplayer#synopsis
+        cache_ttl (float): seconds to cache volatile properties such as the volume for,
+                           properties that can't change for a source are always cached
+        instrumentation (Instrumentation): records call latencies, errors and retries,
+                                           see :class:`~omxplayer.instrumentation.Instrumentation`
+        connect_timeout (float): seconds to wait for omxplayer to be reachable over DBus
+                                 before giving up with a ``SystemError``, which also
+                                 bounds the wait for the default finder's address file
+        launcher (ScriptLauncher): starts the omxplayer process, see
+                                   :mod:`omxplayer.launcher`
 
 
     Multiple argument example:
@@ -120,7 +268,11 @@ class OMXPlayer(object):
                  bus_address_finder=None,
                  Connection=None,
                  dbus_name=None,
-                 pause=False):
+                 pause=False,
+                 cache_ttl=0,
+                 instrumentation=None,
+                 connect_timeout=CONNECT_TIMEOUT,
+                 launcher=None):
         logger.debug('Instantiating OMXPlayer')
 
         if args is None:
@@ -133,8 +285,15 @@ class OMXPlayer(object):
         self._is_playing = True
         self._source = Path(source)
         self._dbus_name = dbus_name
-        self._Connection = Connection if Connection else DBusConnection
-        self._bus_address_finder = bus_address_finder if bus_address_finder else BusFinder()
+        self._Connection = Connection if Connection else connection_class()
+        self._bus_address_finder = bus_address_finder if bus_address_finder \
+            else BusFinder.for_user(timeout=connect_timeout)
+        #: :class:`~omxplayer.property_cache.PropertyCache` of the loaded source's properties
+        self.property_cache = PropertyCache(ttl=cache_ttl)
+        #: :class:`~omxplayer.instrumentation.Instrumentation` given to the constructor
+        self.instrumentation = instrumentation
+        self._connect_timeout = connect_timeout
+        self._launcher = launcher if launcher else ScriptLauncher()
 
         #: Event called on pause ``callback(player)``
         self.pauseEvent = Event()
@@ -148,11 +307,48 @@ class OMXPlayer(object):
         self.seekEvent = Event()
         #: Event called on setting position ``callback(player, absolute_position)``
         self.positionEvent = Event()
+        #: Event called on setting the playback rate ``callback(player, rate)``
+        self.rateEvent = Event()
+
+        #: :class:`threading.Event` set when the ``omxplayer`` process exits,
+        #: cleared by ``load()``, see :meth:`wait`
+        self.finished = threading.Event()
+        self._exit_status = None
+        self._playback_stopped = threading.Event()
 
         self._process = None
+        self._process_alive = False
         self._connection = None
+        self._cues = None
+        self._pipeline = None
         self.load(source, pause=pause)
 
+    @property
+    def cues(self):
+        """
+        :class:`~omxplayer.cues.CueScheduler` calling callbacks at media
+        timestamps, created on first use. Cues are kept across ``load()``.
+
+        >>> player.cues.add(12.5, lambda player, timestamp: print('cue'))
+        """
+        if self._cues is None:
+            self._cues = CueScheduler(self)
+        return self._cues
+
+    @property
+    def pipeline(self):
+        """
+        :class:`~omxplayer.pipeline.CommandPipeline` sending commands without
+        waiting for each reply, created on first use.
+
+        >>> player.pipeline.set_alpha(128)
+        """
+        if self._pipeline is None:
+            # Imported here as omxplayer.pipeline imports this module
+            from omxplayer.pipeline import CommandPipeline
+            self._pipeline = CommandPipeline(self)
+        return self._pipeline
+
     def _load_source(self, source):
         if self._process:
             self.quit()
@@ -160,12 +356,20 @@ class OMXPlayer(object):
         self._process = self._setup_omxplayer_process(source)
         self._rate = 1.0
         self._is_muted = False
+        self._supports_get_all = True
+        self.property_cache.clear()
         self._connection = self._setup_dbus_connection(self._Connection, self._bus_address_finder)
+        if self._cues is not None:
+            self._cues.restart()
 
     def _run_omxplayer(self, source, devnull):
         def on_exit(self, exit_status):
+            self._process_alive = False
             logger.info("OMXPlayer process is dead, all DBus calls from here "
                         "will fail")
+            self._exit_status = exit_status
+            self.finished.set()
+            self._playback_stopped.set()
             self.exitEvent(self, exit_status)
 
         def monitor(self, process, on_exit):
@@ -176,20 +380,17 @@ class OMXPlayer(object):
             source = str(source.resolve())
         except AttributeError:
             pass
-        command = ['omxplayer'] + self.args + [source]
+        args = self.args + [source]
         if self._dbus_name:
-            command += ['--dbus_name', self._dbus_name]
-        logger.debug("Opening omxplayer with the command: %s" % command)
-        # By running os.setsid in the fork-ed process we create a process group
-        # which is used to kill the subprocesses the `omxplayer` script
-        # (it is a bash script itself that calls omxplayer.bin) creates. Without
-        # doing this we end up in a scenario where we kill the shell script, but not
-        # the forked children of the shell script.
+            args += ['--dbus_name', self._dbus_name]
+        self._exit_status = None
+        self.finished.clear()
+        # The launcher starts omxplayer in a new session, giving us a process
+        # group to kill: the `omxplayer` script is a bash script starting
+        # omxplayer.bin, killing the script alone would leave omxplayer.bin running.
         # See https://pymotw.com/2/subprocess/#process-groups-sessions for examples on this
-        process = subprocess.Popen(command,
-                                   stdin=devnull,
-                                   stdout=devnull,
-                                   preexec_fn=os.setsid)
+        process = self._launcher.launch(args, stdin=devnull, stdout=devnull)
+        self._process_alive = True
         try:
             self._process_monitor = threading.Thread(target=monitor,
                                                      args=(self, process, on_exit))
@@ -220,20 +421,42 @@ class OMXPlayer(object):
 
     def _setup_dbus_connection(self, Connection, bus_address_finder):
         logger.debug('Trying to connect to OMXPlayer via DBus')
-        tries = 0
-        while tries < 50:
+        deadline = _clock() + self._connect_timeout
+        for tries, delay in enumerate(_retry_delays()):
             logger.debug('DBus connect attempt: {}'.format(tries))
             try:
-                connection = Connection(bus_address_finder.get_address(), self._dbus_name)
+                if self.instrumentation is None:
+                    connection = Connection(bus_address_finder.get_address(), self._dbus_name)
+                else:
+                    connection = Connection(bus_address_finder.get_address(), self._dbus_name,
+                                            instrumentation=self.instrumentation)
+                self._verify_name_owner(connection)
                 logger.debug(
                     'Connected to OMXPlayer at DBus address: %s' % connection)
                 return connection
 
+            except BusFinderTimeoutError as e:
+                raise SystemError('DBus cannot connect to the OMXPlayer process: %s' % e)
             except (DBusConnectionError, IOError):
                 logger.debug('Failed to connect to OMXPlayer DBus address')
-                tries += 1
-                time.sleep(RETRY_DELAY)
-        raise SystemError('DBus cannot connect to the OMXPlayer process')
+                if _clock() + delay > deadline:
+                    raise SystemError('DBus cannot connect to the OMXPlayer process')
+                if self.instrumentation is not None:
+                    self.instrumentation.retry('dbus_connect')
+                time.sleep(delay)
+
+    def _verify_name_owner(self, connection):
+        # omxplayer is run in its own session so its PID is the process group
+        # every process it spawns belongs to. Connection classes written
+        # before verify_name_owner() and close() existed are trusted.
+        verify_name_owner = getattr(connection, 'verify_name_owner', None)
+        if verify_name_owner is None:
+            return
+        try:
+            verify_name_owner(self._process.pid)
+        except DBusConnectionError:
+            _close_connection(connection)
+            raise
 
     """ Utilities """
 
@@ -250,7 +473,8 @@ class OMXPlayer(object):
         try:
             self._load_source(source)
             if pause:
-                time.sleep(0.5)  # Wait for the DBus interface to be initialised
+                # omxplayer queues calls made before its main loop starts, so
+                # they can be made as soon as it owns its DBus name
                 self.pause()
         except:
             # Make sure we do not leave any dangling process
@@ -262,6 +486,7 @@ class OMXPlayer(object):
     """ ROOT INTERFACE PROPERTIES """
 
     @_check_player_is_active
+    @_cached('CanQuit')
     @_from_dbus_type
     def can_quit(self):
         """
@@ -270,6 +495,7 @@ class OMXPlayer(object):
         return self._root_interface_property('CanQuit')
 
     @_check_player_is_active
+    @_cached('Fullscreen', volatile=True)
     @_from_dbus_type
     def fullscreen(self):
         """
@@ -278,6 +504,7 @@ class OMXPlayer(object):
         return self._root_interface_property('Fullscreen')
 
     @_check_player_is_active
+    @_cached('CanSetFullscreen')
     @_from_dbus_type
     def can_set_fullscreen(self):
         """
@@ -286,6 +513,7 @@ class OMXPlayer(object):
         return self._root_interface_property('CanSetFullscreen')
 
     @_check_player_is_active
+    @_cached('CanRaise')
     @_from_dbus_type
     def can_raise(self):
         """
@@ -294,6 +522,7 @@ class OMXPlayer(object):
         return self._root_interface_property('CanRaise')
 
     @_check_player_is_active
+    @_cached('HasTrackList')
     @_from_dbus_type
     def has_track_list(self):
         """
@@ -302,6 +531,7 @@ class OMXPlayer(object):
         return self._root_interface_property('HasTrackList')
 
     @_check_player_is_active
+    @_cached('Identity')
     @_from_dbus_type
     def identity(self):
         """
@@ -311,6 +541,7 @@ class OMXPlayer(object):
         return self._root_interface_property('Identity')
 
     @_check_player_is_active
+    @_cached('SupportedUriSchemes')
     @_from_dbus_type
     def supported_uri_schemes(self):
         """
@@ -327,6 +558,7 @@ class OMXPlayer(object):
     """ PLAYER INTERFACE PROPERTIES """
 
     @_check_player_is_active
+    @_cached('CanGoNext')
     @_from_dbus_type
     def can_go_next(self):
         """
@@ -336,6 +568,7 @@ class OMXPlayer(object):
         return self._player_interface_property('CanGoNext')
 
     @_check_player_is_active
+    @_cached('CanGoPrevious')
     @_from_dbus_type
     def can_go_previous(self):
         """
@@ -346,6 +579,7 @@ class OMXPlayer(object):
         return self._player_interface_property('CanGoPrevious')
 
     @_check_player_is_active
+    @_cached('CanSeek')
     @_from_dbus_type
     def can_seek(self):
         """
@@ -354,6 +588,7 @@ class OMXPlayer(object):
         return self._player_interface_property('CanSeek')
 
     @_check_player_is_active
+    @_cached('CanControl')
     @_from_dbus_type
     def can_control(self):
         """
@@ -362,6 +597,7 @@ class OMXPlayer(object):
         return self._player_interface_property('CanControl')
 
     @_check_player_is_active
+    @_cached('CanPlay')
     @_from_dbus_type
     def can_play(self):
         """
@@ -370,6 +606,7 @@ class OMXPlayer(object):
         return self._player_interface_property('CanPlay')
 
     @_check_player_is_active
+    @_cached('CanPause')
     @_from_dbus_type
     def can_pause(self):
         """
@@ -378,6 +615,7 @@ class OMXPlayer(object):
         return self._player_interface_property('CanPause')
 
     @_check_player_is_active
+    @_cached('PlaybackStatus', volatile=True)
     @_from_dbus_type
     def playback_status(self):
         """
@@ -387,6 +625,7 @@ class OMXPlayer(object):
         return self._player_interface_property('PlaybackStatus')
 
     @_check_player_is_active
+    @_cached('Volume', volatile=True)
     @_from_dbus_type
     def volume(self):
         """
@@ -407,7 +646,8 @@ class OMXPlayer(object):
         # 0 isn't handled correctly so we have to set it to a very small value to achieve the same purpose
         if volume == 0:
             volume = 1e-10
-        return self._player_interface_property('Volume', dbus.Double(volume))
+        self.property_cache.invalidate('Volume')
+        return self._player_interface_property('Volume', transport.Double(volume))
 
     @_check_player_is_active
     @_from_dbus_type
@@ -426,6 +666,7 @@ class OMXPlayer(object):
         return self._position_us() / (1000.0 * 1000.0)
 
     @_check_player_is_active
+    @_cached('MinimumRate')
     @_from_dbus_type
     def minimum_rate(self):
         """
@@ -435,6 +676,7 @@ class OMXPlayer(object):
         return self._player_interface_property('MinimumRate')
 
     @_check_player_is_active
+    @_cached('MaximumRate')
     @_from_dbus_type
     def maximum_rate(self):
         """
@@ -464,10 +706,12 @@ class OMXPlayer(object):
             >>> player.set_rate(0.5)
             # Will play half speed
         """
-        self._rate = self._player_interface_property('Rate', dbus.Double(rate))
+        self._rate = self._player_interface_property('Rate', transport.Double(rate))
+        self.rateEvent(self, self._rate)
         return self._rate
 
     @_check_player_is_active
+    @_cached('Metadata')
     @_from_dbus_type
     def metadata(self):
         """
@@ -485,6 +729,7 @@ class OMXPlayer(object):
     """ PLAYER INTERFACE NON-STANDARD PROPERTIES """
 
     @_check_player_is_active
+    @_cached('Aspect')
     @_from_dbus_type
     def aspect_ratio(self):
         """
@@ -494,6 +739,7 @@ class OMXPlayer(object):
         return self._player_interface_property('Aspect')
 
     @_check_player_is_active
+    @_cached('VideoStreamCount')
     @_from_dbus_type
     def video_stream_count(self):
         """
@@ -503,6 +749,7 @@ class OMXPlayer(object):
         return self._player_interface_property('VideoStreamCount')
 
     @_check_player_is_active
+    @_cached('ResWidth')
     @_from_dbus_type
     def width(self):
         """
@@ -512,6 +759,7 @@ class OMXPlayer(object):
         return self._player_interface_property('ResWidth')
 
     @_check_player_is_active
+    @_cached('ResHeight')
     @_from_dbus_type
     def height(self):
         """
@@ -521,6 +769,7 @@ class OMXPlayer(object):
         return self._player_interface_property('ResHeight')
 
     @_check_player_is_active
+    @_cached('Duration')
     @_from_dbus_type
     def _duration_us(self):
         """
@@ -537,6 +786,53 @@ class OMXPlayer(object):
         """
         return self._duration_us() / (1000.0 * 1000.0)
 
+    @_check_player_is_active
+    def snapshot(self):
+        """
+        Fetch all root and player properties at once, using a single
+        ``GetAll`` call per interface where omxplayer supports it.
+
+        Returns:
+            PlayerState: the player's current properties
+
+        Raises:
+            DBusException: if ``GetAll`` fails for another reason than
+                           omxplayer not implementing it
+        """
+        values = {}
+        for interface, properties in [(self._root_interface.dbus_interface, ROOT_PROPERTIES),
+                                      (self._player_interface.dbus_interface, PLAYER_PROPERTIES)]:
+            interface_values = self._all_interface_properties(interface, properties)
+            for prop, field in properties.items():
+                values[field] = interface_values.get(prop)
+
+        for field in ('position', 'duration'):
+            if values[field] is not None:
+                values[field] = values[field] / (1000.0 * 1000.0)
+        if self._is_muted:
+            values['volume'] = 0
+        values['rate'] = self._rate
+        return PlayerState(**values)
+
+    @_from_dbus_type
+    def _all_interface_properties(self, interface, properties):
+        if self._supports_get_all:
+            try:
+                return self._properties_interface.GetAll(interface)
+            except transport.DBusException as e:
+                if e.get_dbus_name() not in GET_ALL_UNSUPPORTED_ERRORS:
+                    raise
+                logger.debug('GetAll failed (%s), falling back to Get', e)
+                self._supports_get_all = False
+
+        values = {}
+        for prop in properties:
+            try:
+                values[prop] = self._properties_interface.Get(interface, prop)
+            except transport.DBusException:
+                logger.debug('Could not get property %s', prop)
+        return transport.Dictionary(values, signature='sv')
+
 
     """ PLAYER INTERFACE METHODS """
 
@@ -545,8 +841,10 @@ class OMXPlayer(object):
         """
         Pause playback
         """
+        self.property_cache.invalidate('PlaybackStatus')
         self._player_interface.Pause()
         self._is_playing = False
+        self._playback_stopped.set()
         self.pauseEvent(self)
 
     @_check_player_is_active
@@ -554,11 +852,13 @@ class OMXPlayer(object):
         """
         Pause playback if currently playing, otherwise start playing if currently paused.
         """
+        self.property_cache.invalidate('PlaybackStatus')
         self._player_interface.PlayPause()
         self._is_playing = not self._is_playing
         if self._is_playing:
             self.playEvent(self)
         else:
+            self._playback_stopped.set()
             self.pauseEvent(self)
 
     @_check_player_is_active
@@ -567,7 +867,9 @@ class OMXPlayer(object):
         """
         Stop the player, causing it to quit
         """
+        self.property_cache.invalidate('PlaybackStatus')
         self._player_interface.Stop()
+        self._playback_stopped.set()
         self.stopEvent(self)
 
     @_check_player_is_active
@@ -579,7 +881,7 @@ class OMXPlayer(object):
         Args:
             relative_position (float): The position in seconds to seek to.
         """
-        self._player_interface.Seek(Int64(1000.0 * 1000 * relative_position))
+        self._player_interface.Seek(transport.Int64(1000.0 * 1000 * relative_position))
         self.seekEvent(self, relative_position)
 
     @_check_player_is_active
@@ -591,7 +893,7 @@ class OMXPlayer(object):
         Args:
             position (float): The position in seconds.
         """
-        self._player_interface.SetPosition(ObjectPath("/not/used"), Int64(position * 1000.0 * 1000))
+        self._player_interface.SetPosition(transport.ObjectPath("/not/used"), transport.Int64(position * 1000.0 * 1000))
         self.positionEvent(self, position)
 
     @_check_player_is_active
@@ -603,7 +905,7 @@ class OMXPlayer(object):
         Args:
             layer (int): The Layer to switch to.
         """
-        self._player_interface.SetLayer(Int64(layer))
+        self._player_interface.SetLayer(transport.Int64(layer))
 
     @_check_player_is_active
     @_from_dbus_type
@@ -614,7 +916,7 @@ class OMXPlayer(object):
         Args:
             alpha (float): The transparency (0..255)
         """
-        self._player_interface.SetAlpha(ObjectPath('/not/used'), Int64(alpha))
+        self._player_interface.SetAlpha(transport.ObjectPath('/not/used'), transport.Int64(alpha))
 
     @_check_player_is_active
     def mute(self):
@@ -622,6 +924,7 @@ class OMXPlayer(object):
         Mute audio. If already muted, then this does not do anything
         """
         self._is_muted = True
+        self.property_cache.invalidate('Volume')
         self._player_interface.Mute()
 
     @_check_player_is_active
@@ -630,6 +933,7 @@ class OMXPlayer(object):
         Unmutes the video. If already unmuted, then this does not do anything
         """
         self._is_muted = False
+        self.property_cache.invalidate('Volume')
         self._player_interface.Unmute()
 
 
@@ -642,7 +946,7 @@ class OMXPlayer(object):
         Args:
             mode (str): One of ("letterbox" | "fill" | "stretch")
         """
-        self._player_interface.SetAspectMode(ObjectPath('/not/used'), String(mode))
+        self._player_interface.SetAspectMode(transport.ObjectPath('/not/used'), transport.String(mode))
 
     @_check_player_is_active
     @_from_dbus_type
@@ -657,7 +961,7 @@ class OMXPlayer(object):
             y2 (int): Bottom right y coordinate (px)
         """
         position = "%s %s %s %s" % (str(x1),str(y1),str(x2),str(y2))
-        self._player_interface.VideoPos(ObjectPath('/not/used'), String(position))
+        self._player_interface.VideoPos(transport.ObjectPath('/not/used'), transport.String(position))
 
     @_check_player_is_active
     def video_pos(self):
@@ -666,7 +970,7 @@ class OMXPlayer(object):
             (int, int, int, int): Video spatial position (x1, y1, x2, y2) where (x1, y1) is top left,
                                   and (x2, y2) is bottom right. All values in px.
         """
-        position_string = self._player_interface.VideoPos(ObjectPath('/not/used'))
+        position_string = self._player_interface.VideoPos(transport.ObjectPath('/not/used'))
         return list(map(int, position_string.split(" ")))
 
     @_check_player_is_active
@@ -680,7 +984,7 @@ class OMXPlayer(object):
             y2 (int): Bottom right y coordinate (px)
         """
         crop = "%s %s %s %s" % (str(x1),str(y1),str(x2),str(y2))
-        self._player_interface.SetVideoCropPos(ObjectPath('/not/used'), String(crop))
+        self._player_interface.SetVideoCropPos(transport.ObjectPath('/not/used'), transport.String(crop))
 
     @_check_player_is_active
     def hide_video(self):
@@ -697,6 +1001,7 @@ class OMXPlayer(object):
         self._player_interface.UnHideVideo()
 
     @_check_player_is_active
+    @_cached('ListAudio')
     @_from_dbus_type
     def list_audio(self):
         """
@@ -707,6 +1012,7 @@ class OMXPlayer(object):
         return self._player_interface.ListAudio()
 
     @_check_player_is_active
+    @_cached('ListVideo')
     @_from_dbus_type
     def list_video(self):
         """
@@ -718,6 +1024,7 @@ class OMXPlayer(object):
 
 
     @_check_player_is_active
+    @_cached('ListSubtitles')
     @_from_dbus_type
     def list_subtitles(self):
         """
@@ -735,7 +1042,8 @@ class OMXPlayer(object):
         Args:
             index (int): index of subtitle listing returned by :class:`list_subtitles`
         """
-        return self._player_interface.SelectSubtitle(dbus.Int32(index))
+        self.property_cache.invalidate('ListSubtitles')
+        return self._player_interface.SelectSubtitle(transport.Int32(index))
 
     @_check_player_is_active
     def select_audio(self, index):
@@ -745,13 +1053,15 @@ class OMXPlayer(object):
         Args:
             index (int): index of audio stream returned by :class:`list_audio`
         """
-        return self._player_interface.SelectAudio(dbus.Int32(index))
+        self.property_cache.invalidate('ListAudio')
+        return self._player_interface.SelectAudio(transport.Int32(index))
 
     @_check_player_is_active
     def show_subtitles(self):
         """
         Shows subtitles after :class:`hide_subtitles`
         """
+        self.property_cache.invalidate('ListSubtitles')
         return self._player_interface.ShowSubtitles()
 
     @_check_player_is_active
@@ -759,6 +1069,7 @@ class OMXPlayer(object):
         """
         Hide subtitles
         """
+        self.property_cache.invalidate('ListSubtitles')
         return self._player_interface.HideSubtitles()
 
     @_check_player_is_active
@@ -788,19 +1099,29 @@ class OMXPlayer(object):
     @_from_dbus_type
     def play_sync(self):
         """
-        Play the video and block whilst the video is playing
+        Play the video and block whilst the video is playing, that is until
+        it ends, is stopped or is paused
         """
+        self._playback_stopped.clear()
         self.play()
         logger.info("Playing synchronously")
-        try:
-            time.sleep(0.05)
-            logger.debug("Wait for playing to start")
-            while self.is_playing():
-                time.sleep(0.05)
-        except DBusException:
-            logger.error(
-                "Cannot play synchronously any longer as DBus calls timed out."
-            )
+        _wait_while_playing(self._playback_stopped, self.is_playing)
+
+    def wait(self, timeout=None):
+        """
+        Block until the ``omxplayer`` process exits, waking as soon as it
+        does rather than polling.
+
+        Args:
+            timeout (float): seconds to wait for, ``None`` waits forever
+
+        Returns:
+            int: the process' exit status, or ``None`` if it was still running
+                 after ``timeout``
+        """
+        if not self.finished.wait(timeout):
+            return None
+        return self._exit_status
 
     @_check_player_is_active
     @_from_dbus_type
@@ -871,6 +1192,11 @@ class OMXPlayer(object):
         self._terminate_process(self._process)
         self._process_monitor.join()
         self._process = None
+        if self._connection is not None:
+            _close_connection(self._connection)
+        if hasattr(atexit, 'unregister'):
+            # Python 3.x only, otherwise every player ever quit stays reachable
+            atexit.unregister(self.quit)
 
     @_check_player_is_active
     @_from_dbus_type
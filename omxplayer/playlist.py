@@ -0,0 +1,195 @@
+import logging
+import threading
+import time
+
+from evento import Event
+
+from omxplayer.pool import PlayerPool
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+_clock = getattr(time, 'monotonic', time.time)
+
+OPAQUE = 255
+
+
+class Playlist(object):
+    """
+    Plays a list of sources back to back without a gap between them.
+
+    While an item plays, the next one is started paused on the layer below it
+    and fully transparent (``--layer`` and ``--alpha 0`` are given at launch so
+    it is never visible). When the playing item's process exits the waiting
+    player is raised to the top layer, made opaque and started, which only
+    takes a few DBus calls. The players of items which ended are quit one
+    transition later, call :meth:`stop` to quit the last ones.
+
+    Args:
+        sources (list): paths or URLs to play in order
+        layer (int): layer the playing item is shown on, the next item waits on ``layer - 1``
+        loop (bool): start again from the first item after the last one
+        args (list/str): extra arguments passed to every player
+        pool (PlayerPool): pool used to preload items, one is created if not given
+        player_kwargs: passed to the :class:`PlayerPool` when one is created
+
+    Attributes:
+        transition_gaps (list): seconds between each item exiting and the next
+                                one playing
+        error (Exception): what stopped the playlist early if the next item
+                           couldn't be started, ``None`` otherwise
+
+    >>> playlist = Playlist(['intro.mp4', 'main.mp4'])
+    >>> playlist.play()
+    >>> playlist.wait()
+    >>> playlist.stop()
+    >>> playlist.transition_gaps
+    [0.0123]
+    """
+    def __init__(self, sources,
+                 layer=1,
+                 loop=False,
+                 args=None,
+                 pool=None,
+                 **player_kwargs):
+        self.sources = list(sources)
+        self.layer = layer
+        self.loop = loop
+        self._pool = pool if pool else PlayerPool(size=1, args=args, **player_kwargs)
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._stopped = False
+        self._index = None
+        # The player which exited last, quit at the next transition: quit()
+        # can't be called from the exit handler, run by the player's own
+        # monitor thread
+        self._exited = None
+
+        #: The player currently showing
+        self.player = None
+        self.transition_gaps = []
+        self.error = None
+
+        #: Event called when the next item starts ``callback(playlist, player, gap)``
+        self.transitionEvent = Event()
+        #: Event called after the last item has finished ``callback(playlist)``
+        self.finishEvent = Event()
+
+    @property
+    def index(self):
+        """
+        int: index of the item currently playing in ``sources``
+        """
+        return self._index
+
+    def play(self):
+        """
+        Start playing from the first item, returning immediately.
+        """
+        if not self.sources:
+            raise ValueError('Playlist has no sources')
+        self._stopped = False
+        self._finished.clear()
+        self.error = None
+        self._index = 0
+        self.player = self._pool.acquire(self.sources[0], args=self._layer_args(self.layer))
+        self.player.exitEvent += self._on_exit
+        self._preload(1)
+        self.player.play()
+
+    def wait(self, timeout=None):
+        """
+        Block until the playlist has finished or was stopped.
+
+        Returns:
+            bool: ``False`` if ``timeout`` seconds passed first
+
+        Raises:
+            Exception: :attr:`error`, if the next item couldn't be started
+        """
+        finished = self._finished.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return finished
+
+    def advance(self):
+        """
+        Skip to the next item.
+        """
+        if self.player is not None:
+            # Quitting triggers the exit handler which starts the next item
+            self.player.quit()
+
+    def stop(self):
+        """
+        Stop playback and quit all players.
+        """
+        with self._lock:
+            self._stopped = True
+            players = [self.player, self._exited]
+            self.player = self._exited = None
+        for player in players:
+            if player is not None:
+                player.quit()
+        self._pool.close()
+        self._finished.set()
+
+    def _next_index(self, index):
+        if index < len(self.sources):
+            return index
+        if self.loop:
+            return index % len(self.sources)
+        return None
+
+    def _layer_args(self, layer, alpha=None):
+        args = ['--layer', str(layer)]
+        if alpha is not None:
+            args += ['--alpha', str(alpha)]
+        return args
+
+    def _preload(self, index):
+        index = self._next_index(index)
+        if index is not None:
+            self._pool.preload(self.sources[index],
+                               args=self._layer_args(self.layer - 1, alpha=0))
+
+    def _on_exit(self, player, exit_status):
+        with self._lock:
+            if self._stopped or player is not self.player:
+                return
+            exited_at = _clock()
+            # Close the connection of the item before, so a looping playlist
+            # only ever holds on to two
+            previous, self._exited = self._exited, player
+            if previous is not None:
+                previous.quit()
+            index = self._next_index(self._index + 1)
+            if index is None:
+                logger.debug('Playlist finished')
+                self.player = None
+                self._finished.set()
+                self.finishEvent(self)
+                return
+
+            try:
+                next_player = self._pool.acquire(self.sources[index],
+                                                 args=self._layer_args(self.layer - 1, alpha=0))
+            except Exception as e:
+                logger.exception('Could not start %s', self.sources[index])
+                self.error = e
+                self.player = None
+                self._finished.set()
+                return
+            next_player.set_layer(self.layer)
+            next_player.set_alpha(OPAQUE)
+            next_player.play()
+            gap = _clock() - exited_at
+
+            self._index = index
+            self.player = next_player
+            self.transition_gaps.append(gap)
+            logger.debug('Transitioned to %s in %.1f ms', self.sources[index], gap * 1000)
+            next_player.exitEvent += self._on_exit
+            self._preload(index + 1)
+        self.transitionEvent(self, next_player, gap)
@@ -0,0 +1,210 @@
+import collections
+import logging
+import threading
+
+from omxplayer.player import OMXPlayer
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+DEFAULT_DBUS_NAME_PREFIX = 'org.mpris.MediaPlayer2.omxplayer.pool'
+
+
+class PlayerPool(object):
+    """
+    Keeps ``omxplayer`` processes started, paused and connected ahead of time
+    so that switching to a new source is a swap rather than a cold start.
+
+    omxplayer has to be given its media when it is launched, so players are
+    warmed up for the sources queued with :meth:`preload`. A background thread
+    keeps up to ``size`` warm players around, each with its own
+    ``--dbus_name``.
+
+    Args:
+        size (int): maximum number of warm players kept around
+        args (list/str): extra arguments passed to every player, see :class:`OMXPlayer`
+        dbus_name_prefix (str): prefix of the DBus name each player registers,
+                                a counter is appended to make it unique
+        Player (class): player class to instantiate, defaults to :class:`OMXPlayer`
+        player_kwargs: any other keyword arguments are passed to ``Player``
+
+    >>> pool = PlayerPool(size=1)
+    >>> pool.preload('intro.mp4')
+    >>> pool.load('intro.mp4')  # Starts playing the warm player
+    >>> pool.preload('main.mp4')
+    >>> pool.load('main.mp4')  # Swaps to main.mp4 and quits intro.mp4
+    """
+    def __init__(self, size=1,
+                 args=None,
+                 dbus_name_prefix=DEFAULT_DBUS_NAME_PREFIX,
+                 Player=None,
+                 **player_kwargs):
+        self.size = size
+        self.args = args
+        self._dbus_name_prefix = dbus_name_prefix
+        self._Player = Player if Player else OMXPlayer
+        self._player_kwargs = player_kwargs
+        self._player_count = 0
+
+        self._condition = threading.Condition()
+        self._pending = collections.deque()
+        self._starting = set()
+        self._warm = []
+        self._closed = False
+
+        #: The player most recently handed out by :meth:`load`
+        self.current = None
+
+        self._refill_thread = threading.Thread(target=self._refill)
+        self._refill_thread.daemon = True
+        self._refill_thread.start()
+
+    def preload(self, source, args=None):
+        """
+        Queue ``source`` to be started paused in the background.
+
+        Args:
+            source (str): Path to the file to play or URL
+            args (list): arguments added to the pool's ``args`` for this player only
+        """
+        with self._condition:
+            self._pending.append((source, args))
+            self._condition.notify_all()
+
+    def acquire(self, source, args=None):
+        """
+        Take a paused player for ``source`` out of the pool, starting one
+        synchronously if none has been preloaded.
+
+        Returns:
+            OMXPlayer: a paused player, the caller becomes responsible for quitting it
+        """
+        with self._condition:
+            while True:
+                player = self._take_warm(source)
+                if player is not None:
+                    logger.debug('Handing out warm player for %s', source)
+                    self._condition.notify_all()
+                    return player
+                if source not in self._starting:
+                    break
+                # It is being started in the background, waiting is cheaper
+                # than starting another process.
+                self._condition.wait()
+
+            self._remove_pending(source)
+
+        logger.debug('No warm player for %s, starting one', source)
+        return self._start_player(source, args)
+
+    def load(self, source, pause=False, args=None):
+        """
+        Switch playback to ``source``, quitting the previously loaded player
+        once the new one has started.
+
+        Args:
+            source (str): Path to the file to play or URL
+            pause (bool): leave the new player paused
+
+        Returns:
+            OMXPlayer: the player now playing ``source``
+        """
+        player = self.acquire(source, args)
+        if not pause:
+            player.play()
+        previous, self.current = self.current, player
+        if previous is not None:
+            previous.quit()
+        return player
+
+    def clear(self):
+        """
+        Quit all warm players and forget queued sources.
+        """
+        with self._condition:
+            warm, self._warm = self._warm, []
+            self._pending.clear()
+        for _, player in warm:
+            player.quit()
+
+    def close(self):
+        """
+        Stop refilling and quit every player owned by the pool, including the
+        current one.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._refill_thread.join()
+        self.clear()
+        if self.current is not None:
+            self.current.quit()
+            self.current = None
+
+    def _take_warm(self, source):
+        for i, (warm_source, player) in enumerate(self._warm):
+            if warm_source == source:
+                del self._warm[i]
+                player.exitEvent -= self._on_warm_player_exit
+                return player
+        return None
+
+    def _remove_pending(self, source):
+        for item in self._pending:
+            if item[0] == source:
+                self._pending.remove(item)
+                return
+
+    def _next_dbus_name(self):
+        with self._condition:
+            self._player_count += 1
+            return '%s%d' % (self._dbus_name_prefix, self._player_count)
+
+    def _start_player(self, source, args=None):
+        player_args = list(self._split_args(self.args)) + list(self._split_args(args))
+        return self._Player(source,
+                            args=player_args,
+                            dbus_name=self._next_dbus_name(),
+                            pause=True,
+                            **self._player_kwargs)
+
+    @staticmethod
+    def _split_args(args):
+        if args is None:
+            return []
+        if isinstance(args, str):
+            import shlex
+            return shlex.split(args)
+        return args
+
+    def _on_warm_player_exit(self, player, exit_status):
+        logger.info('Warm player exited with status %s, dropping it', exit_status)
+        with self._condition:
+            self._warm = [(s, p) for s, p in self._warm if p is not player]
+            self._condition.notify_all()
+
+    def _refill(self):
+        while True:
+            with self._condition:
+                while not self._closed and \
+                        (not self._pending or
+                         len(self._warm) + len(self._starting) >= self.size):
+                    self._condition.wait()
+                if self._closed:
+                    return
+                source, args = self._pending.popleft()
+                self._starting.add(source)
+
+            player = None
+            try:
+                player = self._start_player(source, args)
+                player.exitEvent += self._on_warm_player_exit
+            except Exception:
+                logger.exception('Could not preload %s', source)
+            finally:
+                with self._condition:
+                    self._starting.discard(source)
+                    if player is not None:
+                        self._warm.append((source, player))
+                    self._condition.notify_all()
@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class PositionTracker(object):
+    """
+    Tracks a player's playback position without querying it over DBus on
+    every read.
+
+    The position is sampled once and then extrapolated from the monotonic
+    clock and the playback rate, and kept within the media's duration once
+    that is known. A new sample is taken on the next read after a seek, a
+    position change, play/pause, stop, a rate change or the process exiting,
+    and every ``resync_interval`` seconds to correct drift.
+
+    Args:
+        player (OMXPlayer): the player to track
+        resync_interval (float): maximum seconds between samples
+
+    Attributes:
+        syncs (int): number of times the position was sampled over DBus
+
+    >>> tracker = PositionTracker(player)
+    >>> tracker.position()
+    12.345
+    """
+    def __init__(self, player, resync_interval=5.0):
+        self._player = player
+        self.resync_interval = resync_interval
+        self.syncs = 0
+        self._lock = threading.Lock()
+        self._stale = True
+        self._position = 0.0
+        self._sampled_at = None
+        self._playing = False
+        self._rate = 1.0
+        # 0 while unknown, e.g. for streams
+        self._duration = 0.0
+
+        self._events = [player.seekEvent,
+                        player.positionEvent,
+                        player.playEvent,
+                        player.pauseEvent,
+                        player.stopEvent,
+                        player.rateEvent,
+                        player.exitEvent]
+        for event in self._events:
+            event += self._on_change
+
+    def _on_change(self, player, *args):
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Take a new sample on the next read.
+        """
+        self._stale = True
+
+    def sync(self):
+        """
+        Sample the position, playback status and rate from the player.
+        """
+        # Clear first so that an event arriving while sampling isn't lost
+        self._stale = False
+        before = _clock()
+        position = self._player.position()
+        after = _clock()
+        playing = self._player.playback_status() == 'Playing'
+        rate = self._player.rate()
+        # Cached by the player after the first read of each source
+        duration = self._player.duration()
+        with self._lock:
+            self._position = position
+            # The position was read somewhere during the round trip
+            self._sampled_at = (before + after) / 2.0
+            self._playing = playing
+            self._rate = rate
+            self._duration = duration
+            self.syncs += 1
+        logger.debug('Synced position %.3fs (playing: %s, rate: %s)', position, playing, rate)
+
+    def is_playing(self):
+        """
+        Returns:
+            bool: whether the player was playing when last sampled
+        """
+        self._sync_if_needed(_clock())
+        return self._playing
+
+    def rate(self):
+        """
+        Returns:
+            float: the playback rate when last sampled
+        """
+        self._sync_if_needed(_clock())
+        return self._rate
+
+    def position(self):
+        """
+        Returns:
+            float: extrapolated position in seconds
+        """
+        now = _clock()
+        self._sync_if_needed(now)
+        with self._lock:
+            if not self._playing:
+                return self._position
+            position = max(0.0, self._position + (now - self._sampled_at) * self._rate)
+            if self._duration > 0:
+                position = min(position, self._duration)
+            return position
+
+    def _sync_if_needed(self, now):
+        if self._stale or self._sampled_at is None or \
+                now - self._sampled_at >= self.resync_interval:
+            self.sync()
+
+    def close(self):
+        """
+        Stop listening to the player's events.
+        """
+        for event in self._events:
+            event -= self._on_change
@@ -0,0 +1,73 @@
+import threading
+import time
+
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class PropertyCache(object):
+    """
+    Caches property values for the currently loaded source.
+
+    Static values (e.g. duration, resolution, capabilities) are kept until the
+    cache is cleared, which :class:`~omxplayer.player.OMXPlayer` does on every
+    ``load()``. Volatile values (e.g. volume) are kept for ``ttl`` seconds, or
+    not at all if ``ttl`` is 0.
+
+    Args:
+        ttl (float): seconds volatile values stay valid
+
+    Attributes:
+        hits (int): number of lookups served from the cache
+        misses (int): number of lookups that had to fetch the value
+    """
+    def __init__(self, ttl=0):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch, volatile=False):
+        """
+        Return the cached value for ``key``, calling ``fetch()`` to obtain it
+        if it isn't cached or has expired.
+        """
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > _clock():
+                    self.hits += 1
+                    return value
+            self.misses += 1
+
+        value = fetch()
+        if volatile and self.ttl <= 0:
+            return value
+        with self._lock:
+            self._values[key] = (value, _clock() + self.ttl if volatile else None)
+        return value
+
+    def invalidate(self, *keys):
+        """
+        Forget the values of ``keys``.
+        """
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+    def clear(self):
+        """
+        Forget all values.
+        """
+        with self._lock:
+            self._values.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict: ``hits``, ``misses`` and the number of cached values (``size``)
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._values)}
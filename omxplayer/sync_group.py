@@ -0,0 +1,265 @@
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+def corrected_rate(skew, tolerance, max_rate_adjustment, period):
+    """
+    Playback rate that makes up ``skew`` seconds (positive when ahead) over
+    ``period`` seconds, at most ``max_rate_adjustment`` away from normal speed.
+
+    Returns:
+        float: the rate, 1.0 if ``skew`` is within ``tolerance``
+    """
+    if abs(skew) <= tolerance:
+        return 1.0
+    adjustment = max(-max_rate_adjustment, min(max_rate_adjustment, skew / period))
+    return 1.0 - adjustment
+
+
+class SyncGroup(object):
+    """
+    Keeps several players (e.g. the screens of a video wall) playing in step.
+
+    :meth:`preroll` pauses every member at the same position and :meth:`play`
+    then sends ``PlayPause`` to all of them at once: one thread per member is
+    started up front and they are released together, so the start skew doesn't
+    grow with the number of players. While playing, :meth:`correct` (or the
+    thread started by :meth:`start_monitoring`) measures how far each member
+    has drifted from the first one, the leader, and nudges it back with a small
+    rate change, or a seek if it is too far off.
+
+    Args:
+        players (list): :class:`~omxplayer.player.OMXPlayer` instances, each
+                        with its own ``dbus_name``. The first one is the leader.
+        tolerance (float): skew in seconds that is left uncorrected
+        seek_threshold (float): skew in seconds above which a member is seeked
+                                rather than sped up or slowed down
+        max_rate_adjustment (float): largest deviation from normal speed used
+                                     to correct drift
+        interval (float): seconds between corrections when monitoring, rate
+                          adjustments aim to remove the skew over one interval
+
+    >>> group = SyncGroup([left, middle, right])
+    >>> group.preroll()
+    >>> group.play()
+    >>> group.start_monitoring()
+    >>> group.stats()[1]['last']
+    0.0021
+    """
+    def __init__(self, players,
+                 tolerance=0.01,
+                 seek_threshold=0.5,
+                 max_rate_adjustment=0.05,
+                 interval=1.0):
+        if not players:
+            raise ValueError('A SyncGroup needs at least one player')
+        self.players = list(players)
+        self.tolerance = tolerance
+        self.seek_threshold = seek_threshold
+        self.max_rate_adjustment = max_rate_adjustment
+        self.interval = interval
+
+        #: Seconds between the first and the last member being sent
+        #: ``PlayPause`` by the last :meth:`play`
+        self.start_spread = None
+
+        self._lock = threading.RLock()
+        self._rates = [1.0] * len(self.players)
+        self._stats = [{'last': None, 'max': 0.0, 'mean': 0.0, 'samples': 0,
+                        'rate_adjustments': 0, 'seeks': 0}
+                       for _ in self.players]
+        self._stop_monitoring = threading.Event()
+        self._monitor_thread = None
+
+    def preroll(self, position=0.0):
+        """
+        Pause every member at ``position`` seconds, ready for :meth:`play`.
+        """
+        def pause_at(player):
+            player.pause()
+            player.set_position(position)
+
+        with self._lock:
+            self._broadcast(pause_at)
+            self._reset_rates()
+
+    def play(self):
+        """
+        Start every (paused) member at once.
+
+        Returns:
+            float: seconds between the first and the last ``PlayPause`` being sent
+        """
+        with self._lock:
+            calls = self._broadcast(lambda player: player.play_pause())
+            sent = [sent_at for _, sent_at, _ in calls]
+            self.start_spread = max(sent) - min(sent)
+            logger.debug('Started %d players within %.6fs', len(self.players), self.start_spread)
+            return self.start_spread
+
+    def pause(self):
+        """
+        Pause every member at once.
+        """
+        with self._lock:
+            self._broadcast(lambda player: player.pause())
+
+    def measure(self):
+        """
+        Sample every member's position at once.
+
+        Returns:
+            list: each member's skew in seconds relative to the leader,
+                  positive when ahead of it
+        """
+        with self._lock:
+            return [skew for skew, _ in self._measure()]
+
+    def correct(self):
+        """
+        Measure the skew of every member and correct the ones that drifted
+        further than ``tolerance`` from the leader.
+
+        Returns:
+            list: the measured skews, see :meth:`measure`
+        """
+        with self._lock:
+            samples = self._measure()
+            _, (leader_position, leader_sampled_at) = samples[0]
+            for index, (skew, _) in enumerate(samples):
+                if index == 0:
+                    continue
+                player = self.players[index]
+                stats = self._stats[index]
+                if abs(skew) >= self.seek_threshold:
+                    elapsed = (_clock() - leader_sampled_at) * self._rates[0]
+                    player.set_position(leader_position + elapsed)
+                    self._set_rate(index, 1.0)
+                    stats['seeks'] += 1
+                else:
+                    rate = corrected_rate(skew, self.tolerance,
+                                          self.max_rate_adjustment, self.interval)
+                    if rate != 1.0:
+                        stats['rate_adjustments'] += 1
+                    self._set_rate(index, rate)
+            return [skew for skew, _ in samples]
+
+    def stats(self):
+        """
+        Returns:
+            list: per member dicts with the ``last``, ``max`` (absolute) and
+                  ``mean`` (absolute) skew in seconds, the number of
+                  ``samples`` and how many ``rate_adjustments`` and ``seeks``
+                  were made to correct it
+        """
+        with self._lock:
+            return [dict(stats) for stats in self._stats]
+
+    def start_monitoring(self):
+        """
+        Call :meth:`correct` every ``interval`` seconds in a background thread.
+        """
+        with self._lock:
+            if self._monitor_thread is not None:
+                return
+            self._stop_monitoring.clear()
+            self._monitor_thread = threading.Thread(target=self._monitor)
+            self._monitor_thread.daemon = True
+            self._monitor_thread.start()
+
+    def stop_monitoring(self):
+        """
+        Stop the thread started by :meth:`start_monitoring` and return every
+        member to normal speed.
+        """
+        with self._lock:
+            thread, self._monitor_thread = self._monitor_thread, None
+            self._stop_monitoring.set()
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            self._reset_rates()
+
+    def _monitor(self):
+        while not self._stop_monitoring.wait(self.interval):
+            try:
+                self.correct()
+            except Exception:
+                logger.exception('Failed to correct drift')
+
+    def _measure(self):
+        # Returns (skew, (position, sampled_at)) for every member. Positions
+        # are projected to the time the leader was sampled at.
+        def sample(player):
+            before = _clock()
+            position = player.position()
+            return position, (before + _clock()) / 2.0
+
+        samples = [result for result, _, _ in self._broadcast(sample)]
+        leader_position, leader_sampled_at = samples[0]
+        measured = []
+        for index, (position, sampled_at) in enumerate(samples):
+            projected = position + (leader_sampled_at - sampled_at) * self._rates[index]
+            skew = projected - leader_position
+            measured.append((skew, (position, sampled_at)))
+            self._record(index, skew)
+        return measured
+
+    def _record(self, index, skew):
+        stats = self._stats[index]
+        stats['last'] = skew
+        stats['max'] = max(stats['max'], abs(skew))
+        stats['mean'] += (abs(skew) - stats['mean']) / (stats['samples'] + 1)
+        stats['samples'] += 1
+
+    def _set_rate(self, index, rate):
+        if self._rates[index] != rate:
+            self.players[index].set_rate(rate)
+            self._rates[index] = rate
+
+    def _reset_rates(self):
+        for index in range(len(self.players)):
+            self._set_rate(index, 1.0)
+
+    def _broadcast(self, action):
+        # Calls `action(player)` for every member from its own thread. The
+        # threads are all started before any of them is released so the calls
+        # go out as close together as possible.
+        # Returns (result, sent_at, returned_at) for every member.
+        gate = threading.Event()
+        ready = threading.Semaphore(0)
+        results = [None] * len(self.players)
+        errors = []
+
+        def call(index, player):
+            ready.release()
+            gate.wait()
+            sent_at = _clock()
+            try:
+                result = action(player)
+            except Exception as e:
+                errors.append(e)
+                result = None
+            results[index] = (result, sent_at, _clock())
+
+        threads = [threading.Thread(target=call, args=(index, player))
+                   for index, player in enumerate(self.players)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for _ in threads:
+            ready.acquire()
+        gate.set()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        return results
@@ -0,0 +1,262 @@
+"""
+Thread safe access to a player from many threads.
+
+:class:`OMXPlayer <omxplayer.player.OMXPlayer>` isn't safe to call from
+several threads at once. :class:`ThreadSafePlayer` runs every call on one
+:class:`CommandWorker` thread per player, and while a burst of commands is
+queued behind a slow one redundant commands are coalesced: only the last of
+several queued ``set_volume()`` calls is sent, relative ``seek()`` calls are
+summed, and a ``set_position()`` replaces the seeks queued before it. Other
+commands, such as ``load()`` or ``pause()``, are never coalesced and commands
+aren't merged across them, so everything keeps its order relative to them.
+"""
+import collections
+import logging
+import threading
+
+from omxplayer.player import _wait_while_playing
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def _replace(queued, name, args):
+    return name, args
+
+
+def _merge_position(queued, name, args):
+    if name == 'set_position':
+        return name, args
+    # A seek relative to a queued seek or absolute position
+    return queued.name, (queued.args[0] + args[0],)
+
+
+# Method name -> (coalescing key, merge(queued, name, args) -> (name, args)),
+# commands sharing a key replace each other while queued
+COALESCED_COMMANDS = {
+    'set_volume': ('volume', _replace),
+    'mute': ('mute', _replace),
+    'unmute': ('mute', _replace),
+    'set_rate': ('rate', _replace),
+    'set_alpha': ('alpha', _replace),
+    'set_layer': ('layer', _replace),
+    'set_aspect_mode': ('aspect_mode', _replace),
+    'set_video_pos': ('video_pos', _replace),
+    'set_video_crop': ('video_crop', _replace),
+    'hide_video': ('video', _replace),
+    'show_video': ('video', _replace),
+    'hide_subtitles': ('subtitles', _replace),
+    'show_subtitles': ('subtitles', _replace),
+    'seek': ('position', _merge_position),
+    'set_position': ('position', _merge_position),
+}
+
+# Methods which block until something else happens to the player, running
+# them on the worker would stop it from running the commands they wait for
+_BLOCKING_METHODS = {'wait', 'play_sync'}
+
+
+class CommandWorkerClosedError(Exception):
+    """ Raised when submitting a command to a closed :class:`CommandWorker`
+    """
+    pass
+
+
+class PendingCommand(object):
+    """
+    A command queued on a :class:`CommandWorker`. Commands coalesced together
+    share one ``PendingCommand`` and so the result of the call that was made.
+    """
+    def __init__(self, name, args, key=None):
+        self.name = name
+        self.args = args
+        self.key = key
+        self._done = threading.Event()
+        self._result = None
+        self._exception = None
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """
+        Wait for the command to run.
+
+        Returns:
+            the value returned by the player's method
+
+        Raises:
+            Exception: whatever the player's method raised
+            RuntimeError: if the command hasn't run after ``timeout`` seconds
+        """
+        if not self._done.wait(timeout):
+            raise RuntimeError('%s did not run within %s seconds' % (self.name, timeout))
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def _run(self, target):
+        try:
+            self._result = getattr(target, self.name)(*self.args)
+        except Exception as e:
+            logger.debug('%s%r failed: %r', self.name, self.args, e)
+            self._exception = e
+        finally:
+            self._done.set()
+
+
+class CommandWorker(object):
+    """
+    Runs the methods of ``target`` one at a time on a single daemon thread,
+    coalescing redundant commands while they are queued (see
+    :data:`COALESCED_COMMANDS`).
+
+    Args:
+        target: object whose methods are called, usually an ``OMXPlayer``
+
+    Attributes:
+        coalesced (int): number of commands merged into a queued one
+    """
+    def __init__(self, target):
+        self._target = target
+        self._condition = threading.Condition()
+        self._queue = collections.deque()
+        # coalescing key -> queued command
+        self._queued_by_key = {}
+        self._closed = False
+        self.coalesced = 0
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, name, *args):
+        """
+        Queue a call of ``target.name(*args)``.
+
+        Returns:
+            PendingCommand: the queued command, possibly one submitted earlier
+                            which this call was coalesced into
+        """
+        key, merge = COALESCED_COMMANDS.get(name, (None, None))
+        with self._condition:
+            if self._closed:
+                raise CommandWorkerClosedError('Cannot run %s, the worker is closed' % name)
+            queued = self._queued_by_key.get(key)
+            if queued is not None:
+                queued.name, queued.args = merge(queued, name, args)
+                self.coalesced += 1
+                return queued
+            command = PendingCommand(name, args, key)
+            if key is not None:
+                self._queued_by_key[key] = command
+            else:
+                # Commands queued before this one must run before it, only
+                # those queued after it can be merged with later ones
+                self._queued_by_key.clear()
+            self._queue.append(command)
+            self._condition.notify()
+            return command
+
+    def call(self, name, *args):
+        """
+        Run ``target.name(*args)`` on the worker and wait for its result. Calls
+        made from the worker thread itself, e.g. from an event callback, run
+        straight away.
+        """
+        if threading.current_thread() is self._thread:
+            return getattr(self._target, name)(*args)
+        return self.submit(name, *args).result()
+
+    def close(self, timeout=None):
+        """
+        Stop accepting commands and wait up to ``timeout`` seconds for the
+        queued ones to run.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                command = self._queue.popleft()
+                if self._queued_by_key.get(command.key) is command:
+                    del self._queued_by_key[command.key]
+            command._run(self._target)
+
+
+class ThreadSafePlayer(object):
+    """
+    Wraps a player so that it can be used from any number of threads: its
+    methods, including ``load()`` and ``quit()``, are run one at a time by a
+    :class:`CommandWorker` and block until done. Everything else, such as
+    events and ``wait()``, is the wrapped player's.
+
+    Args:
+        player (OMXPlayer): the player to wrap
+
+    >>> player = ThreadSafePlayer(OMXPlayer('path.mp4'))
+    >>> player.set_volume(2)  # From any thread
+    >>> player.submit('seek', 5)  # Without waiting
+    """
+    def __init__(self, player):
+        self.player = player
+        self.worker = CommandWorker(player)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.player, name)
+        is_method = callable(getattr(type(self.player), name, None))
+        if name.startswith('_') or name in _BLOCKING_METHODS or not is_method:
+            return attribute
+
+        def call(*args):
+            return self.worker.call(name, *args)
+        call.__name__ = name
+        call.__doc__ = attribute.__doc__
+        return call
+
+    def submit(self, name, *args):
+        """
+        Queue a call of ``player.name(*args)`` without waiting for it.
+
+        Returns:
+            PendingCommand: call ``result()`` on it to wait for the command
+        """
+        return self.worker.submit(name, *args)
+
+    def play_sync(self):
+        """
+        Play the video and block whilst the video is playing, see
+        :meth:`OMXPlayer.play_sync <omxplayer.player.OMXPlayer.play_sync>`
+        """
+        stopped = threading.Event()
+
+        def on_stopped(player, *args):
+            stopped.set()
+
+        events = [self.player.pauseEvent, self.player.stopEvent, self.player.exitEvent]
+        for event in events:
+            event += on_stopped
+        try:
+            self.play()
+            _wait_while_playing(stopped, self.is_playing)
+        finally:
+            for event in events:
+                event -= on_stopped
+
+    def close(self, timeout=None):
+        """
+        Quit the player and stop the worker.
+        """
+        try:
+            self.quit()
+        finally:
+            self.worker.close(timeout)
@@ -0,0 +1,199 @@
+"""
+What the player needs from a DBus binding, independent of which one is used.
+
+Two transports implement the same connection interface (``root_interface``,
+``player_interface``, ``properties_interface``, :meth:`send`,
+``verify_name_owner`` and ``close``):
+
+* ``dbus-python``: :class:`~omxplayer.dbus_connection.DBusConnection`, the
+  default when ``dbus-python`` is installed
+* ``jeepney``: :class:`~omxplayer.jeepney_connection.JeepneyConnection`, pure
+  Python, speaking the DBus wire protocol over a socket itself, used when
+  ``dbus-python`` isn't installed
+
+Pick one explicitly by passing ``Connection=connection_class('jeepney')`` to
+:class:`~omxplayer.player.OMXPlayer` or
+:class:`~omxplayer.aio.AsyncOMXPlayer`.
+
+This module also provides the DBus value types and ``DBusException`` the
+player uses: ``dbus-python``'s when it is installed, otherwise builtin based
+equivalents the jeepney transport understands. On Python 3.7+ they, and
+``dbus-python`` with them, are only imported when first used, so importing the
+player doesn't load ``dbus-python`` until it connects.
+"""
+import os
+import sys
+import threading
+
+
+#: Names accepted by :func:`connection_class`
+BACKENDS = ('dbus-python', 'jeepney')
+
+#: Most calls sent with ``send()`` awaiting a reply at once
+MAX_IN_FLIGHT = 64
+
+OBJECT_PATH = '/org/mpris/MediaPlayer2'
+
+# Names provided by omxplayer._dbus_types
+_DBUS_TYPE_NAMES = (
+    'DBusException', 'Boolean', 'Double', 'Int32', 'Int64', 'ObjectPath', 'String',
+    'Dictionary', 'DBUS_SCALAR_CONVERTERS', 'DBUS_ARRAY', 'DBUS_DICTIONARY',
+)
+
+
+def __getattr__(name):
+    # PEP 562, only called for names not defined yet
+    if name in _DBUS_TYPE_NAMES:
+        from omxplayer import _dbus_types
+        value = getattr(_dbus_types, name)
+        globals()[name] = value
+        return value
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+if sys.version_info < (3, 7):
+    from omxplayer._dbus_types import DBusException, Boolean, Double, Int32, Int64, \
+                                      ObjectPath, String, Dictionary, \
+                                      DBUS_SCALAR_CONVERTERS, DBUS_ARRAY, DBUS_DICTIONARY
+
+
+class DBusConnectionError(Exception):
+    """ Connection error raised when DBusConnection can't set up a connection
+    """
+    pass
+
+
+class BaseConnection(object):
+    """
+    What both transports share. Subclasses set ``_dbus_name`` and implement
+    ``name_owner_pid()``.
+    """
+    def verify_name_owner(self, process_group):
+        """
+        Check the player's name is owned by a process in ``process_group``,
+        rather than by an omxplayer which is still exiting or was started by
+        someone else with the same ``dbus_name``.
+
+        Raises:
+            DBusConnectionError: if the name isn't owned by ``process_group``
+        """
+        owner = self.name_owner_pid()
+        try:
+            owner_group = os.getpgid(owner)
+        except OSError:
+            raise DBusConnectionError('Owner %d of %s has exited' % (owner, self._dbus_name))
+        if owner_group != process_group:
+            raise DBusConnectionError('%s is owned by process %d in group %d, not group %d'
+                                      % (self._dbus_name, owner, owner_group, process_group))
+
+
+def connection_class(backend=None):
+    """
+    Args:
+        backend (str): one of :data:`BACKENDS`, ``None`` picks ``dbus-python``
+                       if it is installed and ``jeepney`` otherwise
+
+    Returns:
+        class: the connection class of ``backend``
+    """
+    if backend is None:
+        backend = 'dbus-python' if _dbus_python_installed() else 'jeepney'
+    if backend == 'dbus-python':
+        from omxplayer.dbus_connection import DBusConnection
+        return DBusConnection
+    if backend == 'jeepney':
+        from omxplayer.jeepney_connection import JeepneyConnection
+        return JeepneyConnection
+    raise ValueError('Unknown DBus backend %r, expected one of %s' % (backend, ', '.join(BACKENDS)))
+
+
+def _dbus_python_installed():
+    try:
+        from importlib.util import find_spec
+    except ImportError:  # python2
+        from omxplayer import _dbus_types
+        return _dbus_types.dbus is not None
+    return find_spec('dbus') is not None
+
+
+class PendingReply(object):
+    """
+    The reply to a method call sent with a connection's ``send()``.
+
+    Args:
+        member (str): name of the method called
+        error_handler (callable): called as ``error_handler(exception)`` from
+                                  the thread receiving replies if the call fails
+    """
+    def __init__(self, member, error_handler=None):
+        self.member = member
+        self._error_handler = error_handler
+        self._done = threading.Event()
+        self._result = None
+        self._exception = None
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Returns:
+            bool: whether the reply arrived within ``timeout`` seconds
+        """
+        return self._done.wait(timeout)
+
+    def result(self, timeout=None):
+        """
+        Wait for the reply.
+
+        Returns:
+            the value returned by the method, a tuple if it returned several
+
+        Raises:
+            DBusException: if the call failed
+            RuntimeError: if there is no reply after ``timeout`` seconds
+        """
+        if not self.wait(timeout):
+            raise RuntimeError('No reply to %s within %s seconds' % (self.member, timeout))
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def _set_result(self, args):
+        if len(args) == 1:
+            self._result = args[0]
+        elif args:
+            self._result = tuple(args)
+        self._done.set()
+
+    def _set_exception(self, exception):
+        self._exception = exception
+        self._done.set()
+        if self._error_handler is not None:
+            self._error_handler(exception)
+
+
+class InstrumentedInterface(object):
+    """
+    Wraps a transport's interface recording the latency and errors of every
+    call as ``dbus`` calls of an
+    :class:`~omxplayer.instrumentation.Instrumentation`. Property accesses are
+    recorded as ``Get.<Property>`` and ``Set.<Property>``.
+    """
+    def __init__(self, interface, instrumentation):
+        self._interface = interface
+        self._instrumentation = instrumentation
+        self.dbus_interface = interface.dbus_interface
+
+    def __getattr__(self, member):
+        method = getattr(self._interface, member)
+        instrumentation = self._instrumentation
+
+        def call(*args, **kwargs):
+            name = member
+            if member in ('Get', 'Set') and len(args) >= 2:
+                name = '%s.%s' % (member, args[1])
+            with instrumentation.time('dbus', name):
+                return method(*args, **kwargs)
+
+        return call
@@ -10,19 +10,28 @@ with open(os.path.join(here, 'omxplayer', '__version__.py'), 'r') as f:
 with open(os.path.join(here, 'README.rst'), 'r') as f:
     long_description = f.read()
 
+# A bare install talks to omxplayer through the pure Python jeepney, the
+# 'dbus' extra adds dbus-python which is used instead when installed. jeepney
+# needs Python 3.5+, so older Pythons still get dbus-python.
 lib_deps = [
-    'dbus-python',
     'evento',
-    'decorator',
     'pathlib2',
+    'jeepney; python_version >= "3.5"',
+    'dbus-python; python_version < "3.5"',
 ],
 
 test_deps = [
+    'dbus-python',
     'mock',
     'pytest',
     'pytest-cov',
     'nose',
     'parameterized',
+    'pytest-benchmark',
+    # The wrappers replaced in benchmarks/test_wrapper_overhead.py
+    'decorator',
+    # Used by the fake omxplayer in tests/bin
+    'jeepney; python_version >= "3.5"',
 ]
 
 doc_deps = [
@@ -72,6 +81,10 @@ setup(
     install_requires=lib_deps,
     extras_require={
         'test': test_deps,
-        'docs': doc_deps
+        'docs': doc_deps,
+        'dbus': ['dbus-python'],
+        # Kept for those who installed the jeepney backend before it was the
+        # default
+        'jeepney': ['jeepney; python_version >= "3.5"'],
     }
 )
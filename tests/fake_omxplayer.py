@@ -0,0 +1,30 @@
+"""
+Helpers for running the library against the fake omxplayer in tests/bin.
+"""
+import os
+import unittest
+
+try:
+    from shutil import which
+except ImportError:
+    from distutils.spawn import find_executable as which
+
+FAKE_BIN_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), 'bin'))
+MEDIA_FILE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                               'media', 'test_media_1_second.mp4'))
+
+
+def use_fake_omxplayer():
+    """
+    Put the fake omxplayer first on PATH, skipping the calling test if it
+    can't run here.
+    """
+    if not which('dbus-daemon'):
+        raise unittest.SkipTest('dbus-daemon is not installed')
+    try:
+        import jeepney  # noqa: F401
+    except ImportError:
+        raise unittest.SkipTest('The fake omxplayer needs jeepney')
+    path = os.environ.get('PATH', '')
+    if not path.startswith(FAKE_BIN_DIRECTORY + os.pathsep):
+        os.environ['PATH'] = FAKE_BIN_DIRECTORY + os.pathsep + path
@@ -0,0 +1,102 @@
+import threading
+import time
+
+from evento import Event
+
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class FakePlayer(object):
+    """
+    In-process stand-in for :class:`~omxplayer.player.OMXPlayer` whose
+    position advances with the monotonic clock.
+
+    Args:
+        position (float): starting position in seconds
+        playing (bool): whether the player starts playing
+        speed_error (float): relative error of the player's own clock, e.g.
+                             0.001 plays 0.1% too fast
+        duration (float): length of the media in seconds, 0 if unknown
+    """
+    def __init__(self, position=0.0, playing=True, speed_error=0.0, duration=0.0):
+        self.pauseEvent = Event()
+        self.playEvent = Event()
+        self.stopEvent = Event()
+        self.exitEvent = Event()
+        self.seekEvent = Event()
+        self.positionEvent = Event()
+        self.rateEvent = Event()
+
+        self.speed_error = speed_error
+        self._duration = duration
+        self._lock = threading.Lock()
+        self._position = position
+        self._anchor = _clock()
+        self._rate = 1.0
+        self._playing = playing
+
+    def _rebase(self):
+        # Must hold the lock
+        self._position = self._current_position()
+        self._anchor = _clock()
+
+    def _current_position(self):
+        if not self._playing:
+            return self._position
+        elapsed = _clock() - self._anchor
+        return self._position + elapsed * self._rate * (1 + self.speed_error)
+
+    def position(self):
+        with self._lock:
+            return self._current_position()
+
+    def set_position(self, position):
+        with self._lock:
+            self._position = position
+            self._anchor = _clock()
+        self.positionEvent(self, position)
+
+    def seek(self, relative_position):
+        with self._lock:
+            self._rebase()
+            self._position += relative_position
+        self.seekEvent(self, relative_position)
+
+    def rate(self):
+        return self._rate
+
+    def duration(self):
+        return self._duration
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._rebase()
+            self._rate = rate
+        self.rateEvent(self, rate)
+        return rate
+
+    def playback_status(self):
+        return 'Playing' if self._playing else 'Paused'
+
+    def is_playing(self):
+        return self._playing
+
+    def play(self):
+        if not self._playing:
+            self.play_pause()
+
+    def pause(self):
+        with self._lock:
+            self._rebase()
+            self._playing = False
+        self.pauseEvent(self)
+
+    def play_pause(self):
+        with self._lock:
+            self._rebase()
+            self._playing = not self._playing
+        if self._playing:
+            self.playEvent(self)
+        else:
+            self.pauseEvent(self)
@@ -0,0 +1,130 @@
+"""
+Runs `OMXPlayer` end-to-end against the fake omxplayer in tests/bin, which
+needs `dbus-daemon` and jeepney but no Raspberry Pi.
+
+    pytest tests/integration/test_fake_omxplayer.py
+"""
+import os
+import unittest
+
+from jeepney import HeaderFields
+from mock import Mock
+
+from omxplayer import OMXPlayer
+from omxplayer.dbus_daemon import DBusDaemon
+from omxplayer.launcher import BinaryLauncher
+from omxplayer.transport import connection_class
+from tests.fake_omxplayer import use_fake_omxplayer, FAKE_BIN_DIRECTORY, MEDIA_FILE_PATH
+
+
+class FakeOMXPlayerTests(unittest.TestCase):
+    def setUp(self):
+        use_fake_omxplayer()
+        self.player = OMXPlayer(MEDIA_FILE_PATH, dbus_name='org.mpris.MediaPlayer2.omxplayer.fake')
+
+    def tearDown(self):
+        self.player.quit()
+
+    def test_properties(self):
+        self.assertTrue(self.player.can_quit())
+        self.assertEqual('OMXPlayer', self.player.identity())
+        self.assertAlmostEqual(2.022, self.player.duration(), places=3)
+        self.assertEqual((1280, 720), (self.player.width(), self.player.height()))
+
+    def test_pause_and_set_position(self):
+        self.player.pause()
+        self.player.set_position(1.0)
+
+        self.assertEqual('Paused', self.player.playback_status())
+        self.assertAlmostEqual(1.0, self.player.position(), places=2)
+
+    def test_set_rate(self):
+        self.assertEqual(2.0, self.player.set_rate(2.0))
+
+    def test_set_volume(self):
+        self.player.set_volume(0.5)
+
+        self.assertAlmostEqual(0.5, self.player.volume())
+
+    def test_set_volume_as_double_or_variant(self):
+        player = OMXPlayer(MEDIA_FILE_PATH, Connection=connection_class('jeepney'),
+                           dbus_name='org.mpris.MediaPlayer2.omxplayer.fake2')
+        self.addCleanup(player.quit)
+
+        for signature, volume in [('ssd', 0.5), ('ssv', 0.25)]:
+            player._connection.call('org.freedesktop.DBus.Properties', 'Set',
+                                    ('org.mpris.MediaPlayer2.Player', 'Volume', volume),
+                                    signature=signature)
+            self.assertAlmostEqual(volume, player.volume())
+
+    def test_pipeline_sends_same_messages_as_blocking_calls(self):
+        player = OMXPlayer(MEDIA_FILE_PATH, Connection=connection_class('jeepney'),
+                           dbus_name='org.mpris.MediaPlayer2.omxplayer.fake2')
+        self.addCleanup(player.quit)
+        bus = player._connection._connection
+        bus.send = Mock(wraps=bus.send)
+
+        player.set_volume(0.5)
+        player.pipeline.set_volume(0.25)
+        self.assertTrue(player.pipeline.flush(5))
+
+        blocking, pipelined = [call[0][0] for call in bus.send.call_args_list]
+        self.assertEqual(blocking.header.fields[HeaderFields.signature],
+                         pipelined.header.fields[HeaderFields.signature])
+        self.assertEqual(0, player.pipeline.errors)
+        self.assertAlmostEqual(0.25, player.volume())
+
+    def test_refresh_is_a_flag(self):
+        player = OMXPlayer(MEDIA_FILE_PATH, args=['-r'],
+                           dbus_name='org.mpris.MediaPlayer2.omxplayer.fake2')
+        self.addCleanup(player.quit)
+
+        self.assertAlmostEqual(2.022, player.duration(), places=3)
+
+    def test_snapshot_falls_back_to_get(self):
+        state = self.player.snapshot()
+
+        self.assertEqual('Playing', state.playback_status)
+
+    def test_exit_event_on_video_end(self):
+        exit_fn = Mock()
+        self.player.exitEvent += exit_fn
+        self.player.set_position(1.9)
+
+        self.player._process_monitor.join(5)
+
+        exit_fn.assert_called_once_with(self.player, 0)
+
+    def test_exit_event_on_quit(self):
+        exit_fn = Mock()
+        self.player.exitEvent += exit_fn
+
+        self.player.quit()
+
+        exit_fn.assert_called_once_with(self.player, -15)
+
+    def test_load(self):
+        self.player.load(MEDIA_FILE_PATH, pause=True)
+
+        self.assertEqual('Paused', self.player.playback_status())
+
+    def test_binary_launcher(self):
+        # The bus the player in setUp started through the script is reused
+        launcher = BinaryLauncher(os.path.join(FAKE_BIN_DIRECTORY, 'omxplayer.bin'),
+                                  use_posix_spawn=True)
+        player = OMXPlayer(MEDIA_FILE_PATH, launcher=launcher,
+                           dbus_name='org.mpris.MediaPlayer2.omxplayer.fake2')
+        self.addCleanup(player.quit)
+
+        self.assertEqual('OMXPlayer', player.identity())
+
+    def test_private_dbus_daemon(self):
+        daemon = DBusDaemon()
+        self.addCleanup(daemon.close)
+        player = OMXPlayer(MEDIA_FILE_PATH, dbus_name='org.mpris.MediaPlayer2.omxplayer.fake2',
+                           **daemon.player_kwargs(
+                               executable=os.path.join(FAKE_BIN_DIRECTORY, 'omxplayer.bin')))
+        self.addCleanup(player.quit)
+
+        # Connected through the daemon's address, so omxplayer.bin is on its bus
+        self.assertEqual('OMXPlayer', player.identity())
@@ -0,0 +1,167 @@
+import unittest
+import os
+import shutil
+import signal
+import sys
+import tempfile
+
+if sys.version_info < (3, 5):
+    raise unittest.SkipTest('asyncio client requires Python 3.5+')
+
+import asyncio
+import dbus
+
+from mock import patch, Mock
+
+from omxplayer.aio import AsyncOMXPlayer, AsyncBusFinder
+from omxplayer.player import OMXPlayerDeadError
+
+
+class AsyncBusFinderTests(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'omxplayerdbus.test')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        self.loop.close()
+
+    def write_address(self):
+        with open(self.path, 'w') as f:
+            f.write('EXAMPLE_ADDRESS')
+
+    def get_address(self, **kwargs):
+        bus_finder = AsyncBusFinder(path=self.path, timeout=5, **kwargs)
+        self.loop.call_later(0.05, self.write_address)
+        return self.loop.run_until_complete(bus_finder.get_address())
+
+    def test_wakes_when_file_is_written(self):
+        self.assertEqual('EXAMPLE_ADDRESS', self.get_address())
+
+    def test_wakes_when_file_is_written_without_inotify(self):
+        self.assertEqual('EXAMPLE_ADDRESS', self.get_address(use_inotify=False))
+
+
+@patch('os.getpgid', Mock(return_value=1234))
+@patch('os.killpg')
+@patch('asyncio.create_subprocess_exec', new_callable=Mock)
+class AsyncOMXPlayerTests(unittest.TestCase):
+    TEST_FILE_NAME = './test.mp4'
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.exit_status = self.loop.create_future()
+        self.process = Mock(pid=1234, returncode=None)
+        self.process.wait = Mock(return_value=self.exit_status)
+        self.Connection = Mock()
+
+    def tearDown(self):
+        if not self.exit_status.done():
+            self.exit_process()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+
+    def resolved(self, value):
+        future = self.loop.create_future()
+        future.set_result(value)
+        return future
+
+    def run_until_complete(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def create_player(self, create_subprocess_exec, **kwargs):
+        create_subprocess_exec.return_value = self.resolved(self.process)
+        bus_address_finder = Mock()
+        bus_address_finder.get_address = Mock(side_effect=lambda: self.resolved('example_bus_address'))
+        return self.run_until_complete(AsyncOMXPlayer.create(self.TEST_FILE_NAME,
+                                              bus_address_finder=bus_address_finder,
+                                              Connection=self.Connection,
+                                              **kwargs))
+
+    def exit_process(self, status=0):
+        self.process.returncode = status
+        self.exit_status.set_result(status)
+
+    def test_spawns_omxplayer_in_new_session(self, create_subprocess_exec, *args):
+        self.create_player(create_subprocess_exec, args=['--no-osd'])
+
+        create_subprocess_exec.assert_called_once_with(
+            'omxplayer', '--no-osd', './test.mp4',
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            env=None,
+            start_new_session=True)
+
+    def test_connects_to_player(self, create_subprocess_exec, *args):
+        self.create_player(create_subprocess_exec, dbus_name='org.mpris.MediaPlayer2.omxplayer2')
+
+        self.Connection.assert_called_once_with('example_bus_address',
+                                                'org.mpris.MediaPlayer2.omxplayer2')
+
+    def test_verifies_omxplayer_owns_dbus_name(self, create_subprocess_exec, *args):
+        self.create_player(create_subprocess_exec)
+
+        self.Connection.return_value.verify_name_owner.assert_called_once_with(1234)
+
+    def test_accepts_connection_without_name_owner_check_or_close(self, create_subprocess_exec,
+                                                                  killpg, *args):
+        self.Connection.return_value = Mock(spec=['root_interface', 'player_interface',
+                                                  'properties_interface'])
+        player = self.create_player(create_subprocess_exec)
+        killpg.side_effect = lambda *args: self.exit_process(-signal.SIGTERM)
+
+        self.run_until_complete(player.quit())
+
+    def test_player_method(self, create_subprocess_exec, *args):
+        player = self.create_player(create_subprocess_exec)
+        callback = Mock()
+        player.pauseEvent += callback
+
+        self.run_until_complete(player.pause())
+
+        self.Connection.return_value.player_interface.Pause.assert_called_once_with()
+        callback.assert_called_once_with(player)
+
+    def test_seek(self, create_subprocess_exec, *args):
+        player = self.create_player(create_subprocess_exec)
+
+        self.run_until_complete(player.seek(100))
+
+        self.Connection.return_value.player_interface.Seek.assert_called_once_with(
+            dbus.Int64(100 * 1e6))
+
+    def test_property_is_converted(self, create_subprocess_exec, *args):
+        player = self.create_player(create_subprocess_exec)
+        properties_interface = self.Connection.return_value.properties_interface
+        properties_interface.Get.return_value = dbus.Int64(1500000)
+
+        self.assertEqual(1.5, self.run_until_complete(player.position()))
+
+    def test_wait_until_finished(self, create_subprocess_exec, *args):
+        player = self.create_player(create_subprocess_exec)
+        callback = Mock()
+        player.exitEvent += callback
+
+        self.loop.call_soon(self.exit_process, 3)
+        exit_status = self.run_until_complete(player.wait_until_finished())
+
+        self.assertEqual(3, exit_status)
+        callback.assert_called_once_with(player, 3)
+
+    def test_raises_when_process_is_dead(self, create_subprocess_exec, *args):
+        player = self.create_player(create_subprocess_exec)
+        self.exit_process()
+
+        with self.assertRaises(OMXPlayerDeadError):
+            self.run_until_complete(player.pause())
+
+    def test_quit_kills_process_group(self, create_subprocess_exec, killpg, *args):
+        player = self.create_player(create_subprocess_exec)
+        killpg.side_effect = lambda *args: self.exit_process(-signal.SIGTERM)
+
+        self.run_until_complete(player.quit())
+
+        killpg.assert_called_once_with(1234, signal.SIGTERM)
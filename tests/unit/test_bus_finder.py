@@ -1,5 +1,10 @@
 import unittest
+import os
+import shutil
 import sys
+import tempfile
+import threading
+import time
 
 try: # python 2
     from mock import patch, mock_open, Mock
@@ -10,7 +15,8 @@ if sys.version_info[0] == 2:
     builtin = '__builtin__'
 else:
     builtin = 'builtins'
-from omxplayer.bus_finder import BusFinder
+from omxplayer.bus_finder import BusFinder, BusFinderTimeoutError, FixedBusFinder, \
+                                 user_address_file
 
 # CONSTANTS
 EXAMPLE_DBUS_FILE_CONTENTS = 'EXAMPLE_CONTENTS'
@@ -45,3 +51,68 @@ class BusFinderTests(unittest.TestCase):
     def get_address(self):
         bus_finder = BusFinder(path=self.dbus_file_path)
         return bus_finder.get_address()
+
+
+class UserAddressFileTests(unittest.TestCase):
+    def test_named_after_user(self):
+        self.assertEqual('/tmp/omxplayerdbus.pi', user_address_file('pi'))
+
+    @patch.dict('os.environ', {'USER': 'pi'})
+    def test_defaults_to_current_user(self):
+        self.assertEqual('/tmp/omxplayerdbus.pi', user_address_file())
+
+    @patch.dict('os.environ', clear=True)
+    def test_defaults_to_root_like_omxplayer(self):
+        self.assertEqual('/tmp/omxplayerdbus.root', user_address_file())
+
+    def test_finder_for_user(self):
+        self.assertEqual('/tmp/omxplayerdbus.pi', BusFinder.for_user('pi').path)
+
+
+class BusFinderWaitTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'omxplayerdbus.test')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_address_later(self, delay=0.05):
+        def write():
+            time.sleep(delay)
+            with open(self.path, 'w') as f:
+                f.write(EXAMPLE_DBUS_FILE_CONTENTS)
+        writer = threading.Thread(target=write)
+        writer.start()
+        self.addCleanup(writer.join)
+
+    def test_wakes_when_file_is_written(self):
+        self.write_address_later()
+        bus_finder = BusFinder(path=self.path, timeout=5)
+        self.assertEqual(EXAMPLE_DBUS_FILE_CONTENTS, bus_finder.get_address())
+
+    def test_wakes_when_file_is_written_without_inotify(self):
+        self.write_address_later()
+        bus_finder = BusFinder(path=self.path, timeout=5, use_inotify=False)
+        self.assertEqual(EXAMPLE_DBUS_FILE_CONTENTS, bus_finder.get_address())
+
+    def test_records_latency(self):
+        self.write_address_later()
+        bus_finder = BusFinder(path=self.path, timeout=5)
+        bus_finder.get_address()
+        self.assertGreater(bus_finder.latency, 0)
+
+    def test_raises_after_timeout(self):
+        bus_finder = BusFinder(path=self.path, timeout=0.05)
+        with self.assertRaises(BusFinderTimeoutError):
+            bus_finder.get_address()
+
+
+class FixedBusFinderTests(unittest.TestCase):
+    @patch('os.path')
+    def test_returns_address_without_reading_files(self, mock_os_path):
+        bus_finder = FixedBusFinder('unix:abstract=/tmp/dbus-EXAMPLE', pid=4321)
+
+        self.assertEqual('unix:abstract=/tmp/dbus-EXAMPLE', bus_finder.get_address())
+        self.assertEqual(0.0, bus_finder.latency)
+        self.assertEqual([], mock_os_path.mock_calls)
@@ -0,0 +1,185 @@
+import threading
+import unittest
+
+from evento import Event
+from mock import Mock
+
+from omxplayer.cues import CueScheduler
+from omxplayer.player import OMXPlayerDeadError
+
+
+class CueSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.player = Mock()
+        for event in ['seekEvent', 'positionEvent', 'playEvent', 'pauseEvent',
+                      'stopEvent', 'rateEvent', 'exitEvent']:
+            setattr(self.player, event, Event())
+        self.tracker = Mock()
+        self.tracker.position.return_value = 0.0
+        self.tracker.is_playing.return_value = True
+        self.tracker.rate.return_value = 1.0
+        self.scheduler = CueScheduler(self.player, tracker=self.tracker)
+        self.fired = []
+        self.fired_event = threading.Event()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def callback(self, player, timestamp):
+        self.fired.append(timestamp)
+        self.fired_event.set()
+
+    def wait_for_thread_to_stop(self):
+        thread = self.scheduler._thread
+        if thread is not None:
+            thread.join(2)
+        self.assertIsNone(self.scheduler._thread)
+
+    def wait_for_cue(self):
+        self.assertTrue(self.fired_event.wait(2))
+        self.fired_event.clear()
+
+    def play_to(self, position):
+        self.tracker.is_playing.return_value = True
+        self.tracker.position.return_value = position
+        self.player.playEvent(self.player)
+
+    def test_fires_due_cues_in_order(self):
+        self.tracker.is_playing.return_value = False
+        self.scheduler.add(0.2, self.callback)
+        self.scheduler.add(0.1, self.callback)
+        self.scheduler.add(0.0, self.callback)
+        self.play_to(0.5)
+        self.wait_for_cue()
+        while len(self.fired) < 3:
+            self.wait_for_cue()
+
+        self.assertEqual([0.0, 0.1, 0.2], self.fired)
+
+    def test_fires_when_position_is_reached(self):
+        self.scheduler.add(0.05, self.callback)
+        self.tracker.position.return_value = 0.05
+
+        self.wait_for_cue()
+        self.assertEqual([0.05], self.fired)
+
+    def test_does_not_fire_cues_before_position(self):
+        self.tracker.position.return_value = 5.0
+        self.scheduler.add(1.0, self.callback)
+        self.scheduler.add(5.0, self.callback)
+
+        self.wait_for_cue()
+        self.assertFalse(self.fired_event.wait(0.1))
+        self.assertEqual([5.0], self.fired)
+
+    def test_refires_after_seeking_back(self):
+        self.tracker.position.return_value = 2.0
+        self.scheduler.add(2.0, self.callback)
+        self.wait_for_cue()
+
+        self.tracker.position.return_value = 1.95
+        self.player.seekEvent(self.player, -0.05)
+        self.tracker.position.return_value = 2.0
+
+        self.wait_for_cue()
+        self.assertEqual([2.0, 2.0], self.fired)
+
+    def test_waits_while_paused(self):
+        self.tracker.is_playing.return_value = False
+        self.scheduler.add(1.0, self.callback)
+        self.assertFalse(self.fired_event.wait(0.1))
+
+        self.play_to(1.0)
+
+        self.wait_for_cue()
+
+    def test_records_jitter(self):
+        self.tracker.is_playing.return_value = False
+        self.scheduler.add(1.0, self.callback)
+        self.play_to(1.5)
+        self.wait_for_cue()
+
+        self.assertEqual({'count': 1, 'mean': 0.5, 'min': 0.5, 'max': 0.5},
+                         self.scheduler.jitter())
+
+    def test_callback_errors_do_not_stop_scheduler(self):
+        self.tracker.is_playing.return_value = False
+        self.scheduler.add(0.5, Mock(side_effect=RuntimeError))
+        self.scheduler.add(1.0, self.callback)
+        self.play_to(1.0)
+
+        self.wait_for_cue()
+        self.assertEqual([1.0], self.fired)
+
+    def test_accepts_initial_cues(self):
+        self.scheduler.stop()
+        self.tracker.position.return_value = 1.0
+        self.scheduler = CueScheduler(self.player, [(1.0, self.callback)],
+                                      tracker=self.tracker)
+
+        self.wait_for_cue()
+        self.assertEqual([(1.0, self.callback)], self.scheduler.cues())
+
+    def test_stops_when_player_exits(self):
+        self.tracker.is_playing.return_value = False
+        self.scheduler.add(1.0, self.callback)
+
+        self.player.exitEvent(self.player, 0)
+
+        self.wait_for_thread_to_stop()
+
+    def test_stops_when_player_is_dead(self):
+        self.tracker.position.side_effect = [0.0, OMXPlayerDeadError]
+        self.scheduler.add(1.0, self.callback)
+
+        self.wait_for_thread_to_stop()
+        self.assertEqual(2, self.tracker.position.call_count)
+
+    def test_restarts_after_load(self):
+        self.tracker.position.return_value = 2.0
+        self.scheduler.add(1.0, self.callback)
+        self.player.exitEvent(self.player, 0)
+        self.wait_for_thread_to_stop()
+
+        self.tracker.position.return_value = 1.0
+        self.scheduler.restart()
+
+        self.wait_for_cue()
+        self.assertEqual([1.0], self.fired)
+
+    def test_does_not_fire_if_paused_without_event(self):
+        # Paused through action() or the keyboard: only a new sample shows it
+        def sync():
+            self.tracker.position.return_value = 0.5
+            self.tracker.is_playing.return_value = False
+        self.tracker.sync.side_effect = sync
+        self.scheduler.add(1.0, self.callback)
+
+        self.tracker.position.return_value = 1.0
+        self.player.rateEvent(self.player, 1.0)
+
+        self.assertFalse(self.fired_event.wait(0.1))
+        self.tracker.sync.assert_called_once_with()
+
+    def test_samples_position_without_holding_lock(self):
+        locked = []
+
+        def position():
+            # Acquired from another thread, the condition's lock is reentrant
+            thread = threading.Thread(target=lambda: locked.append(self.try_lock()))
+            thread.start()
+            thread.join()
+            return 0.0
+        self.tracker.position.side_effect = position
+        self.scheduler.add(1.0, self.callback)
+        self.player.rateEvent(self.player, 1.0)
+
+        self.assertFalse(self.fired_event.wait(0.1))
+        self.assertTrue(locked)
+        self.assertNotIn(False, locked)
+
+    def try_lock(self):
+        if not self.scheduler._condition.acquire(timeout=1):
+            return False
+        self.scheduler._condition.release()
+        return True
@@ -1,15 +1,20 @@
+import threading
 import unittest
 
 from parameterized import parameterized
 from mock import patch, Mock
-from dbus import DBusException
+from dbus import DBusException, Int64
+from dbus.lowlevel import MethodReturnMessage, ErrorMessage
 
-from omxplayer.dbus_connection import DBusConnection, DBusConnectionError
+from omxplayer.dbus_connection import DBusConnection, DBusConnectionError, BusPool, \
+                                      default_bus_pool
+from omxplayer.instrumentation import Instrumentation
 
 
 @patch('dbus.bus.BusConnection')
 class DBusConnectionTests(unittest.TestCase):
     def setUp(self):
+        default_bus_pool.clear()
         self.proxy = Mock()
         self.bus = Mock()
         self.bus.get_object = Mock(return_value=self.proxy)
@@ -66,11 +71,197 @@ class DBusConnectionTests(unittest.TestCase):
             connection = self.create_example_dbus_connection()
             self.assertEqual(player_interface, connection.player_interface)
 
+    def test_instruments_interfaces(self, *args):
+        instrumentation = Instrumentation()
+        with patch('dbus.Interface') as Interface:
+            Interface.return_value.dbus_interface = 'org.freedesktop.DBus.Properties'
+            connection = DBusConnection('example_bus_address', instrumentation=instrumentation)
+
+            connection.properties_interface.Get('org.mpris.MediaPlayer2.Player', 'Position')
+            connection.player_interface.Pause()
+
+        recorded = instrumentation.as_dict()['dbus']
+        self.assertEqual(['Get.Position', 'Pause'], sorted(recorded))
+        self.assertEqual('org.freedesktop.DBus.Properties',
+                         connection.properties_interface.dbus_interface)
+
+    def test_instrumented_interfaces_record_errors(self, *args):
+        instrumentation = Instrumentation()
+        with patch('dbus.Interface') as Interface:
+            Interface.return_value.Stop.side_effect = DBusException
+            connection = DBusConnection('example_bus_address', instrumentation=instrumentation)
+
+            with self.assertRaises(DBusException):
+                connection.player_interface.Stop()
+
+        self.assertEqual(1, instrumentation.as_dict()['dbus']['Stop']['errors'])
+
     def test_raises_error_if_cant_obtain_proxy(self, BusConnection):
         self.bus.get_object = Mock(side_effect=DBusException)
         BusConnection.return_value = self.bus
         with self.assertRaises(DBusConnectionError):
             connection = self.create_example_dbus_connection()
 
+    def test_raises_error_if_name_has_no_owner(self, BusConnection):
+        self.bus.name_has_owner = Mock(return_value=False)
+        BusConnection.return_value = self.bus
+        with self.assertRaises(DBusConnectionError):
+            self.create_example_dbus_connection()
+
+        self.bus.name_has_owner.assert_called_once_with('org.mpris.MediaPlayer2.omxplayer')
+        self.bus.get_object.assert_not_called()
+
+    def test_releases_bus_if_cant_obtain_proxy(self, BusConnection):
+        self.bus.get_object = Mock(side_effect=DBusException)
+        BusConnection.return_value = self.bus
+        with self.assertRaises(DBusConnectionError):
+            self.create_example_dbus_connection()
+
+        self.bus.close.assert_called_once_with()
+
+    def test_shares_bus_between_connections(self, BusConnection):
+        BusConnection.return_value = self.bus
+        self.create_example_dbus_connection()
+        self.create_example_dbus_connection()
+
+        BusConnection.assert_called_once_with('example_bus_address')
+        self.assertEqual(2, self.bus.get_object.call_count)
+
+    def test_close_releases_bus(self, BusConnection):
+        BusConnection.return_value = self.bus
+        first = self.create_example_dbus_connection()
+        second = self.create_example_dbus_connection()
+
+        first.close()
+        first.close()
+        self.bus.close.assert_not_called()
+        second.close()
+
+        self.bus.close.assert_called_once_with()
+
+    def test_verifies_name_owner_process_group(self, BusConnection):
+        self.bus.call_blocking = Mock(return_value=4321)
+        BusConnection.return_value = self.bus
+        connection = self.create_example_dbus_connection()
+
+        with patch('os.getpgid', Mock(return_value=1234)) as getpgid:
+            connection.verify_name_owner(1234)
+
+        getpgid.assert_called_once_with(4321)
+        self.bus.call_blocking.assert_called_once_with(
+            'org.freedesktop.DBus', '/org/freedesktop/DBus', 'org.freedesktop.DBus',
+            'GetConnectionUnixProcessID', 's', ('org.mpris.MediaPlayer2.omxplayer',))
+
+    def test_rejects_name_owned_by_other_process_group(self, BusConnection):
+        self.bus.call_blocking = Mock(return_value=4321)
+        BusConnection.return_value = self.bus
+        connection = self.create_example_dbus_connection()
+
+        with patch('os.getpgid', Mock(return_value=999)):
+            with self.assertRaises(DBusConnectionError):
+                connection.verify_name_owner(1234)
+
+    def test_rejects_name_without_owner(self, BusConnection):
+        self.bus.call_blocking = Mock(side_effect=DBusException)
+        BusConnection.return_value = self.bus
+        connection = self.create_example_dbus_connection()
+
+        with self.assertRaises(DBusConnectionError):
+            connection.verify_name_owner(1234)
+
+    def test_send_doesnt_wait_for_reply(self, BusConnection):
+        BusConnection.return_value = self.bus
+        connection = self.create_example_dbus_connection()
+        self.addCleanup(connection.close)
+        replied = self.reply_when_collected(MethodReturnMessage, 5)
+
+        with patch('omxplayer.dbus_connection.MethodCallMessage') as MethodCallMessage:
+            reply = connection.send('org.mpris.MediaPlayer2.Player', 'Seek', 'x', (Int64(5),))
+
+        MethodCallMessage.assert_called_once_with('org.mpris.MediaPlayer2.omxplayer',
+                                                  '/org/mpris/MediaPlayer2',
+                                                  'org.mpris.MediaPlayer2.Player', 'Seek')
+        MethodCallMessage.return_value.append.assert_called_once_with(Int64(5), signature='x')
+        self.assertFalse(reply.done())
+        replied.set()
+        self.assertEqual(5, reply.result(5))
+
+    def test_send_reports_errors(self, BusConnection):
+        BusConnection.return_value = self.bus
+        connection = self.create_example_dbus_connection()
+        self.addCleanup(connection.close)
+        self.reply_when_collected(ErrorMessage, 'Unknown method').set()
+        error_handler = Mock()
+
+        with patch('omxplayer.dbus_connection.MethodCallMessage'):
+            reply = connection.send('org.mpris.MediaPlayer2.Player', 'Foo',
+                                    error_handler=error_handler)
+
+        with self.assertRaises(DBusException):
+            reply.result(5)
+        error_handler.assert_called_once_with(reply._exception)
+
+    def test_close_collects_outstanding_replies(self, BusConnection):
+        BusConnection.return_value = self.bus
+        connection = self.create_example_dbus_connection()
+        self.reply_when_collected(MethodReturnMessage).set()
+
+        with patch('omxplayer.dbus_connection.MethodCallMessage'):
+            replies = [connection.send('org.mpris.MediaPlayer2.Player', 'Pause')
+                       for _ in range(10)]
+        connection.close()
+
+        self.assertTrue(all(reply.done() for reply in replies))
+
+    def reply_when_collected(self, Message, *args):
+        replied = threading.Event()
+
+        def send_message_with_reply(message, reply_handler, require_main_loop):
+            def block():
+                replied.wait()
+                reply = Mock(spec=Message)
+                reply.get_args_list.return_value = list(args)
+                reply.get_error_name.return_value = 'org.freedesktop.DBus.Error.UnknownMethod'
+                reply_handler(reply)
+            return Mock(block=block)
+
+        self.bus.send_message_with_reply = Mock(side_effect=send_message_with_reply)
+        self.addCleanup(replied.set)
+        return replied
+
     def create_example_dbus_connection(self, address="example_bus_address"):
         return DBusConnection(address)
+
+
+@patch('dbus.bus.BusConnection')
+class BusPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.pool = BusPool()
+
+    def test_one_bus_per_address(self, BusConnection):
+        BusConnection.side_effect = lambda address: Mock()
+
+        first = self.pool.acquire('address1')
+        self.assertIs(first, self.pool.acquire('address1'))
+        self.assertIsNot(first, self.pool.acquire('address2'))
+
+    def test_reconnects_when_disconnected(self, BusConnection):
+        disconnected, connected = Mock(), Mock()
+        disconnected.get_is_connected.return_value = False
+        BusConnection.side_effect = [disconnected, connected]
+
+        self.pool.acquire('address')
+
+        self.assertIs(connected, self.pool.acquire('address'))
+
+    def test_release_of_replaced_bus_is_ignored(self, BusConnection):
+        disconnected, connected = Mock(), Mock()
+        disconnected.get_is_connected.return_value = False
+        BusConnection.side_effect = [disconnected, connected]
+        self.pool.acquire('address')
+        self.pool.acquire('address')
+
+        self.pool.release('address', disconnected)
+
+        connected.close.assert_not_called()
+        self.assertIs(connected, self.pool.acquire('address'))
@@ -0,0 +1,62 @@
+import subprocess
+import unittest
+
+from mock import patch, Mock
+
+from omxplayer.dbus_daemon import DBusDaemon, DBusDaemonError
+from omxplayer.launcher import BinaryLauncher
+
+
+@patch('atexit.register')
+@patch('subprocess.Popen')
+class DBusDaemonTests(unittest.TestCase):
+    def setUp(self):
+        self.process = Mock(pid=4321)
+        self.process.stdout.readline.return_value = b'unix:abstract=/tmp/dbus-EXAMPLE,guid=EXAMPLE\n'
+        self.process.poll.return_value = None
+
+    def test_starts_session_daemon_printing_address(self, popen, *args):
+        popen.return_value = self.process
+
+        daemon = DBusDaemon()
+
+        self.assertEqual('dbus-daemon --session --nofork --print-address'.split(),
+                         popen.call_args[0][0])
+        self.assertEqual(subprocess.PIPE, popen.call_args[1]['stdout'])
+        self.assertEqual('unix:abstract=/tmp/dbus-EXAMPLE,guid=EXAMPLE', daemon.address)
+        self.assertEqual(4321, daemon.pid)
+
+    def test_raises_error_if_daemon_cant_start(self, popen, *args):
+        popen.side_effect = OSError('No such file or directory')
+
+        with self.assertRaises(DBusDaemonError):
+            DBusDaemon()
+
+    def test_raises_error_if_daemon_exits(self, popen, *args):
+        popen.return_value = self.process
+        self.process.stdout.readline.return_value = b''
+
+        with self.assertRaises(DBusDaemonError):
+            DBusDaemon()
+
+    def test_player_kwargs_skip_address_file(self, popen, *args):
+        popen.return_value = self.process
+
+        kwargs = DBusDaemon().player_kwargs()
+
+        self.assertEqual('unix:abstract=/tmp/dbus-EXAMPLE,guid=EXAMPLE',
+                         kwargs['bus_address_finder'].get_address())
+        self.assertIsInstance(kwargs['launcher'], BinaryLauncher)
+        self.assertEqual('unix:abstract=/tmp/dbus-EXAMPLE,guid=EXAMPLE',
+                         kwargs['launcher'].environment()['DBUS_SESSION_BUS_ADDRESS'])
+
+    def test_close_stops_daemon_once(self, popen, atexit_register):
+        popen.return_value = self.process
+        daemon = DBusDaemon()
+        atexit_register.assert_called_once_with(daemon.close)
+
+        daemon.close()
+        self.process.poll.return_value = 0
+        daemon.close()
+
+        self.process.terminate.assert_called_once_with()
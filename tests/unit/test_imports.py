@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def imported_modules(statement):
+    # -X importtime logs every module imported to stderr as 'import time: self | cumulative | name'
+    output = subprocess.check_output([sys.executable, '-X', 'importtime', '-c', statement],
+                                     stderr=subprocess.STDOUT, cwd=ROOT)
+    return set(line.split('|')[-1].strip()
+               for line in output.decode().splitlines() if line.startswith('import time:'))
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'Imports are only lazy with PEP 562')
+class ImportTests(unittest.TestCase):
+    def test_keys_doesnt_import_player(self):
+        modules = imported_modules('import omxplayer.keys')
+
+        self.assertIn('omxplayer.keys', modules)
+        for module in ('omxplayer.player', 'subprocess', 'evento', 'dbus', 'jeepney'):
+            self.assertNotIn(module, modules)
+
+    def test_player_doesnt_import_dbus_until_connecting(self):
+        modules = imported_modules('from omxplayer import OMXPlayer')
+
+        self.assertIn('omxplayer.player', modules)
+        for module in ('omxplayer._dbus_types', 'dbus', 'jeepney'):
+            self.assertNotIn(module, modules)
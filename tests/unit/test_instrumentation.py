@@ -0,0 +1,88 @@
+import unittest
+
+from mock import patch
+
+from omxplayer.instrumentation import Instrumentation, Histogram
+
+
+class HistogramTests(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = Histogram()
+        for milliseconds in range(1, 101):
+            histogram.observe(milliseconds / 1000.0)
+
+        self.assertEqual(0.05, histogram.percentile(50))
+        self.assertEqual(0.095, histogram.percentile(95))
+        self.assertEqual(0.099, histogram.percentile(99))
+
+    def test_percentiles_of_recent_samples(self):
+        histogram = Histogram(samples=2)
+        for seconds in [10.0, 1.0, 1.0]:
+            histogram.observe(seconds)
+
+        self.assertEqual(1.0, histogram.percentile(99))
+        self.assertEqual(3, histogram.count)
+
+    def test_no_samples(self):
+        self.assertIsNone(Histogram().percentile(50))
+
+
+@patch('omxplayer.instrumentation._clock')
+class InstrumentationTests(unittest.TestCase):
+    def setUp(self):
+        self.instrumentation = Instrumentation(buckets=(0.01, 0.1))
+
+    def test_times_blocks(self, clock):
+        clock.side_effect = [1.0, 1.25]
+        with self.instrumentation.time('dbus', 'Pause'):
+            pass
+
+        recorded = self.instrumentation.as_dict()['dbus']['Pause']
+        self.assertEqual(1, recorded['count'])
+        self.assertEqual(0, recorded['errors'])
+        self.assertEqual(0.25, recorded['p50'])
+
+    def test_records_errors(self, clock):
+        clock.side_effect = [1.0, 1.5]
+        with self.assertRaises(ValueError):
+            with self.instrumentation.time('method', 'pause'):
+                raise ValueError
+
+        self.assertEqual(1, self.instrumentation.as_dict()['method']['pause']['errors'])
+
+    def test_retries(self, clock):
+        self.instrumentation.retry('dbus_connect')
+        self.instrumentation.retry('dbus_connect')
+
+        self.assertEqual({'dbus_connect': 2}, self.instrumentation.as_dict()['retries'])
+
+    def test_reset(self, clock):
+        self.instrumentation.observe('dbus', 'Pause', 0.1)
+        self.instrumentation.retry('dbus_connect')
+        self.instrumentation.reset()
+
+        self.assertEqual({'method': {}, 'dbus': {}, 'convert': {}, 'retries': {}},
+                         self.instrumentation.as_dict())
+
+    def test_prometheus(self, clock):
+        self.instrumentation.observe('dbus', 'Get.Position', 0.005)
+        self.instrumentation.observe('dbus', 'Get.Position', 0.05, error=True)
+        self.instrumentation.observe('dbus', 'Get.Position', 0.5)
+        self.instrumentation.retry('dbus_connect')
+
+        self.assertEqual('\n'.join([
+            '# HELP omxplayer_dbus_duration_seconds Latency of DBus round trips',
+            '# TYPE omxplayer_dbus_duration_seconds histogram',
+            'omxplayer_dbus_duration_seconds_bucket{name="Get.Position",le="0.01"} 1',
+            'omxplayer_dbus_duration_seconds_bucket{name="Get.Position",le="0.1"} 2',
+            'omxplayer_dbus_duration_seconds_bucket{name="Get.Position",le="+Inf"} 3',
+            'omxplayer_dbus_duration_seconds_sum{name="Get.Position"} 0.555',
+            'omxplayer_dbus_duration_seconds_count{name="Get.Position"} 3',
+            '# HELP omxplayer_dbus_errors_total Failed dbus calls',
+            '# TYPE omxplayer_dbus_errors_total counter',
+            'omxplayer_dbus_errors_total{name="Get.Position"} 1',
+            '# HELP omxplayer_retries_total Retried operations',
+            '# TYPE omxplayer_retries_total counter',
+            'omxplayer_retries_total{name="dbus_connect"} 1',
+            '',
+        ]), self.instrumentation.to_prometheus())
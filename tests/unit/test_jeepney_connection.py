@@ -0,0 +1,215 @@
+import itertools
+import queue
+import unittest
+
+from mock import patch, Mock
+from parameterized import parameterized
+from jeepney import HeaderFields, new_method_return, new_error
+from jeepney.io.threading import ReceiveStopped
+
+from omxplayer.jeepney_connection import JeepneyConnection, _split_signature, \
+                                         _unwrap_variants, _type_code
+from omxplayer.instrumentation import Instrumentation
+from omxplayer.transport import DBusConnectionError, DBusException, Double, Int64, ObjectPath
+
+
+class FakeBus(object):
+    """ Replies to method calls like the bus daemon and omxplayer would """
+    def __init__(self):
+        self.outgoing_serial = itertools.count(1)
+        self.sent = []
+        self.replies = {'NameHasOwner': ('b', (True,))}
+        self.interrupted = self.closed = False
+        self._incoming = queue.Queue()
+
+    def send(self, message, serial):
+        message.header.serial = serial
+        self.sent.append(message)
+        signature, body = self.replies.get(message.header.fields[HeaderFields.member], (None, ()))
+        if isinstance(body, Exception):
+            self._incoming.put(new_error(message, signature, 's', (str(body),)))
+        else:
+            self._incoming.put(new_method_return(message, signature, body))
+
+    def receive(self):
+        message = self._incoming.get()
+        if message is None:
+            raise ReceiveStopped
+        return message
+
+    def interrupt(self):
+        self.interrupted = True
+        self._incoming.put(None)
+
+    def close(self):
+        self.closed = True
+
+
+@patch('omxplayer.jeepney_connection.open_dbus_connection')
+class JeepneyConnectionTests(unittest.TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+
+    def tearDown(self):
+        self.bus.interrupt()
+
+    def test_connects_to_omxplayer_bus(self, open_dbus_connection):
+        open_dbus_connection.return_value = self.bus
+
+        self.create_example_connection('unix:abstract=/tmp/dbus-EXAMPLE,guid=EXAMPLE')
+
+        open_dbus_connection.assert_called_once_with(bus='unix:abstract=/tmp/dbus-EXAMPLE,guid=EXAMPLE')
+
+    def test_raises_error_if_cant_connect(self, open_dbus_connection):
+        open_dbus_connection.side_effect = OSError('No such file or directory')
+
+        with self.assertRaises(DBusConnectionError):
+            self.create_example_connection()
+
+    def test_raises_error_if_name_has_no_owner(self, open_dbus_connection):
+        open_dbus_connection.return_value = self.bus
+        self.bus.replies['NameHasOwner'] = ('b', (False,))
+
+        with self.assertRaises(DBusConnectionError):
+            self.create_example_connection()
+        self.assertTrue(self.bus.closed)
+
+    def test_calls_method_with_inferred_signature(self, open_dbus_connection):
+        open_dbus_connection.return_value = self.bus
+        connection = self.create_example_connection()
+
+        connection.player_interface.SetPosition(ObjectPath('/not/used'), Int64(5000000))
+
+        message = self.bus.sent[-1]
+        self.assertEqual('ox', message.header.fields[HeaderFields.signature])
+        self.assertEqual(('/not/used', 5000000), message.body)
+        self.assertEqual('org.mpris.MediaPlayer2.omxplayer', message.header.fields[HeaderFields.destination])
+
+    def test_sets_property_as_double(self, open_dbus_connection):
+        open_dbus_connection.return_value = self.bus
+        connection = self.create_example_connection()
+
+        connection.properties_interface.Set('org.mpris.MediaPlayer2.Player', 'Volume', Double(0.5))
+
+        message = self.bus.sent[-1]
+        self.assertEqual('ssd', message.header.fields[HeaderFields.signature])
+        self.assertEqual(('org.mpris.MediaPlayer2.Player', 'Volume', 0.5), message.body)
+
+    def test_sets_property_as_variant_with_explicit_signature(self, open_dbus_connection):
+        open_dbus_connection.return_value = self.bus
+        connection = self.create_example_connection()
+
+        connection.call('org.freedesktop.DBus.Properties', 'Set',
+                        ('org.mpris.MediaPlayer2.Player', 'Volume', Double(0.5)), signature='ssv')
+
+        self.assertEqual(('org.mpris.MediaPlayer2.Player', 'Volume', ('d', 0.5)),
+                         self.bus.sent[-1].body)
+
+    def test_unwraps_variants_in_reply(self, open_dbus_connection):
+        open_dbus_connection.return_value = self.bus
+        self.bus.replies['GetAll'] = ('a{sv}', ({'Volume': ('d', 0.5), 'CanQuit': ('b', True)},))
+        connection = self.create_example_connection()
+
+        properties = connection.properties_interface.GetAll('org.mpris.MediaPlayer2.Player')
+
+        self.assertEqual({'Volume': 0.5, 'CanQuit': True}, properties)
+
+    def test_raises_dbus_exception_on_error_reply(self, open_dbus_connection):
+        open_dbus_connection.return_value = self.bus
+        self.bus.replies['Seek'] = ('org.freedesktop.DBus.Error.Failed', Exception('Failed'))
+        connection = self.create_example_connection()
+
+        with self.assertRaises(DBusException) as context:
+            connection.player_interface.Seek(Int64(5))
+        self.assertEqual('org.freedesktop.DBus.Error.Failed', context.exception.get_dbus_name())
+
+    def test_send_passes_errors_to_handler(self, open_dbus_connection):
+        open_dbus_connection.return_value = self.bus
+        self.bus.replies['Mute'] = ('org.freedesktop.DBus.Error.Failed', Exception('Failed'))
+        connection = self.create_example_connection()
+        error_handler = Mock()
+
+        reply = connection.send('org.mpris.MediaPlayer2.Player', 'Mute', error_handler=error_handler)
+
+        self.assertTrue(reply.wait(5))
+        self.assertIsInstance(error_handler.call_args[0][0], DBusException)
+
+    def test_close_fails_calls_awaiting_reply(self, open_dbus_connection):
+        open_dbus_connection.return_value = self.bus
+        connection = self.create_example_connection()
+        # Never replied to
+        self.bus.send = lambda message, serial: self.bus.sent.append(message)
+
+        reply = connection.send('org.mpris.MediaPlayer2.Player', 'Mute')
+        connection.close()
+
+        with self.assertRaises(DBusException):
+            reply.result(0)
+        self.assertTrue(self.bus.interrupted and self.bus.closed)
+
+    @patch('omxplayer.jeepney_connection.CALL_TIMEOUT', 0.01)
+    @patch('omxplayer.jeepney_connection.MAX_IN_FLIGHT', 1)
+    def test_call_timing_out_frees_its_slot(self, open_dbus_connection):
+        open_dbus_connection.return_value = self.bus
+        connection = self.create_example_connection()
+        self.bus.send = lambda message, serial: self.bus.sent.append(message)
+
+        with self.assertRaises(DBusException) as context:
+            connection.player_interface.Seek(Int64(5))
+
+        self.assertEqual('org.freedesktop.DBus.Error.NoReply', context.exception.get_dbus_name())
+        self.assertEqual({}, connection._pending)
+        self.assertTrue(connection._slots.acquire(False))
+
+    @patch('omxplayer.jeepney_connection.MAX_IN_FLIGHT', 1)
+    def test_close_frees_slots_of_calls_awaiting_reply(self, open_dbus_connection):
+        open_dbus_connection.return_value = self.bus
+        connection = self.create_example_connection()
+        self.bus.send = lambda message, serial: self.bus.sent.append(message)
+
+        connection.send('org.mpris.MediaPlayer2.Player', 'Mute')
+        connection.close()
+
+        self.assertTrue(connection._slots.acquire(False))
+
+    def test_instruments_calls(self, open_dbus_connection):
+        open_dbus_connection.return_value = self.bus
+        instrumentation = Instrumentation()
+        connection = self.create_example_connection(instrumentation=instrumentation)
+
+        connection.properties_interface.Get('org.mpris.MediaPlayer2.Player', 'Volume')
+
+        self.assertEqual(1, instrumentation.as_dict()['dbus']['Get.Volume']['count'])
+
+    def create_example_connection(self, bus_address='unix:abstract=/tmp/dbus-EXAMPLE,guid=EXAMPLE',
+                                  **kwargs):
+        connection = JeepneyConnection(bus_address, **kwargs)
+        self.addCleanup(connection.close)
+        return connection
+
+
+class SignatureTests(unittest.TestCase):
+    @parameterized.expand([
+        ['s', ['s']],
+        ['ssv', ['s', 's', 'v']],
+        ['sa{sv}i', ['s', 'a{sv}', 'i']],
+        ['aas(ix)', ['aas', '(ix)']],
+    ])
+    def test_splits_complete_types(self, signature, expected_types):
+        self.assertEqual(expected_types, _split_signature(signature))
+
+    @parameterized.expand([
+        [Int64(1), 'x'],
+        [Double(1), 'd'],
+        [ObjectPath('/path'), 'o'],
+        [True, 'b'],
+        [1, 'i'],
+        ['text', 's'],
+    ])
+    def test_infers_type_code(self, value, code):
+        self.assertEqual(code, _type_code(value))
+
+    def test_unwraps_nested_variants(self):
+        value = [{'length': ('v', ('x', 5))}]
+
+        self.assertEqual([{'length': 5}], _unwrap_variants('aa{sv}', value))
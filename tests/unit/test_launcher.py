@@ -0,0 +1,82 @@
+import os
+import sys
+import unittest
+
+from mock import patch, Mock
+
+from omxplayer.launcher import ScriptLauncher, BinaryLauncher, SpawnedProcess
+
+
+@patch('subprocess.Popen')
+class ScriptLauncherTests(unittest.TestCase):
+    def test_runs_script_in_new_session(self, popen):
+        stdin, stdout = Mock(), Mock()
+
+        process = ScriptLauncher().launch(['--no-osd', 'test.mp4'], stdin=stdin, stdout=stdout)
+
+        self.assertIs(popen.return_value, process)
+        popen.assert_called_once_with(['omxplayer', '--no-osd', 'test.mp4'], env=None,
+                                      stdin=stdin, stdout=stdout, start_new_session=True)
+
+    @unittest.skipUnless(hasattr(os, 'posix_spawnp'), 'os.posix_spawnp needs Python 3.8+')
+    @patch('os.posix_spawnp', Mock(return_value=1234))
+    def test_spawns_script_in_new_session(self, popen):
+        stdin, stdout = Mock(), Mock()
+
+        process = ScriptLauncher(use_posix_spawn=True).launch(['test.mp4'], stdin=stdin, stdout=stdout)
+
+        self.assertEqual(1234, process.pid)
+        os.posix_spawnp.assert_called_once_with(
+            'omxplayer', ['omxplayer', 'test.mp4'], os.environ,
+            file_actions=[(os.POSIX_SPAWN_DUP2, stdin.fileno(), 0),
+                          (os.POSIX_SPAWN_DUP2, stdout.fileno(), 1)],
+            setsid=True)
+        popen.assert_not_called()
+
+    @unittest.skipUnless(hasattr(os, 'posix_spawnp'), 'os.posix_spawnp needs Python 3.8+')
+    @patch('os.posix_spawnp', Mock(side_effect=NotImplementedError))
+    def test_falls_back_to_popen_without_posix_spawn_setsid(self, popen):
+        launcher = ScriptLauncher(use_posix_spawn=True)
+
+        launcher.launch(['test.mp4'])
+
+        popen.assert_called_once()
+        self.assertFalse(launcher.use_posix_spawn)
+
+
+class BinaryLauncherTests(unittest.TestCase):
+    def setUp(self):
+        self.bus_finder = Mock(path='/tmp/omxplayerdbus.test', pid=None)
+        self.bus_finder.get_address.return_value = 'unix:abstract=/tmp/dbus-EXAMPLE'
+
+    @patch('os.path.isdir', Mock(return_value=True))
+    def test_sets_up_environment_like_script(self):
+        launcher = BinaryLauncher(bus_finder=self.bus_finder, library_path=['/opt/vc/lib'])
+
+        with patch.dict('os.environ', {'LD_LIBRARY_PATH': '/usr/local/lib'}):
+            env = launcher.environment()
+
+        self.assertEqual('unix:abstract=/tmp/dbus-EXAMPLE', env['DBUS_SESSION_BUS_ADDRESS'])
+        self.assertEqual('/opt/vc/lib:/usr/local/lib', env['LD_LIBRARY_PATH'])
+
+    def test_passes_bus_pid(self):
+        self.bus_finder.pid = 4321
+        launcher = BinaryLauncher(bus_finder=self.bus_finder)
+
+        self.assertEqual('4321', launcher.environment()['DBUS_SESSION_BUS_PID'])
+
+    def test_runs_binary(self):
+        launcher = BinaryLauncher(bus_finder=self.bus_finder)
+
+        self.assertEqual(['/usr/bin/omxplayer.bin', 'test.mp4'], launcher.command(['test.mp4']))
+
+
+@unittest.skipUnless(hasattr(os, 'posix_spawnp'), 'os.posix_spawnp needs Python 3.8+')
+class SpawnedProcessTests(unittest.TestCase):
+    def test_waits_for_exit_status(self):
+        process = ScriptLauncher(sys.executable, use_posix_spawn=True).launch(
+            ['-c', 'import os, sys; sys.exit(os.getpgid(0) == os.getpid() and 3)'])
+
+        self.assertIsInstance(process, SpawnedProcess)
+        self.assertEqual(3, process.wait())
+        self.assertEqual(3, process.poll())
@@ -0,0 +1,88 @@
+import time
+import unittest
+
+from omxplayer.netsync import SyncLeader, SyncFollower
+from omxplayer.position_tracker import _clock
+from tests.fake_player import FakePlayer
+
+
+class NetSyncTests(unittest.TestCase):
+    def setUp(self):
+        self.leader_player = FakePlayer(position=10.0)
+        self.leader = SyncLeader(self.leader_player, ('127.0.0.1', 0))
+        self.follower_player = FakePlayer(position=10.0)
+
+    def tearDown(self):
+        self.follower.close()
+        self.leader.close()
+
+    def follow(self, **kwargs):
+        self.follower = SyncFollower(self.follower_player, self.leader.address, **kwargs)
+        return self.follower
+
+    def test_estimates_clock_offset(self):
+        self.follow(clock=lambda: _clock() - 100.0)
+
+        for _ in range(4):
+            self.follower.sync()
+
+        self.assertAlmostEqual(100.0, self.follower.offset, delta=0.005)
+        # The leader counts a request after replying, wait for it to finish
+        self.leader.close()
+        self.assertEqual(4, self.leader.requests)
+
+    def test_measures_error_across_clock_offset(self):
+        self.follow(clock=lambda: _clock() + 50.0)
+        self.follower_player.set_position(10.2)
+
+        error = self.follower.sync()
+
+        self.assertAlmostEqual(0.2, error, delta=0.005)
+
+    def test_slows_down_when_ahead(self):
+        self.follow(interval=1.0, tolerance=0.005)
+        self.follower_player.set_position(self.leader_player.position() + 0.02)
+
+        self.follower.sync()
+
+        self.assertLess(self.follower_player.rate(), 1.0)
+        self.assertEqual(1, self.follower.stats()['rate_adjustments'])
+
+    def test_seeks_when_far_off(self):
+        self.follow(seek_threshold=0.5)
+        self.follower_player.set_position(20.0)
+
+        self.follower.sync()
+
+        self.assertAlmostEqual(self.leader_player.position(),
+                               self.follower_player.position(), delta=0.005)
+        self.assertEqual(1, self.follower.stats()['seeks'])
+
+    def test_follows_pause(self):
+        self.follow()
+        self.leader_player.pause()
+
+        self.follower.sync()
+
+        self.assertFalse(self.follower_player.is_playing())
+        self.assertAlmostEqual(self.leader_player.position(),
+                               self.follower_player.position(), delta=0.005)
+
+    def test_converges_with_drifting_player(self):
+        self.follower_player.speed_error = 0.01
+        self.follower_player.set_position(10.05)
+        self.follow(interval=0.02, tolerance=0.001, max_rate_adjustment=0.5)
+
+        for _ in range(20):
+            self.follower.sync()
+            time.sleep(0.02)
+
+        self.assertLess(abs(self.follower.sync()), 0.005)
+
+    def test_reports_lost_requests(self):
+        self.follow(timeout=0.01)
+        self.leader.close()
+        self.leader = SyncLeader(self.leader_player, ('127.0.0.1', 0))
+
+        self.assertIsNone(self.follower.sync())
+        self.assertEqual(1, self.follower.stats()['lost'])
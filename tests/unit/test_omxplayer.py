@@ -1,14 +1,21 @@
+import atexit
+import itertools
 import unittest
 import os
 import sys
 import signal
+import threading
 import dbus
 
 from parameterized import parameterized
-from mock import patch, Mock, call, mock_open
+from mock import patch, Mock, ANY, call, mock_open
 
+from omxplayer.bus_finder import BusFinderTimeoutError
+from omxplayer.cues import CueScheduler
 from omxplayer.dbus_connection import DBusConnectionError
-from omxplayer.player import OMXPlayer
+from omxplayer.instrumentation import Instrumentation
+from omxplayer.pipeline import CommandPipeline
+from omxplayer.player import OMXPlayer, OMXPlayerDeadError, _from_dbus_value
 
 if sys.version_info[0] == 2:
     builtin = '__builtin__'
@@ -34,18 +41,30 @@ class OMXPlayerTests(unittest.TestCase):
         devnull = MOCK_OPEN()
         popen.assert_called_once_with(
             ['omxplayer', './test.mp4'],
-            preexec_fn=os.setsid,
+            env=None,
             stdin=devnull,
-            stdout=devnull)
+            stdout=devnull,
+            start_new_session=True)
 
     @patch('time.sleep')
+    @patch('omxplayer.player._clock', Mock(side_effect=itertools.count()))
     def test_tries_to_open_dbus_again_if_it_cant_connect(self, *args):
         # TODO: Shouldn't this be DBusConnectionError not SystemError
+        dbus_connection = Mock(side_effect=DBusConnectionError)
+        with self.assertRaises(SystemError):
+            self.patch_and_run_omxplayer(Connection=dbus_connection, connect_timeout=10)
+        # One clock reading for the deadline, then one per attempt
+        self.assertEqual(10, dbus_connection.call_count)
+
+    @patch('omxplayer.player.BusFinder.for_user')
+    def test_default_bus_finder_waits_at_most_connect_timeout(self, for_user, *args):
+        for_user.return_value.get_address.side_effect = BusFinderTimeoutError
         with self.assertRaises(SystemError):
-            dbus_connection = Mock(side_effect=DBusConnectionError)
-            self.patch_and_run_omxplayer(Connection=dbus_connection)
-            self.assertEqual(50, self.player.tries)
+            OMXPlayer(self.TEST_FILE_NAME, Connection=Mock(), connect_timeout=2)
+
+        for_user.assert_called_once_with(timeout=2)
 
+    @patch('omxplayer.player._clock', Mock(side_effect=itertools.count()))
     def test_dbus_failure_kills(self, popen, sleep, isfile, killpg, *args):
         omxplayer_process = Mock()
         popen.return_value = omxplayer_process
@@ -55,6 +74,14 @@ class OMXPlayerTests(unittest.TestCase):
                 self.patch_and_run_omxplayer(Connection=dbus_connection)
             killpg.assert_called_once_with(omxplayer_process.pid, signal.SIGTERM)
 
+    def test_connection_retries_back_off(self, popen, sleep, *args):
+        dbus_connection = Mock(side_effect=[DBusConnectionError] * 8 + [Mock()])
+        self.patch_and_run_omxplayer(Connection=dbus_connection)
+
+        self.assertEqual([call(0.001), call(0.002), call(0.004), call(0.008),
+                          call(0.016), call(0.032), call(0.05), call(0.05)],
+                         sleep.call_args_list)
+
     def test_thread_failure_kills(self, popen, sleep, isfile, killpg, *args):
         omxplayer_process = Mock()
         popen.return_value = omxplayer_process
@@ -146,6 +173,22 @@ class OMXPlayerTests(unittest.TestCase):
             self.player.quit()
             omxplayer_process.wait.assert_has_calls([call()])
 
+    def test_quitting_closes_dbus_connection(self, popen, *args):
+        connection = Mock()
+        self.patch_and_run_omxplayer(Connection=Mock(return_value=connection))
+        with patch('os.getpgid'):
+            self.player.quit()
+
+        connection.close.assert_called_once_with()
+
+    @unittest.skipUnless(hasattr(atexit, 'unregister'), 'atexit.unregister needs Python 3')
+    def test_quitting_unregisters_exit_handler(self, popen, *args):
+        self.patch_and_run_omxplayer()
+        with patch('os.getpgid'), patch('atexit.unregister') as unregister:
+            self.player.quit()
+
+        unregister.assert_called_once_with(self.player.quit)
+
     def test_quitting_when_already_dead(self, popen, sleep, isfile, killpg, *args):
         omxplayer_process = Mock()
         popen.return_value = omxplayer_process
@@ -169,12 +212,20 @@ class OMXPlayerTests(unittest.TestCase):
 
     def test_check_process_still_exists_before_dbus_call(self, *args):
         self.patch_and_run_omxplayer()
+        self.mark_player_alive()
         self.player._process = process = Mock(return_value=None)
-        process.poll.return_value = None
 
         self.player.can_quit()
 
-        process.poll.assert_called_once_with()
+        process.poll.assert_not_called()
+
+    def test_dbus_call_fails_once_process_has_exited(self, *args):
+        self.patch_and_run_omxplayer()
+        # The mocked process exits straight away
+        self.player._process_monitor.join()
+
+        with self.assertRaises(OMXPlayerDeadError):
+            self.player.can_quit()
 
     def test_stop_event(self, *args):
         self.patch_and_run_omxplayer(active=True)
@@ -205,6 +256,51 @@ class OMXPlayerTests(unittest.TestCase):
 
             callback.assert_called_once_with(self.player)
 
+    def test_wait_returns_exit_status(self, popen, *args):
+        popen.return_value.returncode = 3
+        self.patch_and_run_omxplayer()
+
+        self.assertEqual(3, self.player.wait(5))
+        self.assertTrue(self.player.finished.is_set())
+
+    def test_wait_times_out_while_running(self, popen, *args):
+        exited = self.block_process_exit(popen)
+        self.patch_and_run_omxplayer()
+
+        self.assertIsNone(self.player.wait(0.01))
+        self.assertFalse(self.player.finished.is_set())
+        exited.set()
+
+    def test_play_sync_returns_on_exit(self, popen, *args):
+        exited = self.block_process_exit(popen)
+        self.patch_and_run_omxplayer()
+
+        with patch.object(self.player, 'is_playing', return_value=True):
+            threading.Timer(0.01, exited.set).start()
+            self.player.play_sync()
+
+        self.assertTrue(self.player.finished.is_set())
+
+    def test_play_sync_returns_on_pause(self, popen, *args):
+        self.patch_and_run_omxplayer(Connection=Mock(), active=True)
+
+        with patch.object(self.player, 'is_playing', return_value=True):
+            pauser = threading.Timer(0.01, self.player.pause)
+            pauser.start()
+            self.player.play_sync()
+            pauser.join()
+
+        self.player._player_interface.Pause.assert_called_once_with()
+
+    @patch('omxplayer.player.PLAY_SYNC_POLL_INTERVAL', 0.01)
+    def test_play_sync_returns_on_pause_through_keys(self, popen, *args):
+        self.patch_and_run_omxplayer(Connection=Mock(), active=True)
+
+        with patch.object(self.player, 'is_playing', side_effect=[True, False]) as is_playing:
+            self.player.play_sync()
+
+        self.assertEqual(2, is_playing.call_count)
+
     def test_play_event_by_play_pause(self, *args):
         self.patch_and_run_omxplayer(active=True)
         callback = Mock()
@@ -249,20 +345,246 @@ class OMXPlayerTests(unittest.TestCase):
 
         callback.assert_called_once_with(self.player, 5.01)
 
+    def test_rate_event(self, *args):
+        self.patch_and_run_omxplayer(active=True)
+        self.player._properties_interface.Set.return_value = dbus.Double(2.0)
+        callback = Mock()
+        self.player.rateEvent += callback
+
+        self.player.set_rate(2.0)
+
+        callback.assert_called_once_with(self.player, 2.0)
+
+    def test_instrumentation_records_methods_and_conversions(self, *args):
+        instrumentation = Instrumentation()
+        self.patch_and_run_omxplayer(active=True, instrumentation=instrumentation)
+        self.player._properties_interface.Get.return_value = dbus.Double(0.5)
+
+        self.player.volume()
+
+        recorded = instrumentation.as_dict()
+        self.assertEqual(1, recorded['method']['volume']['count'])
+        self.assertEqual(1, recorded['convert']['volume']['count'])
+
+    def test_instrumentation_records_method_errors(self, *args):
+        instrumentation = Instrumentation()
+        self.patch_and_run_omxplayer(Connection=Mock(), active=True,
+                                     instrumentation=instrumentation)
+        self.player._player_interface.Pause.side_effect = dbus.DBusException
+
+        with self.assertRaises(dbus.DBusException):
+            self.player.pause()
+
+        self.assertEqual(1, instrumentation.as_dict()['method']['pause']['errors'])
+
+    def test_instrumentation_is_passed_to_connection(self, *args):
+        instrumentation = Instrumentation()
+        Connection = Mock()
+        self.patch_and_run_omxplayer(Connection=Connection, instrumentation=instrumentation)
+
+        Connection.assert_called_once_with(ANY, None, instrumentation=instrumentation)
+
+    def test_instrumentation_records_connection_retries(self, *args):
+        instrumentation = Instrumentation()
+        Connection = Mock(side_effect=[DBusConnectionError, DBusConnectionError, Mock()])
+
+        self.patch_and_run_omxplayer(Connection=Connection, instrumentation=instrumentation)
+
+        self.assertEqual({'dbus_connect': 2}, instrumentation.as_dict()['retries'])
+
+    def test_verifies_omxplayer_owns_dbus_name(self, popen, *args):
+        connection = Mock()
+        self.patch_and_run_omxplayer(Connection=Mock(return_value=connection))
+
+        connection.verify_name_owner.assert_called_once_with(popen.return_value.pid)
+
+    def test_reconnects_if_dbus_name_owned_by_another_process(self, *args):
+        stale, connection = Mock(), Mock()
+        stale.verify_name_owner.side_effect = DBusConnectionError
+        self.patch_and_run_omxplayer(Connection=Mock(side_effect=[stale, connection]))
+
+        stale.close.assert_called_once_with()
+        self.assertIs(connection, self.player._connection)
+
+    def test_accepts_connection_without_name_owner_check_or_close(self, *args):
+        # Connection classes written before verify_name_owner() and close()
+        connection = Mock(spec=['root_interface', 'player_interface', 'properties_interface'])
+        self.patch_and_run_omxplayer(Connection=Mock(return_value=connection))
+        with patch('os.getpgid'):
+            self.player.quit()
+
+        self.assertIs(connection, self.player._connection)
+
+    def test_cues_are_created_once(self, *args):
+        self.patch_and_run_omxplayer()
+
+        self.assertIsInstance(self.player.cues, CueScheduler)
+        self.assertIs(self.player.cues, self.player.cues)
+
+    def test_load_restarts_cues(self, *args):
+        self.patch_and_run_omxplayer()
+        self.player._cues = cues = Mock()
+
+        self.player.load('./test2.mp4')
+
+        cues.restart.assert_called_once_with()
+
+    def test_pipeline_is_created_once(self, *args):
+        self.patch_and_run_omxplayer()
+
+        self.assertIsInstance(self.player.pipeline, CommandPipeline)
+        self.assertIs(self.player.pipeline, self.player.pipeline)
+
+    def patch_snapshot_interfaces(self):
+        self.patch_and_run_omxplayer(active=True)
+        self.player._root_interface.dbus_interface = 'org.mpris.MediaPlayer2'
+        self.player._player_interface.dbus_interface = 'org.mpris.MediaPlayer2.Player'
+        interface = self.player._properties_interface
+        interface.reset_mock()
+        return interface
+
+    def test_snapshot_gets_all_properties_once_per_interface(self, *args):
+        interface = self.patch_snapshot_interfaces()
+        all_properties = {
+            'org.mpris.MediaPlayer2': dbus.Dictionary({
+                'Identity': dbus.String('OMXPlayer'),
+            }, signature='sv'),
+            'org.mpris.MediaPlayer2.Player': dbus.Dictionary({
+                'Position': dbus.Int64(1500000),
+                'ResWidth': dbus.Int32(1920),
+            }, signature='sv'),
+        }
+        interface.GetAll = Mock(side_effect=lambda name: all_properties[name])
+
+        state = self.player.snapshot()
+
+        interface.GetAll.assert_has_calls([call('org.mpris.MediaPlayer2'),
+                                           call('org.mpris.MediaPlayer2.Player')])
+        interface.Get.assert_not_called()
+        self.assertEqual('OMXPlayer', state.identity)
+        self.assertEqual(1.5, state.position)
+        self.assertEqual(1920, state.width)
+        self.assertIsNone(state.height)
+
+    def test_snapshot_falls_back_to_get(self, *args):
+        interface = self.patch_snapshot_interfaces()
+        interface.GetAll = Mock(side_effect=dbus.exceptions.DBusException(
+            name='org.freedesktop.DBus.Error.UnknownMethod'))
+        interface.Get = Mock(return_value=dbus.Boolean(True))
+
+        state = self.player.snapshot()
+        self.player.snapshot()
+
+        self.assertEqual(1, interface.GetAll.call_count)
+        interface.Get.assert_any_call('org.mpris.MediaPlayer2', 'CanQuit')
+        interface.Get.assert_any_call('org.mpris.MediaPlayer2.Player', 'CanSeek')
+        self.assertTrue(state.can_quit)
+
+    def test_snapshot_keeps_get_all_after_transient_error(self, *args):
+        interface = self.patch_snapshot_interfaces()
+        interface.GetAll = Mock(side_effect=dbus.exceptions.DBusException(
+            name='org.freedesktop.DBus.Error.NoReply'))
+
+        with self.assertRaises(dbus.exceptions.DBusException):
+            self.player.snapshot()
+        interface.GetAll = Mock(return_value=dbus.Dictionary({}, signature='sv'))
+        self.player.snapshot()
+
+        self.assertEqual(2, interface.GetAll.call_count)
+
+    def test_snapshot_is_immutable(self, *args):
+        interface = self.patch_snapshot_interfaces()
+        interface.GetAll = Mock(return_value=dbus.Dictionary({}, signature='sv'))
+
+        state = self.player.snapshot()
+
+        with self.assertRaises(AttributeError):
+            state.volume = 1
+
+    def patch_properties_interface(self, **kwargs):
+        self.patch_and_run_omxplayer(active=True, **kwargs)
+        interface = self.player._properties_interface
+        interface.reset_mock()
+        return interface
+
+    def test_static_property_is_cached(self, *args):
+        interface = self.patch_properties_interface()
+        interface.Get.return_value = dbus.Int64(10 * 1000 * 1000)
+
+        self.player.duration()
+        self.assertEqual(10, self.player.duration())
+
+        self.assertEqual(1, interface.Get.call_count)
+        self.assertEqual(1, self.player.property_cache.hits)
+
+    def test_changing_cached_value_does_not_change_cache(self, *args):
+        interface = self.patch_properties_interface()
+        interface.Get.return_value = dbus.Dictionary({'xesam:artist': ['Example']})
+
+        self.player.metadata()['xesam:artist'].append('Changed')
+
+        self.assertEqual({'xesam:artist': ['Example']}, self.player.metadata())
+        self.assertEqual(1, interface.Get.call_count)
+
+    def test_property_cache_is_cleared_on_load(self, *args):
+        interface = self.patch_properties_interface()
+        interface.Get.return_value = dbus.Int32(1920)
+
+        self.player.width()
+        self.player.load('./test2.mp4')
+        self.mark_player_alive()
+        self.player.width()
+
+        self.assertEqual(2, interface.Get.call_count)
+
+    def test_volatile_property_is_not_cached_by_default(self, *args):
+        interface = self.patch_properties_interface()
+        interface.Get.return_value = dbus.Double(1.0)
+
+        self.player.volume()
+        self.player.volume()
+
+        self.assertEqual(2, interface.Get.call_count)
+
+    def test_volatile_property_is_cached_with_ttl(self, *args):
+        interface = self.patch_properties_interface(cache_ttl=60)
+        interface.Get.return_value = dbus.Double(1.0)
+
+        self.player.volume()
+        self.player.volume()
+        self.assertEqual(1, interface.Get.call_count)
+
+        self.player.set_volume(2)
+        self.player.volume()
+        self.assertEqual(2, interface.Get.call_count)
+
+    def block_process_exit(self, popen):
+        exited = threading.Event()
+        popen.return_value.wait.side_effect = lambda: exited.wait()
+        self.addCleanup(exited.set)
+        return exited
+
+    def mark_player_alive(self):
+        # The mocked process exits straight away, wait for the monitor thread
+        # to notice before pretending it is still running
+        self.player._process_monitor.join()
+        self.player._process_alive = True
+
     def patch_interface_and_run_command(self, command_name, command_args):
-        self.player._process.poll = Mock(return_value=None)
+        self.mark_player_alive()
         result = getattr(self.player, command_name)(*command_args)
         return result
 
     # Must have the prefix 'patch' for the decorators to take effect
-    def patch_and_run_omxplayer(self, Connection=Mock(), active=False):
+    def patch_and_run_omxplayer(self, Connection=Mock(), active=False, **kwargs):
         bus_address_finder = Mock()
         bus_address_finder.get_address.return_val = "example_bus_address"
         self.player = OMXPlayer(self.TEST_FILE_NAME,
                                 bus_address_finder=bus_address_finder,
-                                Connection=Connection)
+                                Connection=Connection,
+                                **kwargs)
         if active:
-            self.player._process.poll = Mock(return_value=None)
+            self.mark_player_alive()
 
     def patch_and_run_omxplayer_url(self, Connection=Mock(), active=False):
         bus_address_finder = Mock()
@@ -271,7 +593,7 @@ class OMXPlayerTests(unittest.TestCase):
                                 bus_address_finder=bus_address_finder,
                                 Connection=Connection)
         if active:
-            self.player._process.poll = Mock(return_value=None)
+            self.mark_player_alive()
 
     def test_load(self, popen, sleep, isfile, killpg, *args):
         omxplayer_process = Mock()
@@ -282,11 +604,13 @@ class OMXPlayerTests(unittest.TestCase):
             self.assertEqual(self.player.get_filename(), './test.mp4')
             killpg.assert_not_called()
             popen.assert_called_once_with(['omxplayer', './test.mp4'],
-                                        preexec_fn=os.setsid,
+                                        env=None,
                                         stdin=MOCK_OPEN(),
-                                        stdout=MOCK_OPEN())
+                                        stdout=MOCK_OPEN(),
+                                        start_new_session=True)
             # load new video in same OMXPlayer instance
             self.player.load('./test2.mp4')
+            self.mark_player_alive()
             # verify new video is registered in OMXPlayer
             self.assertEqual(self.player.get_filename(), './test2.mp4')
             # verify omxplayer process for previous video was killed
@@ -317,6 +641,12 @@ class OMXPlayerTests(unittest.TestCase):
             self.player.load('./test2.mp4', pause=True)
             self.assertEqual(pause_method.call_count, 1)
 
+    def test_pauses_without_waiting(self, popen, sleep, *args):
+        with patch.object(OMXPlayer, 'pause', return_value=None):
+            self.patch_and_run_omxplayer(pause=True)
+
+        sleep.assert_not_called()
+
     def test_load_without_pause(self, *args):
         with patch.object(OMXPlayer, 'pause', return_value=None) as pause_method:
             self.patch_and_run_omxplayer()
@@ -326,3 +656,47 @@ class OMXPlayerTests(unittest.TestCase):
     def test_register_quit_handler_atexit(self, popen, sleep, isfile, killpg, atexit):
         self.patch_and_run_omxplayer()
         atexit.assert_called_once_with(self.player.quit)
+
+
+class FromDBusValueTests(unittest.TestCase):
+    @parameterized.expand([
+        [dbus.Int64(10), 10, int],
+        [dbus.Double(1.5), 1.5, float],
+        [dbus.Boolean(True), True, bool],
+        [dbus.String('Playing'), 'Playing', str],
+        [dbus.ObjectPath('/not/used'), '/not/used', str],
+        [3, 3, int],
+    ])
+    def test_converts_scalars(self, value, expected, expected_type):
+        result = _from_dbus_value(value)
+
+        self.assertEqual(expected, result)
+        self.assertIs(expected_type, type(result))
+
+    def test_converts_nested_containers(self):
+        value = dbus.Dictionary({
+            dbus.String('mpris:length'): dbus.Int64(19691000),
+            dbus.String('xesam:artist'): dbus.Array([dbus.String('Artist')], signature='s'),
+            dbus.String('streams'): dbus.Array([
+                dbus.Dictionary({dbus.String('index'): dbus.Int32(0)}, signature='sv'),
+            ], signature='a{sv}'),
+        }, signature='sv')
+
+        result = _from_dbus_value(value)
+
+        self.assertEqual({
+            'mpris:length': 19691000,
+            'xesam:artist': ['Artist'],
+            'streams': [{'index': 0}],
+        }, result)
+        self.assertIs(dict, type(result))
+        self.assertIs(list, type(result['xesam:artist']))
+        self.assertIs(str, type(result['xesam:artist'][0]))
+        self.assertIs(int, type(result['streams'][0]['index']))
+
+    def test_preserves_array_order(self):
+        value = dbus.Array([dbus.Array([dbus.Int32(1)], signature='i'),
+                            dbus.Int32(2),
+                            dbus.Array([dbus.Int32(3)], signature='i')], signature='v')
+
+        self.assertEqual([[1], 2, [3]], _from_dbus_value(value))
@@ -0,0 +1,71 @@
+import unittest
+
+from mock import Mock
+from dbus import DBusException, Double, Int32, Int64, ObjectPath, String
+
+from omxplayer.pipeline import CommandPipeline
+from omxplayer.player import OMXPlayerDeadError
+
+
+class CommandPipelineTests(unittest.TestCase):
+    def setUp(self):
+        self.player = Mock(_process_alive=True)
+        self.send = self.player._connection.send
+        self.error_handler = Mock()
+        self.pipeline = CommandPipeline(self.player, error_handler=self.error_handler)
+
+    def test_set_volume(self):
+        self.pipeline.set_volume(2)
+
+        self.assert_sent('org.freedesktop.DBus.Properties', 'Set', 'ssd',
+                         ('org.mpris.MediaPlayer2.Player', 'Volume', Double(2)))
+        self.player.property_cache.invalidate.assert_called_once_with('Volume')
+
+    def test_seek_fires_seek_event(self):
+        self.pipeline.seek(5)
+
+        self.assert_sent('org.mpris.MediaPlayer2.Player', 'Seek', 'x', (Int64(5000000),))
+        self.player.seekEvent.assert_called_once_with(self.player, 5)
+
+    def test_set_video_pos(self):
+        self.pipeline.set_video_pos(0, 0, 640, 360)
+
+        self.assert_sent('org.mpris.MediaPlayer2.Player', 'VideoPos', 'os',
+                         (ObjectPath('/not/used'), String('0 0 640 360')))
+
+    def test_action(self):
+        self.pipeline.action(16)
+
+        self.assert_sent('org.mpris.MediaPlayer2.Player', 'Action', 'i', (Int32(16),))
+
+    def test_returns_pending_reply(self):
+        self.assertIs(self.send.return_value, self.pipeline.hide_video())
+
+    def test_errors_are_passed_to_handler(self):
+        self.pipeline.mute()
+        on_error = self.send.call_args[1]['error_handler']
+        exception = DBusException()
+
+        on_error(exception)
+
+        self.error_handler.assert_called_once_with(self.player, 'Mute', exception)
+        self.assertEqual(1, self.pipeline.errors)
+
+    def test_flush_waits_for_last_reply(self):
+        self.assertTrue(self.pipeline.flush())
+        self.pipeline.show_video()
+
+        self.pipeline.flush(1)
+
+        self.send.return_value.wait.assert_called_once_with(1)
+
+    def test_raises_when_player_is_dead(self):
+        self.player._process_alive = False
+
+        with self.assertRaises(OMXPlayerDeadError):
+            self.pipeline.set_alpha(128)
+        self.send.assert_not_called()
+
+    def assert_sent(self, interface, member, signature, args):
+        self.send.assert_called_once_with(interface, member, signature, args,
+                                          error_handler=self.send.call_args[1]['error_handler'])
@@ -0,0 +1,154 @@
+import unittest
+
+from mock import MagicMock, Mock, call, patch
+
+from omxplayer.dbus_connection import BusPool
+from omxplayer.playlist import Playlist
+
+
+class PlaylistTests(unittest.TestCase):
+    def setUp(self):
+        self.pool = Mock()
+        self.pool.acquire.side_effect = self.create_player
+        self.players = []
+
+    def create_player(self, source, args=None):
+        player = MagicMock(name=source)
+        player.source = source
+        self.players.append(player)
+        return player
+
+    def create_playlist(self, sources=('a.mp4', 'b.mp4', 'c.mp4'), **kwargs):
+        return Playlist(sources, layer=2, pool=self.pool, **kwargs)
+
+    def test_play_starts_first_item_on_top_layer(self):
+        playlist = self.create_playlist()
+
+        playlist.play()
+
+        self.pool.acquire.assert_called_once_with('a.mp4', args=['--layer', '2'])
+        self.players[0].play.assert_called_once_with()
+
+    def test_play_preloads_next_item_hidden_on_lower_layer(self):
+        playlist = self.create_playlist()
+
+        playlist.play()
+
+        self.pool.preload.assert_called_once_with(
+            'b.mp4', args=['--layer', '1', '--alpha', '0'])
+
+    def test_exit_flips_to_next_item(self):
+        playlist = self.create_playlist()
+        playlist.play()
+
+        playlist._on_exit(self.players[0], 0)
+
+        next_player = self.players[1]
+        self.assertEqual('b.mp4', next_player.source)
+        next_player.assert_has_calls([call.set_layer(2),
+                                      call.set_alpha(255),
+                                      call.play()])
+        self.assertIs(next_player, playlist.player)
+        self.assertEqual(1, playlist.index)
+
+    def test_records_transition_gap(self):
+        playlist = self.create_playlist()
+        callback = Mock()
+        playlist.transitionEvent += callback
+        playlist.play()
+
+        playlist._on_exit(self.players[0], 0)
+
+        self.assertEqual(1, len(playlist.transition_gaps))
+        callback.assert_called_once_with(playlist, self.players[1],
+                                         playlist.transition_gaps[0])
+
+    def test_finishes_after_last_item(self):
+        playlist = self.create_playlist(sources=['a.mp4'])
+        callback = Mock()
+        playlist.finishEvent += callback
+        playlist.play()
+
+        playlist._on_exit(self.players[0], 0)
+
+        callback.assert_called_once_with(playlist)
+        self.assertTrue(playlist.wait(0))
+
+    def test_loops_back_to_first_item(self):
+        playlist = self.create_playlist(sources=['a.mp4', 'b.mp4'], loop=True)
+        playlist.play()
+
+        playlist._on_exit(self.players[0], 0)
+
+        self.pool.preload.assert_called_with(
+            'a.mp4', args=['--layer', '1', '--alpha', '0'])
+
+    def test_stop_does_not_advance(self):
+        playlist = self.create_playlist()
+        playlist.play()
+        first = self.players[0]
+
+        playlist.stop()
+        playlist._on_exit(first, 0)
+
+        first.quit.assert_called_once_with()
+        self.assertEqual(1, len(self.players))
+        self.pool.close.assert_called_once_with()
+
+    def test_ignores_exit_of_players_it_no_longer_shows(self):
+        playlist = self.create_playlist()
+        playlist.play()
+        first = self.players[0]
+        playlist._on_exit(first, 0)
+
+        playlist._on_exit(first, 0)
+
+        self.assertEqual(2, len(self.players))
+
+    def test_quits_exited_player_at_next_transition(self):
+        playlist = self.create_playlist()
+        playlist.play()
+        first = self.players[0]
+
+        playlist._on_exit(first, 0)
+        first.quit.assert_not_called()
+        playlist._on_exit(self.players[1], 0)
+
+        first.quit.assert_called_once_with()
+        self.players[1].quit.assert_not_called()
+
+    @patch('dbus.bus.BusConnection')
+    def test_looping_keeps_bus_references_flat(self, BusConnection):
+        address = 'unix:abstract=/tmp/dbus-EXAMPLE'
+        bus_pool = BusPool()
+
+        def create_player(source, args=None):
+            player = self.create_player(source, args)
+            bus = bus_pool.acquire(address)
+            player.quit.side_effect = lambda: bus_pool.release(address, bus)
+            return player
+        self.pool.acquire.side_effect = create_player
+        playlist = self.create_playlist(sources=['a.mp4', 'b.mp4'], loop=True)
+        playlist.play()
+
+        references = []
+        for _ in range(10):
+            playlist._on_exit(playlist.player, 0)
+            references.append(bus_pool._buses[address][1])
+        playlist.stop()
+
+        self.assertEqual([2] * 10, references)
+        self.assertNotIn(address, bus_pool._buses)
+
+    def test_error_starting_next_item_finishes_playlist(self):
+        playlist = self.create_playlist()
+        playlist.play()
+        error = IOError('No such file')
+        self.pool.acquire.side_effect = error
+
+        playlist._on_exit(self.players[0], 0)
+
+        self.assertIs(error, playlist.error)
+        self.assertIsNone(playlist.player)
+        with self.assertRaises(IOError):
+            playlist.wait(0)
@@ -0,0 +1,106 @@
+import unittest
+
+from mock import MagicMock, Mock
+
+from omxplayer.pool import PlayerPool, DEFAULT_DBUS_NAME_PREFIX
+
+
+class PlayerPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.Player = Mock(side_effect=self.create_player)
+        self.pool = PlayerPool(size=2, args=['--no-osd'], Player=self.Player)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def create_player(self, source, **kwargs):
+        player = MagicMock(name=source)
+        player.source = source
+        return player
+
+    def wait_for_warm_players(self, count):
+        with self.pool._condition:
+            while len(self.pool._warm) < count:
+                self.pool._condition.wait(1)
+
+    def test_preloaded_players_are_started_paused(self):
+        self.pool.preload('a.mp4')
+        self.wait_for_warm_players(1)
+
+        self.Player.assert_called_once_with('a.mp4',
+                                            args=['--no-osd'],
+                                            dbus_name=DEFAULT_DBUS_NAME_PREFIX + '1',
+                                            pause=True)
+
+    def test_players_get_unique_dbus_names(self):
+        self.pool.preload('a.mp4')
+        self.pool.preload('b.mp4')
+        self.wait_for_warm_players(2)
+
+        names = [kwargs['dbus_name'] for _, kwargs in self.Player.call_args_list]
+        self.assertEqual(2, len(set(names)))
+
+    def test_acquire_hands_out_warm_player(self):
+        self.pool.preload('a.mp4')
+        self.wait_for_warm_players(1)
+
+        player = self.pool.acquire('a.mp4')
+
+        self.assertEqual('a.mp4', player.source)
+        self.assertEqual(1, self.Player.call_count)
+
+    def test_acquire_starts_player_when_not_preloaded(self):
+        player = self.pool.acquire('b.mp4')
+
+        self.assertEqual('b.mp4', player.source)
+        player.play.assert_not_called()
+
+    def test_load_plays_new_player_and_quits_previous(self):
+        first = self.pool.load('a.mp4')
+        second = self.pool.load('b.mp4')
+
+        second.play.assert_called_once_with()
+        first.quit.assert_called_once_with()
+        self.assertIs(second, self.pool.current)
+
+    def test_load_paused(self):
+        player = self.pool.load('a.mp4', pause=True)
+
+        player.play.assert_not_called()
+
+    def test_does_not_exceed_size(self):
+        for source in ['a.mp4', 'b.mp4', 'c.mp4']:
+            self.pool.preload(source)
+        self.wait_for_warm_players(2)
+
+        self.assertEqual(2, self.Player.call_count)
+
+    def test_refills_after_handing_out(self):
+        for source in ['a.mp4', 'b.mp4', 'c.mp4']:
+            self.pool.preload(source)
+        self.wait_for_warm_players(2)
+
+        self.pool.acquire('a.mp4')
+        self.wait_for_warm_players(2)
+
+        self.assertEqual(3, self.Player.call_count)
+
+    def test_drops_warm_player_that_exits(self):
+        self.pool.preload('a.mp4')
+        self.wait_for_warm_players(1)
+        player = self.pool._warm[0][1]
+
+        self.pool._on_warm_player_exit(player, 1)
+
+        self.assertEqual([], self.pool._warm)
+
+    def test_close_quits_players(self):
+        self.pool.preload('a.mp4')
+        self.wait_for_warm_players(1)
+        warm = self.pool._warm[0][1]
+        current = self.pool.load('b.mp4')
+
+        self.pool.close()
+
+        warm.quit.assert_called_once_with()
+        current.quit.assert_called_once_with()
@@ -0,0 +1,102 @@
+import unittest
+
+from evento import Event
+from mock import patch, Mock
+
+from omxplayer.position_tracker import PositionTracker
+
+
+@patch('omxplayer.position_tracker._clock')
+class PositionTrackerTests(unittest.TestCase):
+    def setUp(self):
+        self.player = Mock()
+        for event in ['seekEvent', 'positionEvent', 'playEvent', 'pauseEvent',
+                      'stopEvent', 'rateEvent', 'exitEvent']:
+            setattr(self.player, event, Event())
+        self.player.position.return_value = 10.0
+        self.player.playback_status.return_value = 'Playing'
+        self.player.rate.return_value = 1.0
+        self.player.duration.return_value = 60.0
+        self.tracker = PositionTracker(self.player, resync_interval=5.0)
+
+    def test_extrapolates_while_playing(self, clock):
+        clock.return_value = 100.0
+        self.assertEqual(10.0, self.tracker.position())
+
+        clock.return_value = 101.5
+        self.assertEqual(11.5, self.tracker.position())
+
+        self.player.position.assert_called_once_with()
+
+    def test_extrapolates_with_rate(self, clock):
+        self.player.rate.return_value = 2.0
+        clock.return_value = 100.0
+        self.tracker.position()
+
+        clock.return_value = 101.0
+        self.assertEqual(12.0, self.tracker.position())
+
+    def test_stops_at_duration(self, clock):
+        self.player.position.return_value = 58.0
+        clock.return_value = 100.0
+        self.tracker.position()
+
+        clock.return_value = 104.0
+
+        self.assertEqual(60.0, self.tracker.position())
+
+    def test_extrapolates_without_bound_while_duration_is_unknown(self, clock):
+        self.player.duration.return_value = 0.0
+        self.player.position.return_value = 58.0
+        clock.return_value = 100.0
+        self.tracker.position()
+
+        clock.return_value = 104.0
+
+        self.assertEqual(62.0, self.tracker.position())
+
+    def test_does_not_advance_while_paused(self, clock):
+        self.player.playback_status.return_value = 'Paused'
+        clock.return_value = 100.0
+        self.tracker.position()
+
+        clock.return_value = 103.0
+        self.assertEqual(10.0, self.tracker.position())
+
+    def test_resyncs_periodically(self, clock):
+        clock.return_value = 100.0
+        self.tracker.position()
+
+        clock.return_value = 105.0
+        self.player.position.return_value = 15.1
+        self.assertEqual(15.1, self.tracker.position())
+
+        self.assertEqual(2, self.tracker.syncs)
+
+    def test_resyncs_after_events(self, clock):
+        clock.return_value = 100.0
+        for event in ['seekEvent', 'positionEvent', 'playEvent', 'pauseEvent',
+                      'stopEvent', 'rateEvent']:
+            self.tracker.position()
+            getattr(self.player, event)(self.player, 1)
+
+        self.tracker.position()
+
+        self.assertEqual(7, self.tracker.syncs)
+
+    def test_does_not_resync_without_events(self, clock):
+        clock.return_value = 100.0
+        for _ in range(100):
+            self.tracker.position()
+
+        self.assertEqual(1, self.tracker.syncs)
+
+    def test_close_stops_listening(self, clock):
+        clock.return_value = 100.0
+        self.tracker.position()
+        self.tracker.close()
+
+        self.player.seekEvent(self.player, 1)
+        self.tracker.position()
+
+        self.assertEqual(1, self.tracker.syncs)
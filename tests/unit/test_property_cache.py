@@ -0,0 +1,59 @@
+import unittest
+
+from mock import patch, Mock
+
+from omxplayer.property_cache import PropertyCache
+
+
+class PropertyCacheTests(unittest.TestCase):
+    def test_fetches_static_value_once(self):
+        cache = PropertyCache()
+        fetch = Mock(return_value=10)
+
+        self.assertEqual(10, cache.get('Duration', fetch))
+        self.assertEqual(10, cache.get('Duration', fetch))
+
+        fetch.assert_called_once_with()
+        self.assertEqual({'hits': 1, 'misses': 1, 'size': 1}, cache.stats())
+
+    def test_does_not_cache_volatile_values_without_ttl(self):
+        cache = PropertyCache()
+        fetch = Mock(return_value=1.0)
+
+        cache.get('Volume', fetch, volatile=True)
+        cache.get('Volume', fetch, volatile=True)
+
+        self.assertEqual(2, fetch.call_count)
+
+    @patch('omxplayer.property_cache._clock')
+    def test_volatile_values_expire(self, clock):
+        cache = PropertyCache(ttl=0.5)
+        fetch = Mock(return_value=1.0)
+
+        clock.return_value = 100
+        cache.get('Volume', fetch, volatile=True)
+        clock.return_value = 100.4
+        cache.get('Volume', fetch, volatile=True)
+        self.assertEqual(1, fetch.call_count)
+
+        clock.return_value = 100.6
+        cache.get('Volume', fetch, volatile=True)
+        self.assertEqual(2, fetch.call_count)
+
+    def test_invalidate(self):
+        cache = PropertyCache()
+        fetch = Mock(return_value=[])
+        cache.get('ListAudio', fetch)
+
+        cache.invalidate('ListAudio')
+        cache.get('ListAudio', fetch)
+
+        self.assertEqual(2, fetch.call_count)
+
+    def test_clear(self):
+        cache = PropertyCache()
+        cache.get('ResWidth', Mock(return_value=1920))
+
+        cache.clear()
+
+        self.assertEqual(0, cache.stats()['size'])
@@ -0,0 +1,85 @@
+import unittest
+
+from mock import patch, Mock, call
+
+from omxplayer.sync_group import SyncGroup
+
+
+@patch('omxplayer.sync_group._clock', return_value=100.0)
+class SyncGroupTests(unittest.TestCase):
+    def setUp(self):
+        self.players = [Mock(), Mock(), Mock()]
+        for player in self.players:
+            player.position.return_value = 10.0
+        self.group = SyncGroup(self.players, tolerance=0.01, seek_threshold=0.5,
+                               max_rate_adjustment=0.05, interval=1.0)
+
+    def test_requires_players(self, clock):
+        with self.assertRaises(ValueError):
+            SyncGroup([])
+
+    def test_preroll_pauses_every_member_at_position(self, clock):
+        self.group.preroll(5.0)
+
+        for player in self.players:
+            player.assert_has_calls([call.pause(), call.set_position(5.0)])
+
+    def test_play_sends_play_pause_to_every_member(self, clock):
+        self.assertEqual(0.0, self.group.play())
+
+        for player in self.players:
+            player.play_pause.assert_called_once_with()
+
+    def test_errors_are_raised_after_every_member_was_called(self, clock):
+        self.players[1].play_pause.side_effect = RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            self.group.play()
+
+        self.players[0].play_pause.assert_called_once_with()
+        self.players[2].play_pause.assert_called_once_with()
+
+    def test_measures_skew_relative_to_leader(self, clock):
+        self.players[1].position.return_value = 10.25
+        self.players[2].position.return_value = 9.5
+
+        self.assertEqual([0.0, 0.25, -0.5], self.group.measure())
+
+    def test_slows_down_members_ahead(self, clock):
+        self.players[1].position.return_value = 10.03125
+        self.players[2].position.return_value = 9.875
+
+        self.group.correct()
+
+        self.players[1].set_rate.assert_called_once_with(0.96875)
+        self.players[2].set_rate.assert_called_once_with(1.05)
+        self.players[0].set_rate.assert_not_called()
+
+    def test_seeks_members_far_off(self, clock):
+        self.players[1].position.return_value = 11.0
+
+        self.group.correct()
+
+        self.players[1].set_position.assert_called_once_with(10.0)
+        self.players[1].set_rate.assert_not_called()
+        self.assertEqual(1, self.group.stats()[1]['seeks'])
+
+    def test_restores_rate_within_tolerance(self, clock):
+        self.players[1].position.return_value = 10.03125
+        self.group.correct()
+        self.players[1].position.return_value = 10.0078125
+        self.group.correct()
+
+        self.assertEqual([call(0.96875), call(1.0)], self.players[1].set_rate.call_args_list)
+
+    def test_stats(self, clock):
+        self.players[1].position.return_value = 10.25
+        self.group.measure()
+        self.players[1].position.return_value = 9.75
+        self.group.measure()
+
+        stats = self.group.stats()[1]
+        self.assertEqual(-0.25, stats['last'])
+        self.assertEqual(0.25, stats['max'])
+        self.assertEqual(0.25, stats['mean'])
+        self.assertEqual(2, stats['samples'])
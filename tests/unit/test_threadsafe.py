@@ -0,0 +1,179 @@
+import threading
+import unittest
+
+from evento import Event
+from mock import patch
+
+from omxplayer.threadsafe import ThreadSafePlayer, CommandWorker, CommandWorkerClosedError
+
+
+class RecordingPlayer(object):
+    def __init__(self):
+        self.calls = []
+        self.pauseEvent = Event()
+        self.stopEvent = Event()
+        self.exitEvent = Event()
+        self.gate = threading.Event()
+        self.threads = set()
+        self.playing = True
+
+    def block(self):
+        self.gate.wait()
+
+    def set_volume(self, volume):
+        self.record('set_volume', volume)
+        return volume
+
+    def seek(self, relative_position):
+        self.record('seek', relative_position)
+
+    def set_position(self, position):
+        self.record('set_position', position)
+
+    def pause(self):
+        self.record('pause')
+        self.pauseEvent(self)
+
+    def load(self, source):
+        self.record('load', source)
+
+    def play(self):
+        self.record('play')
+
+    def is_playing(self):
+        self.record('is_playing')
+        return self.playing
+
+    def fail(self):
+        raise ValueError('failed')
+
+    def record(self, *call):
+        self.calls.append(call)
+        self.threads.add(threading.current_thread())
+
+
+class CommandWorkerTests(unittest.TestCase):
+    def setUp(self):
+        self.player = RecordingPlayer()
+        self.worker = CommandWorker(self.player)
+        self.addCleanup(self.worker.close, 5)
+        self.addCleanup(self.player.gate.set)
+
+    def submit_while_blocked(self, *commands):
+        self.worker.submit('block')
+        pending = [self.worker.submit(*command) for command in commands]
+        self.player.gate.set()
+        for command in pending:
+            command.result(5)
+        return pending
+
+    def test_runs_commands_in_order(self):
+        self.submit_while_blocked(('set_volume', 1), ('pause',), ('seek', 2))
+
+        self.assertEqual([('set_volume', 1), ('pause',), ('seek', 2)], self.player.calls)
+
+    def test_only_last_volume_is_set(self):
+        pending = self.submit_while_blocked(*[('set_volume', volume) for volume in range(10)])
+
+        self.assertEqual([('set_volume', 9)], self.player.calls)
+        self.assertEqual(9, pending[0].result())
+        self.assertEqual(9, self.worker.coalesced)
+
+    def test_seeks_are_summed(self):
+        self.submit_while_blocked(('seek', 5), ('seek', -2), ('seek', 10))
+
+        self.assertEqual([('seek', 13)], self.player.calls)
+
+    def test_commands_are_not_coalesced_across_other_commands(self):
+        self.submit_while_blocked(('seek', 5), ('pause',), ('seek', -2), ('seek', 10))
+
+        self.assertEqual([('seek', 5), ('pause',), ('seek', 8)], self.player.calls)
+
+    def test_commands_are_not_coalesced_across_load(self):
+        self.submit_while_blocked(('set_position', 10), ('set_volume', 1), ('load', 'b.mp4'),
+                                  ('set_position', 20), ('set_volume', 2))
+
+        self.assertEqual([('set_position', 10), ('set_volume', 1), ('load', 'b.mp4'),
+                          ('set_position', 20), ('set_volume', 2)], self.player.calls)
+
+    def test_set_position_replaces_seeks(self):
+        self.submit_while_blocked(('seek', 5), ('set_position', 30), ('seek', 2))
+
+        self.assertEqual([('set_position', 32)], self.player.calls)
+
+    def test_commands_already_running_are_not_coalesced(self):
+        self.worker.submit('set_volume', 1).result(5)
+        self.worker.submit('set_volume', 2).result(5)
+
+        self.assertEqual([('set_volume', 1), ('set_volume', 2)], self.player.calls)
+
+    def test_exceptions_are_raised_to_caller(self):
+        with self.assertRaises(ValueError):
+            self.worker.call('fail')
+
+    def test_rejects_commands_once_closed(self):
+        self.worker.close(5)
+
+        with self.assertRaises(CommandWorkerClosedError):
+            self.worker.submit('pause')
+
+    def test_close_runs_queued_commands(self):
+        self.worker.submit('block')
+        command = self.worker.submit('pause')
+        self.player.gate.set()
+        self.worker.close(5)
+
+        self.assertTrue(command.done())
+
+
+class ThreadSafePlayerTests(unittest.TestCase):
+    def setUp(self):
+        self.player = RecordingPlayer()
+        self.thread_safe_player = ThreadSafePlayer(self.player)
+        self.addCleanup(self.thread_safe_player.worker.close, 5)
+
+    def test_methods_run_on_worker(self):
+        self.assertEqual(3, self.thread_safe_player.set_volume(3))
+
+        self.assertEqual({self.thread_safe_player.worker._thread}, self.player.threads)
+
+    def test_calls_from_many_threads(self):
+        threads = [threading.Thread(target=self.thread_safe_player.seek, args=(1,))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(10, sum(call[1] for call in self.player.calls))
+        self.assertEqual(1, len(self.player.threads))
+
+    def test_event_callbacks_can_call_player(self):
+        self.thread_safe_player.pauseEvent += lambda _: self.thread_safe_player.set_volume(1)
+
+        self.thread_safe_player.pause()
+
+        self.assertEqual([('pause',), ('set_volume', 1)], self.player.calls)
+
+    def test_attributes_are_not_wrapped(self):
+        self.assertIs(self.player.pauseEvent, self.thread_safe_player.pauseEvent)
+
+    def test_play_sync_returns_on_pause_from_another_thread(self):
+        thread = threading.Thread(target=self.thread_safe_player.play_sync)
+        thread.start()
+        while ('play',) not in self.player.calls:
+            thread.join(0.01)
+
+        self.thread_safe_player.pause()
+
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    @patch('omxplayer.player.PLAY_SYNC_POLL_INTERVAL', 0.01)
+    def test_play_sync_returns_on_pause_through_keys(self):
+        self.player.playing = False
+
+        self.thread_safe_player.play_sync()
+
+        self.assertEqual([('play',), ('is_playing',)], self.player.calls)
+        self.assertEqual({self.thread_safe_player.worker._thread}, self.player.threads)
@@ -0,0 +1,37 @@
+import unittest
+
+from omxplayer.dbus_connection import DBusConnection
+from omxplayer.jeepney_connection import JeepneyConnection
+from omxplayer.transport import connection_class, PendingReply, DBusException
+
+
+class ConnectionClassTests(unittest.TestCase):
+    def test_defaults_to_dbus_python_when_installed(self):
+        self.assertIs(DBusConnection, connection_class())
+
+    def test_picks_jeepney(self):
+        self.assertIs(JeepneyConnection, connection_class('jeepney'))
+
+    def test_rejects_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            connection_class('libdbus')
+
+
+class PendingReplyTests(unittest.TestCase):
+    def test_returns_single_value(self):
+        reply = PendingReply('Get')
+        reply._set_result([0.5])
+
+        self.assertTrue(reply.done())
+        self.assertEqual(0.5, reply.result())
+
+    def test_raises_error(self):
+        reply = PendingReply('Seek')
+        reply._set_exception(DBusException('Failed'))
+
+        with self.assertRaises(DBusException):
+            reply.result()
+
+    def test_times_out(self):
+        with self.assertRaises(RuntimeError):
+            PendingReply('Seek').result(0)